@@ -1,31 +1,66 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, Form, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Dict, List
-import os
-import tempfile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from typing import Dict, List, Optional
+import asyncio
+import hmac
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import partial
 
-from models.resume_parser import ResumeParser
-from models.skill_matcher import SkillMatcher
-from models.ml_classifier import MLClassifier
-from models.bias_detector import BiasDetector
 from models.llm_engine import LLMEngine
+from models.ml_classifier import MLClassifier, watch_current_version
+from models.model_artifact import ArtifactError, current_version, list_versions, rollback_version
+from models.trainer import LEARNERS, backfill_features, create_run, get_run, list_runs, run_training, update_run
+from models.registry import ModelRegistry, freeze_for_fork
 from database.mongo_db import MongoDB
 from database.sql_db import SQLDatabase
+from database.vector_index import VectorIndex
 from config import Config
+from screening import (build_job, candidate_skills, job_text, overall_score, profile_text, rescore_candidates,
+                       screen_and_store)
+from utils import metrics
+from utils.job_queue import JobQueue
+from utils.analytics import CandidateAnalytics
+from utils.embedding_cache import normalize_skill
+from utils.parse_cache import ParseCache
+from utils.profiler import MODES as PROFILE_MODES, ProfileStore, RequestProfile, profiling
+from utils.pipeline import PipelineExecutor, ScreeningPipeline
+from utils.uploads import (CHUNK_SIZE, MalformedUpload, MultipartSpool, RequestBodyLimit, UploadTooLarge,
+                           remove_spooled, spool_zip_members)
+from utils.write_buffer import ScreeningWriter
+import worker
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: fork queue workers first, before this process opens connections or starts threads
+    supervisor.start()
     await mongo_db.connect()
-    sql_db.create_tables()
+    await sql_db.create_tables_async()
+    if not config.PRELOAD_MODELS:
+        model_registry.start()
+    index_task = asyncio.create_task(_run_vector_index())
+    model_watch_task = asyncio.create_task(_watch_model())
     print("✅ Application started successfully")
     yield
     # Shutdown
+    index_task.cancel()
+    model_watch_task.cancel()
+    if rescore_task is not None:
+        rescore_task.cancel()
+    supervisor.stop()
+    await writer.close()
+    if vector_index:
+        vector_index.close()
     await mongo_db.disconnect()
+    await sql_db.dispose_async()
+    training_pool.shutdown(wait=False, cancel_futures=True)
+    executor.shutdown()
     print("👋 Application shutdown")
 
 app = FastAPI(title="AI Resume Screening API", version="1.0.0", lifespan=lifespan)
@@ -41,123 +76,539 @@ app.add_middleware(
 
 # Initialize components
 config = Config()
-resume_parser = ResumeParser()
-skill_matcher = SkillMatcher()
-ml_classifier = MLClassifier()
-bias_detector = BiasDetector()
+
+# Reject oversized uploads while they stream in; the extra MB covers multipart framing and form fields
+app.add_middleware(RequestBodyLimit, limits={
+    '/api/screen-resume': int((config.UPLOAD_MAX_MB + 1) * 1024 * 1024),
+    '/api/screen-batch': int((config.BATCH_UPLOAD_MAX_MB + 1) * 1024 * 1024)
+})
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = metrics.start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (/api/candidate/{candidate_id}) so ids don't explode the series
+    route = request.scope.get('route')
+    path = getattr(route, 'path', 'unmatched')
+    metrics.HTTP_SECONDS.observe(time.perf_counter() - start, request.method, path)
+    metrics.HTTP_REQUESTS.inc(request.method, path, str(response.status_code))
+    if config.SERVER_TIMING_HEADER and timings:
+        response.headers['Server-Timing'] = metrics.server_timing(timings)
+    return response
+
+PROFILED_PATHS = ('/api/screen-resume', '/api/screen-batch')
+
+def _is_admin(token: Optional[str]) -> bool:
+    # Fail closed: with no ADMIN_TOKEN configured nobody can trigger or read profiles
+    return bool(config.ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, config.ADMIN_TOKEN)
+
+def _requested_profile_mode(request: Request) -> Optional[str]:
+    if not config.PROFILING_ENABLED or request.url.path not in PROFILED_PATHS:
+        return None
+    mode = (request.headers.get('x-profile') or request.query_params.get('profile') or '').lower()
+    if mode in ('', '0', 'false', 'off') or not _is_admin(request.headers.get('x-admin-token')):
+        return None
+    return 'sample' if mode in ('1', 'true', 'on') else mode
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    mode = _requested_profile_mode(request)
+    if mode is None:
+        return await call_next(request)
+    if mode not in PROFILE_MODES:
+        return JSONResponse(status_code=400, content={
+            "detail": f"Unknown profile mode '{mode}', expected one of {', '.join(PROFILE_MODES)}"
+        })
+    with profiling(RequestProfile(mode, config.PROFILE_SAMPLE_INTERVAL_MS / 1000)) as profile:
+        response = await call_next(request)
+    await executor.run_io(profile_store.save, profile, {
+        'path': request.url.path, 'status': response.status_code
+    })
+    response.headers['X-Profile-Id'] = profile.id
+    return response
+model_registry = ModelRegistry.default()
+if config.PRELOAD_MODELS:
+    # Under `gunicorn --preload` this runs once in the master, so forked workers share the weights
+    model_registry.load_all()
+    freeze_for_fork()
+# Proxies resolve through the registry, which loads models in the background at startup
+resume_parser = model_registry.proxy('resume_parser')
+skill_matcher = model_registry.proxy('skill_matcher')
+ml_classifier = model_registry.proxy('ml_classifier')
+bias_detector = model_registry.proxy('bias_detector')
 llm_engine = LLMEngine(config.GOOGLE_API_KEY)
 mongo_db = MongoDB(config.MONGO_URI, config.MONGO_DB)
 sql_db = SQLDatabase(config.SQL_URI)
+executor = PipelineExecutor(config.PIPELINE_CPU_WORKERS, config.PIPELINE_IO_WORKERS)
+parse_cache = ParseCache(config.PARSE_CACHE_PATH, config.PARSE_CACHE_MAX_MB * 1024 * 1024)
+screening_pipeline = ScreeningPipeline(
+    executor, resume_parser, skill_matcher, ml_classifier, bias_detector, llm_engine, parse_cache
+)
+writer = ScreeningWriter(
+    mongo_db, sql_db, config.WRITE_BUFFER_MAX_BATCH, config.WRITE_BUFFER_MAX_DELAY_MS / 1000
+)
+job_queue = JobQueue(config.JOB_QUEUE_PATH, config.JOB_VISIBILITY_TIMEOUT, config.JOB_MAX_ATTEMPTS)
+# Whichever API process takes the lock forks the queue workers, sharing any preloaded models
+supervisor = worker.WorkerSupervisor(f"{config.JOB_QUEUE_PATH}.workers.lock", config.SCREENING_WORKERS, model_registry)
+analytics = CandidateAnalytics(
+    sql_db, config.ANALYTICS_MIN_REFRESH_SECONDS, config.ANALYTICS_FULL_REFRESH_SECONDS
+)
+# Opened at startup once the embedding model (and so its dimension) is available
+vector_index = None
+# Training runs in a spawned process so it never competes with requests for the GIL
+training_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+training_task = None
+rescore_task = None
+profile_store = ProfileStore(config.PROFILE_DIR, config.PROFILE_MAX_STORED) if config.PROFILING_ENABLED else None
+if config.PROFILING_ENABLED and not config.ADMIN_TOKEN:
+    print("⚠️ PROFILING_ENABLED is set without ADMIN_TOKEN; profiling stays unavailable until a token is set")
+
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+
+MB = 1024 * 1024
+
+async def _spool_form(request: Request, file_field: str, max_file_bytes: int, **limits) -> MultipartSpool:
+    """Stream the request's multipart body into spool files, handing it to an I/O thread a chunk at a time."""
+    try:
+        spool = MultipartSpool(request.headers.get('content-type'), file_field, max_file_bytes, **limits)
+    except MalformedUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        pending, pending_size = [], 0
+        async for chunk in request.stream():
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= CHUNK_SIZE:
+                await executor.run_io(spool.write, b''.join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            await executor.run_io(spool.write, b''.join(pending))
+        await executor.run_io(spool.finish)
+    except UploadTooLarge as e:
+        spool.discard()
+        raise HTTPException(status_code=413, detail=str(e))
+    except MalformedUpload as e:
+        spool.discard()
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        spool.discard()
+        raise
+    return spool
+
+def _form_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ('1', 'true', 'yes', 'on'):
+        return True
+    if lowered in ('', '0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(value)
+
+def _form_value(fields: Dict[str, str], name: str, default=None, convert=str):
+    if name not in fields:
+        if default is None:
+            raise HTTPException(status_code=422, detail=f"Missing form field '{name}'")
+        return default
+    try:
+        return convert(fields[name])
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid value for form field '{name}'")
+
+def _job_from_form(fields: Dict[str, str]) -> Dict:
+    return build_job(
+        _form_value(fields, 'job_title'), _form_value(fields, 'required_skills'),
+        _form_value(fields, 'experience_required', convert=float),
+        _form_value(fields, 'education_required'), _form_value(fields, 'job_description')
+    )
+
+async def _extract_archives(archives: List[Dict], files: List[Dict]):
+    # Members are decompressed straight from each spooled archive, which is dropped once read
+    max_total_bytes = int(config.BATCH_UPLOAD_MAX_MB * MB)
+    total = sum(f['size'] for f in files)
+    for archive in archives:
+        total += await executor.run_io(
+            spool_zip_members, archive['path'], files, RESUME_EXTENSIONS,
+            int(config.UPLOAD_MAX_MB * MB), max_total_bytes - total, config.BATCH_MAX_FILES
+        )
+        remove_spooled([archive])
+
+def _require_models():
+    if not model_registry.ready():
+        # Retries models whose load failed, once their retry interval has passed
+        model_registry.start()
+        raise HTTPException(status_code=503, detail="Models are still loading", headers={"Retry-After": "5"})
+
+async def _run_vector_index():
+    global vector_index
+    matcher = await executor.run_io(model_registry.get, 'skill_matcher')
+    vector_index = VectorIndex(
+        config.VECTOR_INDEX_DIR, matcher.dimension,
+        nprobe=config.VECTOR_INDEX_NPROBE, min_train_size=config.VECTOR_INDEX_MIN_TRAIN
+    )
+    while not vector_index.writable:
+        # Take over indexing once the process holding the writer lock goes away
+        await asyncio.sleep(config.VECTOR_INDEX_SYNC_SECONDS)
+        await executor.run_io(vector_index.acquire_writer)
+    await _sync_vector_index()
+
+async def _watch_model():
+    classifier = await executor.run_io(model_registry.get, 'ml_classifier')
+    await watch_current_version(classifier, executor, config.MODEL_POLL_SECONDS)
+
+async def _sync_vector_index(batch_size: int = 1000):
+    # Screening (here and in the worker processes) stores profile embeddings in Mongo;
+    # the process holding the index writer lock is the only one that inserts them, and the
+    # only one that drops deleted resumes before purging their tombstoned documents.
+    while True:
+        try:
+            docs = await mongo_db.get_unindexed_profiles(batch_size)
+            if docs:
+                await executor.run_cpu(
+                    vector_index.add, [(str(d['_id']), d['profile_embedding']) for d in docs]
+                )
+                await mongo_db.mark_profiles_indexed([d['_id'] for d in docs])
+            deleted = await mongo_db.get_deleted_resume_ids(batch_size)
+            if deleted:
+                await executor.run_cpu(vector_index.remove, [str(resume_id) for resume_id in deleted])
+                await mongo_db.purge_resumes(deleted)
+            if len(docs) == batch_size or len(deleted) == batch_size:
+                continue
+        except Exception as e:
+            print(f"⚠️ Vector index sync failed: {e}")
+        await asyncio.sleep(config.VECTOR_INDEX_SYNC_SECONDS)
 
 @app.get("/")
 async def root():
     return {"message": "AI Resume Screening API is running", "version": "1.0.0"}
 
+@app.get("/api/health")
+async def health():
+    """Readiness: 200 once every model has loaded, 503 while loading or after a load failure."""
+    status = model_registry.status()
+    if model_registry.ready():
+        return {"status": "ready", "models": status}
+    failed = any(m['state'] == 'failed' for m in status.values())
+    return JSONResponse(status_code=503, content={"status": "failed" if failed else "loading", "models": status})
+
 @app.post("/api/screen-resume")
-async def screen_resume(
-    resume: UploadFile = File(...),
-    job_title: str = Form(...),
-    required_skills: str = Form(...),
-    experience_required: float = Form(...),
-    education_required: str = Form(...),
-    job_description: str = Form(...)
-):
+async def screen_resume(request: Request):
+    """Screen one resume. Form fields: resume (file), job_title, required_skills,
+    experience_required, education_required, job_description and optional async_mode.
+
+    The body is parsed here rather than by FastAPI so the upload is spooled once, as it
+    streams in. It always lands in the shared spool dir the queue workers read from, since
+    async_mode may arrive after the file.
+    """
+    spool = await _spool_form(request, 'resume', int(config.UPLOAD_MAX_MB * MB), directory=config.SPOOL_DIR)
+    queued = False
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume.filename)[1]) as tmp_file:
-            content = await resume.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-
-        parsed_data = resume_parser.parse_resume(tmp_file_path)
-        bias_report = bias_detector.detect_bias(parsed_data)
-        cleaned_data = bias_detector.remove_sensitive_info(parsed_data)
-
-        skills_list = [s.strip() for s in required_skills.split(',')]
-        skill_match_result = skill_matcher.match_skills(
-            cleaned_data.get('skills', []),
-            skills_list
-        )
+        if not spool.files:
+            raise HTTPException(status_code=422, detail="Missing file field 'resume'")
+        spooled = spool.files[0]
+        job = _job_from_form(spool.fields)
+
+        if _form_value(spool.fields, 'async_mode', False, _form_bool):
+            job_id = await executor.run_io(job_queue.enqueue, {
+                'file_path': spooled['path'],
+                'filename': spooled['filename'],
+                'content_hash': spooled['content_hash'],
+                'job': job
+            })
+            queued = True
+            return JSONResponse(status_code=202, content={
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f"/api/jobs/{job_id}"
+            })
 
-        features = ml_classifier.extract_features(
-            cleaned_data,
-            skill_match_result['match_percentage'],
-            experience_required
+        _require_models()
+        response = await screen_and_store(
+            screening_pipeline, writer, spooled['path'], spooled['filename'], job, spooled['content_hash']
         )
-        ml_prediction = ml_classifier.predict(features)
-
-        llm_analysis = llm_engine.analyze_resume(
-            cleaned_data,
-            {
-                'job_title': job_title,
-                'required_skills': skills_list,
-                'experience_required': experience_required,
-                'education_required': education_required,
-                'description': job_description
-            }
+        return JSONResponse(content=response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
+    finally:
+        if not queued:
+            remove_spooled(spool.files)
+
+@app.post("/api/screen-batch")
+async def screen_batch(request: Request):
+    """Screen and rank many resumes. Form fields: resumes (PDF, DOCX or .zip files, repeated),
+    job_title, required_skills, experience_required, education_required, job_description and
+    optional include_llm. Parsed from the raw body, like /api/screen-resume."""
+    _require_models()
+    spool = await _spool_form(
+        request, 'resumes', int(config.UPLOAD_MAX_MB * MB), max_total_bytes=int(config.BATCH_UPLOAD_MAX_MB * MB),
+        max_files=config.BATCH_MAX_FILES, extensions=RESUME_EXTENSIONS, archive_extensions=('.zip',),
+        what="Batch upload"
+    )
+    files = [f for f in spool.files if not f['archive']]
+    archives = [f for f in spool.files if f['archive']]
+    try:
+        job = _job_from_form(spool.fields)
+        job_title = job['job_title']
+        include_llm = _form_value(spool.fields, 'include_llm', False, _form_bool)
+        await _extract_archives(archives, files)
+        if not files:
+            raise HTTPException(status_code=400, detail="No PDF or DOCX resumes found in upload")
+
+        results = await screening_pipeline.run_batch(
+            [f['path'] for f in files], job, include_llm=include_llm,
+            content_hashes=[f['content_hash'] for f in files]
         )
 
-        explanation = ml_classifier.explain_prediction(features)
+        screened = [(f, r) for f, r in zip(files, results) if 'error' not in r]
+        failed = [{'filename': f['filename'], 'error': r['error']} for f, r in zip(files, results) if 'error' in r]
 
-        resume_id = await mongo_db.store_resume({
-            'filename': resume.filename,
-            'parsed_data': parsed_data,
-            'cleaned_data': cleaned_data,
-            'timestamp': datetime.utcnow()
-        })
+        profile_embeddings = await executor.run_cpu(
+            skill_matcher.encode_texts, [profile_text(r['cleaned_data'], r['llm_analysis']) for _, r in screened]
+        ) if screened else []
+
+        now = datetime.utcnow()
+        resume_ids = await mongo_db.store_resumes([{
+            'content_hash': r['content_hash'],
+            'filename': f['filename'],
+            'parsed_data': r['parsed_data'],
+            'cleaned_data': r['cleaned_data'],
+            'profile_embedding': embedding.tolist(),
+            'vector_indexed': False,
+            'timestamp': now
+        } for (f, r), embedding in zip(screened, profile_embeddings)])
 
-        candidate_id = sql_db.store_candidate_score({
+        candidate_ids = await sql_db.store_candidate_scores_async([{
             'resume_id': str(resume_id),
-            'name': cleaned_data.get('name', 'Unknown'),
-            'email': cleaned_data.get('email', ''),
+            'name': r['cleaned_data'].get('name', 'Unknown'),
+            'email': r['cleaned_data'].get('email', ''),
             'job_title': job_title,
-            'skill_match_score': skill_match_result['match_percentage'],
-            'ml_prediction': ml_prediction['label'],
-            'confidence_score': ml_prediction['confidence'],
-            'overall_score': (skill_match_result['match_percentage'] + ml_prediction['confidence'] * 100) / 2,
-            'bias_detected': bias_report['has_bias'],
-            'timestamp': datetime.utcnow()
-        })
-
-        os.unlink(tmp_file_path)
+            'skill_match_score': r['skill_match_result']['match_percentage'],
+            'ml_prediction': r['ml_prediction']['label'],
+            'confidence_score': r['ml_prediction']['confidence'],
+            'overall_score': overall_score(r['skill_match_result'], r['ml_prediction']),
+            'bias_detected': r['bias_report']['has_bias'],
+            'timestamp': now
+        } for (f, r), resume_id in zip(screened, resume_ids)],
+            [candidate_skills(r['cleaned_data'], r['skill_match_result']) for _, r in screened],
+            [r['features'][0].tolist() for _, r in screened])
 
-        response = {
-            'success': True,
+        ranked = sorted([{
             'candidate_id': candidate_id,
             'resume_id': str(resume_id),
-            'parsed_info': {
-                'name': cleaned_data.get('name', 'Unknown'),
-                'email': cleaned_data.get('email', ''),
-                'phone': cleaned_data.get('phone', ''),
-                'skills': cleaned_data.get('skills', []),
-                'experience_years': cleaned_data.get('total_experience', 0),
-                'education': cleaned_data.get('education', []),
-                'certifications': cleaned_data.get('certifications', [])
-            },
-            'skill_analysis': skill_match_result,
-            'ml_prediction': ml_prediction,
-            'llm_insights': llm_analysis,
-            'bias_report': bias_report,
-            'explanation': explanation,
-            'final_recommendation': {
-                'decision': ml_prediction['label'],
-                'overall_score': round((skill_match_result['match_percentage'] + ml_prediction['confidence'] * 100) / 2, 2),
-                'confidence': ml_prediction['confidence']
-            }
-        }
+            'filename': f['filename'],
+            'name': r['cleaned_data'].get('name', 'Unknown'),
+            'email': r['cleaned_data'].get('email', ''),
+            'overall_score': round(overall_score(r['skill_match_result'], r['ml_prediction']), 2),
+            'decision': r['ml_prediction']['label'],
+            'confidence': r['ml_prediction']['confidence'],
+            'skill_match_percentage': r['skill_match_result']['match_percentage'],
+            'matched_skills': [m['required'] for m in r['skill_match_result']['matched_skills']],
+            'missing_skills': r['skill_match_result']['missing_skills'],
+            'bias_detected': r['bias_report']['has_bias'],
+            'llm_insights': r['llm_analysis'],
+            'parse_cache_hit': r['parse_cache_hit']
+        } for (f, r), resume_id, candidate_id in zip(screened, resume_ids, candidate_ids)],
+            key=lambda c: c['overall_score'], reverse=True)
+        for rank, candidate in enumerate(ranked, start=1):
+            candidate['rank'] = rank
 
-        return JSONResponse(content=response)
+        return JSONResponse(content={
+            'success': True,
+            'job_title': job_title,
+            'total_files': len(files),
+            'screened': len(ranked),
+            'failed': failed,
+            'parse_cache_hits': sum(1 for c in ranked if c['parse_cache_hit']),
+            'ranked_candidates': ranked
+        })
 
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Uploaded .zip is not a valid archive")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+    finally:
+        remove_spooled(files + archives)
+
+# Registered before /api/jobs/{job_id} so "match" is not taken for a job id
+@app.get("/api/jobs/match")
+async def match_job(
+    job_title: str,
+    required_skills: str,
+    job_description: str = "",
+    experience_required: float = 0,
+    education_required: str = "",
+    top_k: int = 10
+):
+    _require_models()
+    if vector_index is None:
+        raise HTTPException(status_code=503, detail="Vector index is still opening", headers={"Retry-After": "5"})
+    top_k = max(1, min(top_k, 500))
+    job = build_job(job_title, required_skills, experience_required, education_required, job_description)
+    query = await executor.run_cpu(skill_matcher.encode_texts, [job_text(job)])
+    matches = await executor.run_cpu(vector_index.search, query[0], top_k)
+    candidates = await sql_db.get_candidates_by_resume_ids_async([resume_id for resume_id, _ in matches])
+
+    return {
+        'success': True,
+        'job_title': job_title,
+        'indexed_resumes': len(vector_index),
+        'matches': [{
+            'rank': rank,
+            'resume_id': resume_id,
+            'similarity': round(similarity, 4),
+            'candidate': candidates.get(resume_id)
+        } for rank, (resume_id, similarity) in enumerate(matches, start=1)]
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await executor.run_io(job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'created_at': datetime.utcfromtimestamp(job['created_at']).isoformat(),
+        'updated_at': datetime.utcfromtimestamp(job['updated_at']).isoformat(),
+        'result': job['result'],
+        'error': job['error']
+    }
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return {
+        "success": True,
+        "embedding_cache": skill_matcher.cache.stats() if model_registry.ready() else None,
+        "parse_cache": await executor.run_io(parse_cache.stats),
+        "llm_cache": await executor.run_io(llm_engine.cache.stats) if llm_engine.cache else None,
+        "write_buffer": writer.stats()
+    }
 
 @app.get("/api/candidates")
-async def get_candidates(limit: int = 50):
-    candidates = sql_db.get_all_candidates(limit)
-    return {"success": True, "candidates": candidates}
+async def get_candidates(
+    limit: int = 50,
+    cursor: str = None,
+    job_title: str = None,
+    ml_prediction: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    fields: str = None
+):
+    try:
+        page = await sql_db.list_candidates_async(
+            max(1, min(limit, 1000)), cursor, job_title, ml_prediction,
+            min_score, max_score, [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, **page}
+
+def _skill_list(value: str) -> List[str]:
+    return [normalize_skill(s) for s in value.split(',') if s.strip()]
+
+@app.get("/api/candidates/search")
+async def search_candidates(
+    all_skills: str = "",
+    any_skills: str = "",
+    none_skills: str = "",
+    weights: str = "",
+    min_years: float = 0,
+    min_similarity: float = 0,
+    job_title: str = None,
+    limit: int = 50,
+    offset: int = 0
+):
+    """e.g. ?all_skills=python,kubernetes&min_years=5&weights=go:2,aws:0.5"""
+    limit, offset = max(1, min(limit, 500)), max(0, offset)
+    try:
+        weight_map = {}
+        for item in weights.split(','):
+            if item.strip():
+                name, _, weight = item.rpartition(':')
+                weight_map[normalize_skill(name)] = float(weight)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="weights must look like skill:weight,skill:weight")
+
+    try:
+        result = await sql_db.search_candidates_by_skills_async(
+            _skill_list(all_skills), _skill_list(any_skills), _skill_list(none_skills), weight_map,
+            min_years, min_similarity, job_title, limit, offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"success": True, "limit": limit, "offset": offset, **result}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint for this process (queue worker processes are not included)."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _require_admin(token: Optional[str]):
+    if not _is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if profile_store is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING_ENABLED=true)")
+
+async def _get_profile(profile_id: str, kind: str = None) -> Dict:
+    try:
+        meta = await executor.run_io(profile_store.get, profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meta is None or (kind and kind not in meta['formats']):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return meta
+
+@app.get("/api/admin/profiles")
+async def get_profiles(limit: int = 50, x_admin_token: str = Header(None)):
+    _require_admin(x_admin_token)
+    return {"profiles": await executor.run_io(profile_store.list, max(1, min(limit, 500)))}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, top: int = 30, x_admin_token: str = Header(None)):
+    """Profile metadata with its hottest functions; raw data at /collapsed and /pstats."""
+    _require_admin(x_admin_token)
+    meta = await _get_profile(profile_id)
+    return {**meta, 'top_functions': await executor.run_io(profile_store.top_functions, profile_id, top)}
+
+@app.get("/api/admin/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_collapsed(profile_id: str, x_admin_token: str = Header(None)):
+    """Collapsed stacks, ready for flamegraph.pl or speedscope."""
+    _require_admin(x_admin_token)
+    await _get_profile(profile_id, 'collapsed')
+    return FileResponse(profile_store.path(profile_id, 'collapsed'), media_type='text/plain')
+
+@app.get("/api/admin/profiles/{profile_id}/pstats")
+async def get_profile_pstats(profile_id: str, x_admin_token: str = Header(None)):
+    """Binary pstats dump (cprofile mode), for `python -m pstats` or snakeviz."""
+    _require_admin(x_admin_token)
+    await _get_profile(profile_id, 'pstats')
+    return FileResponse(profile_store.path(profile_id, 'pstats'), filename=f"{profile_id}.pstats")
+
+@app.get("/api/db/pool")
+async def get_pool_stats():
+    return {"success": True, **sql_db.pool_stats()}
+
+@app.get("/api/analytics")
+async def get_analytics(bins: int = 20, days: int = 30, top_jobs: int = 20):
+    snapshot = await executor.run_io(
+        analytics.snapshot, max(1, min(bins, 100)), 100.0, max(1, days), max(1, top_jobs)
+    )
+    return {"success": True, **snapshot}
 
 @app.get("/api/candidate/{candidate_id}")
 async def get_candidate_detail(candidate_id: int):
-    candidate = sql_db.get_candidate_by_id(candidate_id)
+    candidate = await sql_db.get_candidate_by_id_async(candidate_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
@@ -169,17 +620,131 @@ async def get_candidate_detail(candidate_id: int):
         'full_resume_data': resume_data
     }
 
-@app.post("/api/train-model")
-async def train_model():
+@app.delete("/api/candidate/{candidate_id}")
+async def delete_candidate(candidate_id: int):
+    """Delete a candidate, and its resume once no other candidate references it. The resume
+    leaves vector search when the index writer next syncs."""
+    deleted = await sql_db.delete_candidate_async(candidate_id)
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    resume_deleted = False
+    if deleted['resume_id'] and not deleted['resume_shared']:
+        resume_deleted = await mongo_db.mark_resume_deleted(deleted['resume_id'])
+    return {'success': True, 'candidate_id': candidate_id, 'resume_deleted': resume_deleted}
+
+@app.post("/api/candidate/{candidate_id}/label")
+async def label_candidate(candidate_id: int, label: str = Form(...)):
+    """Record the recruiter's outcome for a candidate, by label name or class index."""
+    labels = MLClassifier.labels
+    if label in labels:
+        value = labels.index(label)
+    elif label.isdigit() and int(label) < len(labels):
+        value = int(label)
+    else:
+        raise HTTPException(status_code=400, detail=f"label must be one of: {', '.join(labels)}")
+
+    if not await sql_db.set_candidate_label_async(candidate_id, value):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return {'success': True, 'candidate_id': candidate_id, 'label': labels[value]}
+
+async def _rescore_candidates():
     try:
-        training_data = sql_db.get_training_data()
-        if len(training_data) < 50:
-            raise HTTPException(status_code=400, detail="Not enough data for training (minimum 50 samples)")
+        classifier = await executor.run_io(model_registry.get, 'ml_classifier')
+        # Each batch bumps the candidates version, so analytics in every process rebuilds
+        updated = await rescore_candidates(sql_db, classifier, executor)
+        print(f"✅ Re-scored {updated} candidates with model {classifier.version}")
+    except Exception as e:
+        print(f"⚠️ Re-scoring candidates failed: {e}")
+
+def _start_rescore():
+    """Update stored predictions to the model this process just switched to, in the background."""
+    global rescore_task
+    if rescore_task is not None and not rescore_task.done():
+        # Its remaining batches would be scored by the model being replaced
+        rescore_task.cancel()
+    rescore_task = asyncio.create_task(_rescore_candidates())
 
-        metrics = ml_classifier.train_model(training_data)
-        return {"success": True, "metrics": metrics}
+async def _train_in_background(run_id: str, learner: str, backfill: bool, experience_required: float):
+    try:
+        if backfill:
+            classifier = await executor.run_io(model_registry.get, 'ml_classifier')
+            backfilled = await backfill_features(sql_db, mongo_db, classifier, experience_required)
+            await executor.run_io(update_run, config.ML_MODEL_DIR, run_id, backfilled_features=backfilled)
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(training_pool, partial(
+            run_training, run_id, config.SQL_URI, config.FEATURE_STORE_DIR, config.ML_MODEL_DIR,
+            learner=learner, chunk_rows=config.FEATURE_STORE_CHUNK_ROWS, sample_size=config.TRAIN_SAMPLE_SIZE,
+            epochs=config.TRAIN_SGD_EPOCHS, holdout_percent=config.TRAIN_HOLDOUT_PERCENT,
+            min_accuracy=config.TRAIN_MIN_ACCURACY, max_accuracy_drop=config.TRAIN_MAX_ACCURACY_DROP,
+            n_jobs=config.TRAIN_N_JOBS
+        ))
+        if result['promoted'] and model_registry.ready():
+            # Other processes pick the new version up on their next poll
+            await executor.run_io(ml_classifier.refresh)
+            _start_rescore()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        run = await executor.run_io(get_run, config.ML_MODEL_DIR, run_id)
+        if run is None or run['state'] not in ('failed', 'promoted', 'rejected'):
+            await executor.run_io(update_run, config.ML_MODEL_DIR, run_id, state='failed', error=str(e))
+        print(f"⚠️ Training run {run_id} failed: {e}")
+
+@app.post("/api/train-model", status_code=202)
+async def train_model(learner: str = 'forest', backfill: bool = False, experience_required: float = 1.0):
+    """Start a training run in a separate process; poll /api/train-model/runs/{run_id}.
+
+    The new version is validated on a holdout and, if it passes, becomes CURRENT; every
+    API and worker process then swaps to it without a restart. ``backfill`` first computes
+    features for candidates screened before they were stored, using ``experience_required``
+    in place of their job's (unrecorded) requirement.
+    """
+    global training_task
+    if learner not in LEARNERS:
+        raise HTTPException(status_code=400, detail=f"learner must be one of: {', '.join(LEARNERS)}")
+    if training_task is not None and not training_task.done():
+        raise HTTPException(status_code=409, detail="Training is already running")
+    if backfill:
+        _require_models()
+    elif await sql_db.count_labeled_candidates_async() < 50:
+        raise HTTPException(status_code=400, detail="Not enough data for training (minimum 50 labeled samples)")
+
+    run_id = await executor.run_io(create_run, config.ML_MODEL_DIR, {
+        'learner': learner, 'backfill': backfill, 'experience_required': experience_required
+    })
+    training_task = asyncio.create_task(_train_in_background(run_id, learner, backfill, experience_required))
+    return {"success": True, "run_id": run_id, "status_url": f"/api/train-model/runs/{run_id}"}
+
+@app.get("/api/train-model/runs")
+async def get_training_runs(limit: int = 20):
+    return {"runs": await executor.run_io(list_runs, config.ML_MODEL_DIR, min(max(limit, 1), 100))}
+
+@app.get("/api/train-model/runs/{run_id}")
+async def get_training_run(run_id: str):
+    run = await executor.run_io(get_run, config.ML_MODEL_DIR, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Training run not found")
+    return run
+
+@app.get("/api/models")
+async def get_models():
+    return {
+        'current': await executor.run_io(current_version, config.ML_MODEL_DIR),
+        # What this process is serving; it converges on CURRENT within MODEL_POLL_SECONDS
+        'serving': ml_classifier.version if model_registry.ready() else None,
+        'versions': await executor.run_io(list_versions, config.ML_MODEL_DIR)
+    }
+
+@app.post("/api/models/rollback")
+async def rollback_model(version: str = Form(None)):
+    """Serve the previously promoted model version, or a specific ``version``."""
+    try:
+        current = await executor.run_io(rollback_version, config.ML_MODEL_DIR, version)
+    except ArtifactError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if model_registry.ready():
+        await executor.run_io(ml_classifier.refresh)
+        _start_rescore()
+    return {"success": True, "current": current}
 
 if __name__ == "__main__":
     import uvicorn
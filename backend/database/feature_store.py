@@ -0,0 +1,159 @@
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+
+class FeatureStore:
+    """Columnar copy of the candidate_features table as NumPy chunk files.
+
+    Each chunk holds up to ``chunk_rows`` candidates (ids plus a float32 feature matrix).
+    ``sync`` pulls rows above the manifest's last candidate id, topping up the last
+    partial chunk before starting new ones, so training streams features from local disk
+    one chunk at a time and never reads the whole table into memory.
+
+    Rows can also land below that watermark: backfilled features for older candidates,
+    or screenings committed out of id order by concurrent writers. When the table holds a
+    different number of rows up to the watermark than the store, ``sync`` diffs the stored
+    ids against the table's and appends the missing rows, so chunks are not strictly in
+    id order.
+    """
+
+    def __init__(self, directory: str, feature_names: List[str], chunk_rows: int = 50000):
+        self.directory = directory
+        self.feature_names = list(feature_names)
+        self.chunk_rows = max(1, chunk_rows)
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _empty_manifest(self) -> Dict:
+        return {'feature_names': self.feature_names, 'last_candidate_id': 0, 'chunks': []}
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self._path('manifest.json')) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self._empty_manifest()
+        # A different feature schema means every stored chunk is stale
+        if manifest.get('feature_names') != self.feature_names:
+            return self._empty_manifest()
+        return manifest
+
+    def _write_manifest(self):
+        tmp_path = self._path(f'manifest.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._path('manifest.json'))
+
+    @contextmanager
+    def _locked(self):
+        # Several API workers may sync at once; only one may write chunks
+        with open(self._path('.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _load_chunk(self, chunk: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        with np.load(self._path(chunk['file']), allow_pickle=False) as data:
+            # Rows past the manifest count belong to a write that never committed
+            return data['candidate_id'][:chunk['rows']], data['features'][:chunk['rows']]
+
+    def _write_chunk(self, chunk: Dict, ids: np.ndarray, features: np.ndarray):
+        tmp_path = self._path(f"{chunk['file']}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, candidate_id=ids, features=features)
+        os.replace(tmp_path, self._path(chunk['file']))
+        chunk.update(rows=len(ids), first_id=int(ids[0]), last_id=int(ids[-1]))
+
+    def _append(self, rows: List[tuple]):
+        """Add (candidate_id, *features) rows, filling the last partial chunk first."""
+        table = np.asarray(rows, dtype=np.float64)
+        new_ids = table[:, 0].astype(np.int64)
+        new_features = table[:, 1:].astype(np.float32)
+        chunks = self.manifest['chunks']
+        while len(new_ids):
+            tail = chunks[-1] if chunks and chunks[-1]['rows'] < self.chunk_rows else None
+            room = self.chunk_rows - tail['rows'] if tail else self.chunk_rows
+            ids, features = new_ids[:room], new_features[:room]
+            new_ids, new_features = new_ids[room:], new_features[room:]
+            if tail:
+                old_ids, old_features = self._load_chunk(tail)
+                ids = np.concatenate([old_ids, ids])
+                features = np.concatenate([old_features, features])
+            else:
+                tail = {'file': f"chunk-{len(chunks):06d}.npz"}
+                chunks.append(tail)
+            self._write_chunk(tail, ids, features)
+            self.manifest['last_candidate_id'] = max(self.manifest['last_candidate_id'], int(ids.max()))
+            self._write_manifest()
+
+    def _stored_ids(self) -> np.ndarray:
+        ids = [self._load_chunk(chunk)[0] for chunk in self.manifest['chunks']]
+        return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+    def _sync_missed(self, sql_db, batch_size: int = 1000) -> int:
+        # Rows deleted from the table also make the counts differ; those stay until rebuild()
+        watermark = self.manifest['last_candidate_id']
+        if not watermark or sql_db.count_candidate_features(watermark) == len(self):
+            return 0
+        stored = self._stored_ids()
+        missing = []
+        after_id = 0
+        while True:
+            page = sql_db.get_candidate_feature_ids(after_id, watermark, self.chunk_rows)
+            if not page:
+                break
+            page = np.asarray(page, dtype=np.int64)
+            missing.extend(page[~np.isin(page, stored)].tolist())
+            after_id = int(page[-1])
+        added = 0
+        for i in range(0, len(missing), batch_size):
+            rows = sql_db.get_candidate_features_by_ids(missing[i:i + batch_size])
+            if rows:
+                self._append(rows)
+                added += len(rows)
+        return added
+
+    def sync(self, sql_db) -> int:
+        """Append feature rows the store does not have yet; returns how many were added."""
+        added = 0
+        with self._locked():
+            # Another process may have synced since this store was opened
+            self.manifest = self._read_manifest()
+            while True:
+                rows = sql_db.get_candidate_features(self.manifest['last_candidate_id'], self.chunk_rows)
+                if not rows:
+                    break
+                self._append(rows)
+                added += len(rows)
+            added += self._sync_missed(sql_db)
+        return added
+
+    def rebuild(self, sql_db) -> int:
+        """Drop every chunk and re-read the whole table (e.g. after rows were deleted)."""
+        with self._locked():
+            for chunk in self._read_manifest()['chunks']:
+                if os.path.exists(self._path(chunk['file'])):
+                    os.unlink(self._path(chunk['file']))
+            self.manifest = self._empty_manifest()
+            self._write_manifest()
+        return self.sync(sql_db)
+
+    def iter_chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (candidate_ids, N x F float32 features) one chunk at a time."""
+        for chunk in list(self.manifest['chunks']):
+            yield self._load_chunk(chunk)
+
+    def __len__(self) -> int:
+        return sum(chunk['rows'] for chunk in self.manifest['chunks'])
@@ -1,7 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
 from datetime import datetime
 from bson import ObjectId
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from utils.metrics import timed
 
 class MongoDB:
     def __init__(self, uri: str, db_name: str):
@@ -13,6 +15,14 @@ class MongoDB:
     async def connect(self):
         self.client = AsyncIOMotorClient(self.uri)
         self.db = self.client[self.db_name]
+        await self.db['resumes'].create_index(
+            'content_hash', unique=True,
+            partialFilterExpression={'content_hash': {'$exists': True}}
+        )
+        await self.db['resumes'].create_index(
+            'vector_indexed', partialFilterExpression={'vector_indexed': False}
+        )
+        await self.db['resumes'].create_index('deleted', partialFilterExpression={'deleted': True})
         print("✅ Connected to MongoDB")
 
     async def disconnect(self):
@@ -20,11 +30,55 @@ class MongoDB:
             self.client.close()
             print("👋 Disconnected from MongoDB")
 
+    @timed('mongo.store_resume')
     async def store_resume(self, resume_data: Dict) -> ObjectId:
         collection = self.db['resumes']
+        if 'content_hash' in resume_data:
+            # Re-uploads of the same file reference the document stored the first time
+            existing = await collection.find_one_and_update(
+                {'content_hash': resume_data['content_hash']},
+                {'$setOnInsert': {k: v for k, v in resume_data.items() if k != 'content_hash'}},
+                upsert=True,
+                projection={'_id': 1},
+                return_document=ReturnDocument.AFTER
+            )
+            return existing['_id']
         result = await collection.insert_one(resume_data)
         return result.inserted_id
 
+    @timed('mongo.store_resumes')
+    async def store_resumes(self, resumes: List[Dict]) -> List[ObjectId]:
+        if not resumes:
+            return []
+        collection = self.db['resumes']
+        ids = [None] * len(resumes)
+
+        plain = [i for i, r in enumerate(resumes) if 'content_hash' not in r]
+        if plain:
+            result = await collection.insert_many([resumes[i] for i in plain], ordered=True)
+            for i, inserted_id in zip(plain, result.inserted_ids):
+                ids[i] = inserted_id
+
+        hashed = [i for i, r in enumerate(resumes) if 'content_hash' in r]
+        if hashed:
+            await collection.bulk_write([
+                UpdateOne(
+                    {'content_hash': resumes[i]['content_hash']},
+                    {'$setOnInsert': {k: v for k, v in resumes[i].items() if k != 'content_hash'}},
+                    upsert=True
+                )
+                for i in hashed
+            ], ordered=False)
+            cursor = collection.find(
+                {'content_hash': {'$in': list({resumes[i]['content_hash'] for i in hashed})}},
+                {'_id': 1, 'content_hash': 1}
+            )
+            by_hash = {doc['content_hash']: doc['_id'] async for doc in cursor}
+            for i in hashed:
+                ids[i] = by_hash[resumes[i]['content_hash']]
+        return ids
+
+    @timed('mongo.get_resume')
     async def get_resume(self, resume_id: str) -> Optional[Dict]:
         collection = self.db['resumes']
         resume = await collection.find_one({'_id': ObjectId(resume_id)})
@@ -32,6 +86,56 @@ class MongoDB:
             resume['_id'] = str(resume['_id'])
         return resume
 
+    @timed('mongo.get_cleaned_resumes')
+    async def get_cleaned_resumes(self, resume_ids: List[str]) -> Dict[str, Dict]:
+        """cleaned_data of many resumes in one query, keyed by id; unknown ids are skipped."""
+        ids = [ObjectId(r) for r in resume_ids if ObjectId.is_valid(r)]
+        if not ids:
+            return {}
+        cursor = self.db['resumes'].find({'_id': {'$in': ids}}, {'cleaned_data': 1})
+        return {str(doc['_id']): doc.get('cleaned_data') or {} async for doc in cursor}
+
+    @timed('mongo.get_unindexed_profiles')
+    async def get_unindexed_profiles(self, limit: int = 1000) -> List[Dict]:
+        """Profile embeddings not yet added to the candidate vector index."""
+        cursor = self.db['resumes'].find(
+            {'vector_indexed': False, 'deleted': {'$ne': True}},
+            {'_id': 1, 'profile_embedding': 1}
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @timed('mongo.mark_profiles_indexed')
+    async def mark_profiles_indexed(self, resume_ids: List[ObjectId]):
+        if resume_ids:
+            await self.db['resumes'].update_many(
+                {'_id': {'$in': resume_ids}}, {'$set': {'vector_indexed': True}}
+            )
+
+    @timed('mongo.mark_resume_deleted')
+    async def mark_resume_deleted(self, resume_id: str) -> bool:
+        """Tombstone a resume until the vector index writer has dropped it; see purge_resumes.
+
+        Its content hash is cleared at once so a re-upload of the same file stores a new document.
+        """
+        if not ObjectId.is_valid(resume_id):
+            return False
+        result = await self.db['resumes'].update_one(
+            {'_id': ObjectId(resume_id)},
+            {'$set': {'deleted': True}, '$unset': {'content_hash': ''}}
+        )
+        return result.matched_count == 1
+
+    @timed('mongo.get_deleted_resume_ids')
+    async def get_deleted_resume_ids(self, limit: int = 1000) -> List[ObjectId]:
+        cursor = self.db['resumes'].find({'deleted': True}, {'_id': 1}).limit(limit)
+        return [doc['_id'] async for doc in cursor]
+
+    @timed('mongo.purge_resumes')
+    async def purge_resumes(self, resume_ids: List[ObjectId]):
+        if resume_ids:
+            await self.db['resumes'].delete_many({'_id': {'$in': resume_ids}, 'deleted': True})
+
+    @timed('mongo.search_resumes')
     async def search_resumes(self, query: Dict) -> list:
         collection = self.db['resumes']
         cursor = collection.find(query).limit(100)
@@ -1,13 +1,29 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, Text
+from sqlalchemy import (create_engine, insert, select, bindparam, case, exists, func, tuple_, Column, Integer,
+                        String, Float, Boolean, DateTime, Text, ForeignKey, Index)
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+import base64
+import json
+import threading
+import time
+from config import Config
+from utils.metrics import REGISTRY, span
 
 Base = declarative_base()
 
 class Candidate(Base):
     __tablename__ = 'candidates'
+    __table_args__ = (
+        # Keyset pagination on (timestamp, id), optionally after an equality filter
+        Index('ix_candidates_timestamp_id', 'timestamp', 'id'),
+        Index('ix_candidates_job_title_timestamp_id', 'job_title', 'timestamp', 'id'),
+        Index('ix_candidates_prediction_timestamp_id', 'ml_prediction', 'timestamp', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     resume_id = Column(String(100))
@@ -21,75 +37,734 @@ class Candidate(Base):
     bias_detected = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+CANDIDATE_FIELDS = [c.name for c in Candidate.__table__.columns]
+DEFAULT_LIST_FIELDS = ['id', 'name', 'email', 'job_title', 'overall_score', 'ml_prediction', 'timestamp']
+
+def encode_cursor(timestamp: datetime, candidate_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), candidate_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor: str):
+    try:
+        timestamp, candidate_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(timestamp), int(candidate_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+class Skill(Base):
+    __tablename__ = 'skills'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(200), unique=True, nullable=False)
+
+class CandidateSkill(Base):
+    """Inverted skill index: one row per (candidate, skill) so skill filters run in SQL."""
+    __tablename__ = 'candidate_skills'
+    __table_args__ = (
+        # Covers skill lookups filtered by years and scored by similarity without touching the table
+        Index('ix_candidate_skills_skill_years', 'skill_id', 'years', 'similarity', 'candidate_id'),
+    )
+
+    candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.id'), primary_key=True)
+    similarity = Column(Float, nullable=False, default=1.0)
+    years = Column(Float, nullable=False, default=0.0)
+
+class CandidateFeatures(Base):
+    """Classifier inputs as computed at screening time, so training never has to re-parse resumes."""
+    __tablename__ = 'candidate_features'
+
+    candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'), primary_key=True)
+    skill_match_percentage = Column(Float, nullable=False)
+    experience_years = Column(Float, nullable=False)
+    education_score = Column(Float, nullable=False)
+    certification_count = Column(Float, nullable=False)
+    skill_count = Column(Float, nullable=False)
+
+FEATURE_COLUMNS = [c.name for c in CandidateFeatures.__table__.columns if c.name != 'candidate_id']
+
+class CandidateLabel(Base):
+    """Recruiter outcome for a screened candidate: an index into MLClassifier.labels."""
+    __tablename__ = 'candidate_labels'
+
+    candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'), primary_key=True)
+    label = Column(Integer, nullable=False)
+    labeled_at = Column(DateTime, default=datetime.utcnow)
+
+class DataVersion(Base):
+    """Counters bumped whenever existing rows change, so every process can tell its cached
+    aggregates are stale. 'candidates' covers candidate updates and deletes; inserts are
+    tracked by id instead."""
+    __tablename__ = 'data_versions'
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class PoolMetrics:
+    """Time spent waiting to check a connection out of an engine's pool."""
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, engine: str = 'sync'):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.bucket_counts = [0] * (len(self.BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+        POOL_WAIT_SECONDS.observe(seconds, self.engine)
+
+    def timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        POOL_TIMEOUTS.inc(self.engine)
+
+    def snapshot(self, pool) -> Dict:
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'wait_histogram_ms': {
+                    **{f"<={bound * 1000:g}": n for bound, n in zip(self.BUCKETS, self.bucket_counts)},
+                    f">{self.BUCKETS[-1] * 1000:g}": self.bucket_counts[-1]
+                }
+            }
+        # QueuePool-style pools report their occupancy; SQLite memory pools do not
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, name):
+                stats[f'pool_{name}'] = getattr(pool, name)()
+        return stats
+
+
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    'sql_pool_wait_seconds', 'Time spent waiting for a pooled SQL connection.', ('engine',), PoolMetrics.BUCKETS
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    'sql_pool_timeouts_total', 'SQL connection checkouts that hit the pool timeout.', ('engine',)
+)
+
+
+def async_database_uri(uri: str) -> str:
+    """Map a sync database URI to its asyncio driver (asyncpg / aiosqlite / aiomysql)."""
+    url = make_url(uri)
+    drivers = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite', 'mysql': 'aiomysql'}
+    backend = url.get_backend_name()
+    if backend not in drivers:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return url.set(drivername=f"{backend}+{drivers[backend]}").render_as_string(hide_password=False)
+
+
+def _engine_options(uri: str) -> Dict:
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite uses a single-connection pool without sizing options
+        return {}
+    return {
+        'pool_size': Config.SQL_POOL_SIZE,
+        'max_overflow': Config.SQL_MAX_OVERFLOW,
+        'pool_timeout': Config.SQL_POOL_TIMEOUT,
+        'pool_recycle': Config.SQL_POOL_RECYCLE,
+        'pool_pre_ping': Config.SQL_POOL_PRE_PING
+    }
+
+
 class SQLDatabase:
+    """Every query is written once against a Connection (``_name(conn, ...)``) and exposed
+    as ``name(...)`` on the sync engine and ``name_async(...)`` on the asyncio engine."""
+
     def __init__(self, uri: str):
-        self.engine = create_engine(uri)
+        self.uri = uri
+        self.engine = create_engine(uri, **_engine_options(uri))
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self._async_engine = None
+        self.pool_metrics = PoolMetrics('sync')
+        self.async_pool_metrics = PoolMetrics('async')
+        self._skill_ids: Dict[str, int] = {}
 
-    def create_tables(self):
-        Base.metadata.create_all(self.engine)
-        print("✅ SQL tables created")
+    @property
+    def async_engine(self):
+        # Created on first use so sync-only callers (Streamlit, worker threads) never import the async driver
+        if self._async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            self._async_engine = create_async_engine(async_database_uri(self.uri), **_engine_options(self.uri))
+        return self._async_engine
 
-    def store_candidate_score(self, data: Dict) -> int:
-        session = self.SessionLocal()
+    @contextmanager
+    def _begin(self):
+        start = time.perf_counter()
         try:
-            candidate = Candidate(**data)
-            session.add(candidate)
-            session.commit()
-            session.refresh(candidate)
-            return candidate.id
-        finally:
-            session.close()
-
-    def get_all_candidates(self, limit: int = 50) -> List[Dict]:
-        session = self.SessionLocal()
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            self.pool_metrics.timeout()
+            raise
+        self.pool_metrics.observe(time.perf_counter() - start)
         try:
-            candidates = session.query(Candidate).order_by(
-                Candidate.timestamp.desc()
-            ).limit(limit).all()
-
-            return [{
-                'id': c.id,
-                'name': c.name,
-                'email': c.email,
-                'job_title': c.job_title,
-                'overall_score': c.overall_score,
-                'ml_prediction': c.ml_prediction,
-                'timestamp': c.timestamp.isoformat()
-            } for c in candidates]
+            with conn.begin():
+                yield conn
         finally:
-            session.close()
+            conn.close()
 
-    def get_candidate_by_id(self, candidate_id: int) -> Optional[Dict]:
-        session = self.SessionLocal()
+    @asynccontextmanager
+    async def _begin_async(self):
+        start = time.perf_counter()
         try:
-            candidate = session.query(Candidate).filter(
-                Candidate.id == candidate_id
-            ).first()
-
-            if not candidate:
-                return None
-
-            return {
-                'id': candidate.id,
-                'resume_id': candidate.resume_id,
-                'name': candidate.name,
-                'email': candidate.email,
-                'job_title': candidate.job_title,
-                'skill_match_score': candidate.skill_match_score,
-                'ml_prediction': candidate.ml_prediction,
-                'confidence_score': candidate.confidence_score,
-                'overall_score': candidate.overall_score,
-                'bias_detected': candidate.bias_detected,
-                'timestamp': candidate.timestamp.isoformat()
-            }
+            conn = await self.async_engine.connect()
+        except PoolTimeoutError:
+            self.async_pool_metrics.timeout()
+            raise
+        self.async_pool_metrics.observe(time.perf_counter() - start)
+        try:
+            async with conn.begin():
+                yield conn
         finally:
-            session.close()
+            await conn.close()
 
-    def get_training_data(self) -> List[Dict]:
-        session = self.SessionLocal()
-        try:
-            candidates = session.query(Candidate).all()
+    def _run(self, func: Callable, *args):
+        with span(f"sql.{func.__name__.lstrip('_')}"), self._begin() as conn:
+            return func(conn, *args)
+
+    async def _run_async(self, func: Callable, *args):
+        with span(f"sql.{func.__name__.lstrip('_')}"):
+            async with self._begin_async() as conn:
+                return await conn.run_sync(func, *args)
+
+    def pool_stats(self) -> Dict:
+        return {
+            'sync': self.pool_metrics.snapshot(self.engine.pool),
+            'async': self.async_pool_metrics.snapshot(self._async_engine.pool) if self._async_engine else None
+        }
+
+    async def dispose_async(self):
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+    def _create_tables(self, conn: Connection):
+        Base.metadata.create_all(conn)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        if conn.execute(select(DataVersion.name).where(DataVersion.name == 'candidates')).first() is None:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(DataVersion).values(name='candidates', version=0))
+            except IntegrityError:
+                pass  # Another process seeded it first
+
+    def create_tables(self):
+        self._run(self._create_tables)
+        print("✅ SQL tables created")
+
+    async def create_tables_async(self):
+        await self._run_async(self._create_tables)
+        print("✅ SQL tables created")
+
+    def _get_skill_ids(self, conn: Connection, names, create: bool = False) -> Dict[str, int]:
+        names = set(names)
+        ids = {name: self._skill_ids[name] for name in names if name in self._skill_ids}
+        missing = names - ids.keys()
+        if missing:
+            found = dict(conn.execute(select(Skill.name, Skill.id).where(Skill.name.in_(missing))).all())
+            # Only committed rows are cached; ids created below could still be rolled back
+            self._skill_ids.update(found)
+            ids.update(found)
+        if create:
+            for name in names - ids.keys():
+                try:
+                    with conn.begin_nested():
+                        ids[name] = conn.execute(insert(Skill).values(name=name)).inserted_primary_key[0]
+                except IntegrityError:
+                    # Another writer created it first
+                    ids[name] = conn.execute(select(Skill.id).where(Skill.name == name)).scalar_one()
+        return ids
+
+    def _store_skills(self, conn: Connection, candidate_ids: List[int], skills_list: List[List[Dict]]):
+        skill_ids = self._get_skill_ids(
+            conn, [s['name'] for skills in skills_list for s in skills], create=True
+        )
+        rows = [{
+            'candidate_id': candidate_id,
+            'skill_id': skill_ids[s['name']],
+            'similarity': s['similarity'],
+            'years': s['years']
+        } for candidate_id, skills in zip(candidate_ids, skills_list) for s in skills]
+        if rows:
+            conn.execute(insert(CandidateSkill), rows)
+
+    def _store_candidate_features(self, conn: Connection, candidate_ids: List[int],
+                                  features_list: List[Optional[List[float]]]) -> int:
+        rows = [{
+            'candidate_id': candidate_id,
+            **{name: float(value) for name, value in zip(FEATURE_COLUMNS, features)}
+        } for candidate_id, features in zip(candidate_ids, features_list) if features is not None]
+        if rows:
+            conn.execute(insert(CandidateFeatures), rows)
+        return len(rows)
+
+    def _store_candidate_scores(self, conn: Connection, rows: List[Dict],
+                                skills_list: List[List[Dict]] = None,
+                                features_list: List[Optional[List[float]]] = None) -> List[int]:
+        if not rows:
             return []
-        finally:
-            session.close()
+        result = conn.execute(insert(Candidate).returning(Candidate.id, sort_by_parameter_order=True), rows)
+        ids = [row.id for row in result]
+        if skills_list:
+            self._store_skills(conn, ids, skills_list)
+        if features_list:
+            self._store_candidate_features(conn, ids, features_list)
+        return ids
+
+    def store_candidate_score(self, data: Dict, skills: List[Dict] = None, features: List[float] = None) -> int:
+        """``skills``: [{'name', 'similarity', 'years'}] with normalized, unique names.
+        ``features``: the classifier feature vector, in FEATURE_COLUMNS order."""
+        return self._run(self._store_candidate_scores, [data], [skills or []], [features])[0]
+
+    async def store_candidate_score_async(self, data: Dict, skills: List[Dict] = None,
+                                          features: List[float] = None) -> int:
+        return (await self._run_async(self._store_candidate_scores, [data], [skills or []], [features]))[0]
+
+    def store_candidate_scores(self, rows: List[Dict], skills_list: List[List[Dict]] = None,
+                               features_list: List[Optional[List[float]]] = None) -> List[int]:
+        return self._run(self._store_candidate_scores, rows, skills_list, features_list)
+
+    async def store_candidate_scores_async(self, rows: List[Dict], skills_list: List[List[Dict]] = None,
+                                           features_list: List[Optional[List[float]]] = None) -> List[int]:
+        return await self._run_async(self._store_candidate_scores, rows, skills_list, features_list)
+
+    def store_candidate_features(self, candidate_ids: List[int], features_list: List[List[float]]) -> int:
+        return self._run(self._store_candidate_features, candidate_ids, features_list)
+
+    async def store_candidate_features_async(self, candidate_ids: List[int], features_list: List[List[float]]) -> int:
+        return await self._run_async(self._store_candidate_features, candidate_ids, features_list)
+
+    def _search_candidates_by_skills(self, conn: Connection, all_skills: List[str], any_skills: List[str],
+                                     none_skills: List[str], weights: Dict[str, float], min_years: float,
+                                     min_similarity: float, job_title: Optional[str], limit: int,
+                                     offset: int) -> Dict:
+        all_skills, any_skills, none_skills = all_skills or [], any_skills or [], none_skills or []
+        weights = dict(weights or {})
+        for name in all_skills + any_skills:
+            weights.setdefault(name, 1.0)
+        if not weights:
+            raise ValueError("At least one required, optional or weighted skill is needed")
+
+        skill_ids = self._get_skill_ids(conn, list(weights) + none_skills)
+        if any(name not in skill_ids for name in all_skills):
+            return {'candidates': [], 'has_more': False}
+        all_ids = [skill_ids[n] for n in all_skills]
+        any_ids = [skill_ids[n] for n in any_skills if n in skill_ids]
+        none_ids = [skill_ids[n] for n in none_skills if n in skill_ids]
+        weight_by_id = {skill_ids[n]: w for n, w in weights.items() if n in skill_ids}
+        if not weight_by_id or (any_skills and not any_ids):
+            return {'candidates': [], 'has_more': False}
+
+        scored = select(
+            CandidateSkill.candidate_id,
+            func.sum(
+                case(weight_by_id, value=CandidateSkill.skill_id, else_=0.0) * CandidateSkill.similarity
+            ).label('score'),
+            func.count().label('matched')
+        ).where(
+            CandidateSkill.skill_id.in_(list(weight_by_id)),
+            CandidateSkill.years >= min_years,
+            CandidateSkill.similarity >= min_similarity
+        ).group_by(CandidateSkill.candidate_id)
+        if all_ids:
+            scored = scored.having(
+                func.sum(case((CandidateSkill.skill_id.in_(all_ids), 1), else_=0)) == len(all_ids)
+            )
+        if any_ids:
+            scored = scored.having(
+                func.sum(case((CandidateSkill.skill_id.in_(any_ids), 1), else_=0)) >= 1
+            )
+        scored = scored.subquery()
+
+        query = select(
+            Candidate.id, Candidate.resume_id, Candidate.name, Candidate.email, Candidate.job_title,
+            Candidate.overall_score, Candidate.ml_prediction, Candidate.timestamp,
+            scored.c.score, scored.c.matched
+        ).join(scored, Candidate.id == scored.c.candidate_id)
+        if none_ids:
+            query = query.where(~exists().where(
+                CandidateSkill.candidate_id == Candidate.id,
+                CandidateSkill.skill_id.in_(none_ids)
+            ))
+        if job_title:
+            query = query.where(Candidate.job_title == job_title)
+
+        # Fetch one extra row instead of counting the whole match set
+        rows = conn.execute(
+            query.order_by(scored.c.score.desc(), Candidate.id.desc()).limit(limit + 1).offset(offset)
+        ).all()
+
+        return {
+            'candidates': [{
+                'id': r.id,
+                'resume_id': r.resume_id,
+                'name': r.name,
+                'email': r.email,
+                'job_title': r.job_title,
+                'overall_score': r.overall_score,
+                'ml_prediction': r.ml_prediction,
+                'skill_score': round(float(r.score), 4),
+                'matched_skills': r.matched,
+                'timestamp': r.timestamp.isoformat()
+            } for r in rows[:limit]],
+            'has_more': len(rows) > limit
+        }
+
+    def search_candidates_by_skills(self, all_skills: List[str] = None, any_skills: List[str] = None,
+                                    none_skills: List[str] = None, weights: Dict[str, float] = None,
+                                    min_years: float = 0, min_similarity: float = 0,
+                                    job_title: str = None, limit: int = 50, offset: int = 0) -> Dict:
+        """Boolean (all/any/none) and weighted skill search over the candidate_skills index.
+
+        Candidates are ranked by sum(weight * similarity) over the all/any/weighted skills
+        they have (weight 1 unless given). Skill names must already be normalized.
+        """
+        return self._run(self._search_candidates_by_skills, all_skills, any_skills, none_skills, weights,
+                         min_years, min_similarity, job_title, limit, offset)
+
+    async def search_candidates_by_skills_async(self, all_skills: List[str] = None, any_skills: List[str] = None,
+                                                none_skills: List[str] = None, weights: Dict[str, float] = None,
+                                                min_years: float = 0, min_similarity: float = 0,
+                                                job_title: str = None, limit: int = 50, offset: int = 0) -> Dict:
+        return await self._run_async(self._search_candidates_by_skills, all_skills, any_skills, none_skills,
+                                     weights, min_years, min_similarity, job_title, limit, offset)
+
+    def _list_candidates(self, conn: Connection, limit: int, cursor: Optional[str], job_title: Optional[str],
+                         ml_prediction: Optional[str], min_score: Optional[float], max_score: Optional[float],
+                         fields: Optional[List[str]]) -> Dict:
+        fields = list(dict.fromkeys(['id', 'timestamp'] + (fields or DEFAULT_LIST_FIELDS)))
+        unknown = [f for f in fields if f not in CANDIDATE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown candidate fields: {', '.join(unknown)}")
+
+        query = select(*[Candidate.__table__.c[f] for f in fields])
+        if cursor:
+            query = query.where(tuple_(Candidate.timestamp, Candidate.id) < tuple_(*decode_cursor(cursor)))
+        if job_title:
+            query = query.where(Candidate.job_title == job_title)
+        if ml_prediction:
+            query = query.where(Candidate.ml_prediction == ml_prediction)
+        if min_score is not None:
+            query = query.where(Candidate.overall_score >= min_score)
+        if max_score is not None:
+            query = query.where(Candidate.overall_score <= max_score)
+        query = query.order_by(Candidate.timestamp.desc(), Candidate.id.desc()).limit(limit + 1)
+
+        rows = conn.execute(query).mappings().all()
+        candidates = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(candidates[-1]['timestamp'], candidates[-1]['id'])
+        for candidate in candidates:
+            candidate['timestamp'] = candidate['timestamp'].isoformat()
+        return {'candidates': candidates, 'next_cursor': next_cursor}
+
+    def list_candidates(self, limit: int = 50, cursor: str = None, job_title: str = None,
+                        ml_prediction: str = None, min_score: float = None, max_score: float = None,
+                        fields: List[str] = None) -> Dict:
+        """Newest-first page of candidates using keyset pagination on (timestamp, id).
+
+        ``cursor`` is the ``next_cursor`` of the previous page, so every page is an index
+        range scan regardless of depth. Only ``fields`` are selected (id and timestamp always).
+        """
+        return self._run(self._list_candidates, limit, cursor, job_title, ml_prediction,
+                         min_score, max_score, fields)
+
+    async def list_candidates_async(self, limit: int = 50, cursor: str = None, job_title: str = None,
+                                    ml_prediction: str = None, min_score: float = None,
+                                    max_score: float = None, fields: List[str] = None) -> Dict:
+        return await self._run_async(self._list_candidates, limit, cursor, job_title, ml_prediction,
+                                     min_score, max_score, fields)
+
+    def get_all_candidates(self, limit: int = 50) -> List[Dict]:
+        return self.list_candidates(limit)['candidates']
+
+    async def get_all_candidates_async(self, limit: int = 50) -> List[Dict]:
+        return (await self.list_candidates_async(limit))['candidates']
+
+    def _bump_candidates_version(self, conn: Connection):
+        conn.execute(
+            DataVersion.__table__.update().where(DataVersion.name == 'candidates')
+            .values(version=DataVersion.version + 1)
+        )
+
+    def _get_candidates_version(self, conn: Connection) -> int:
+        return conn.execute(
+            select(DataVersion.version).where(DataVersion.name == 'candidates')
+        ).scalar() or 0
+
+    def get_candidates_version(self) -> int:
+        """Changes whenever stored candidates are updated or deleted (not on inserts)."""
+        return self._run(self._get_candidates_version)
+
+    async def get_candidates_version_async(self) -> int:
+        return await self._run_async(self._get_candidates_version)
+
+    def _get_max_candidate_id(self, conn: Connection) -> int:
+        return conn.execute(select(func.max(Candidate.id))).scalar() or 0
+
+    def get_max_candidate_id(self) -> int:
+        return self._run(self._get_max_candidate_id)
+
+    async def get_max_candidate_id_async(self) -> int:
+        return await self._run_async(self._get_max_candidate_id)
+
+    def _aggregate_candidates(self, conn: Connection, after_id: int, up_to_id: Optional[int]) -> Dict:
+        if up_to_id is None:
+            up_to_id = self._get_max_candidate_id(conn)
+        in_range = (Candidate.id > after_id) & (Candidate.id <= up_to_id)
+        score = func.coalesce(Candidate.overall_score, 0.0)
+        day = func.date(Candidate.timestamp)
+        # floor, not CAST: CAST rounds on PostgreSQL, which would shift x.5+ scores up a bucket
+        bucket = func.floor(score)
+
+        by_job = conn.execute(
+            select(Candidate.job_title, Candidate.ml_prediction, func.count(), func.sum(score))
+            .where(in_range).group_by(Candidate.job_title, Candidate.ml_prediction)
+        ).all()
+        by_day = conn.execute(
+            select(day, func.count(), func.sum(score)).where(in_range).group_by(day)
+        ).all()
+        buckets = conn.execute(
+            select(bucket, func.count()).where(in_range).group_by(bucket)
+        ).all()
+
+        return {
+            'up_to_id': up_to_id,
+            'by_job': [(job or 'Unknown', pred or 'Unknown', n, float(total or 0)) for job, pred, n, total in by_job],
+            'by_day': [(str(d), n, float(total or 0)) for d, n, total in by_day if d is not None],
+            'score_buckets': [(int(b), n) for b, n in buckets]
+        }
+
+    def aggregate_candidates(self, after_id: int = 0, up_to_id: int = None) -> Dict:
+        """Mergeable aggregates over candidates with after_id < id <= up_to_id.
+
+        Returns per (job_title, ml_prediction) counts and score sums, per-day counts and
+        score sums, and a histogram of scores in 1-point buckets (bucket = floor(score)).
+        """
+        return self._run(self._aggregate_candidates, after_id, up_to_id)
+
+    async def aggregate_candidates_async(self, after_id: int = 0, up_to_id: int = None) -> Dict:
+        return await self._run_async(self._aggregate_candidates, after_id, up_to_id)
+
+    def _get_candidate_by_id(self, conn: Connection, candidate_id: int) -> Optional[Dict]:
+        candidate = conn.execute(
+            select(Candidate.__table__).where(Candidate.id == candidate_id)
+        ).mappings().first()
+        if not candidate:
+            return None
+
+        candidate = dict(candidate)
+        candidate['timestamp'] = candidate['timestamp'].isoformat()
+        return candidate
+
+    def get_candidate_by_id(self, candidate_id: int) -> Optional[Dict]:
+        return self._run(self._get_candidate_by_id, candidate_id)
+
+    async def get_candidate_by_id_async(self, candidate_id: int) -> Optional[Dict]:
+        return await self._run_async(self._get_candidate_by_id, candidate_id)
+
+    def _get_candidates_by_resume_ids(self, conn: Connection, resume_ids: List[str]) -> Dict[str, Dict]:
+        if not resume_ids:
+            return {}
+        rows = conn.execute(
+            select(*[Candidate.__table__.c[f] for f in ['resume_id'] + DEFAULT_LIST_FIELDS])
+            .where(Candidate.resume_id.in_(resume_ids))
+            .order_by(Candidate.timestamp.asc(), Candidate.id.asc())
+        ).mappings().all()
+
+        # Later rows overwrite earlier ones, leaving the latest screening per resume
+        candidates = {}
+        for row in rows:
+            candidate = dict(row)
+            candidate['timestamp'] = candidate['timestamp'].isoformat()
+            candidates[candidate['resume_id']] = candidate
+        return candidates
+
+    def get_candidates_by_resume_ids(self, resume_ids: List[str]) -> Dict[str, Dict]:
+        """Latest screening row per resume id."""
+        return self._run(self._get_candidates_by_resume_ids, resume_ids)
+
+    async def get_candidates_by_resume_ids_async(self, resume_ids: List[str]) -> Dict[str, Dict]:
+        return await self._run_async(self._get_candidates_by_resume_ids, resume_ids)
+
+    def _delete_candidate(self, conn: Connection, candidate_id: int) -> Optional[Dict]:
+        """Delete a candidate and its child rows. Returns its resume_id and whether any other
+        candidate still references that resume, or None when there was no such candidate."""
+        row = conn.execute(select(Candidate.resume_id).where(Candidate.id == candidate_id)).first()
+        if row is None:
+            return None
+        resume_id = row[0]
+        # Explicit child deletes: SQLite ignores ON DELETE CASCADE unless foreign keys are enabled
+        for model in (CandidateSkill, CandidateFeatures, CandidateLabel):
+            conn.execute(model.__table__.delete().where(model.candidate_id == candidate_id))
+        conn.execute(Candidate.__table__.delete().where(Candidate.id == candidate_id))
+        self._bump_candidates_version(conn)
+        shared = resume_id is not None and conn.execute(
+            select(exists().where(Candidate.resume_id == resume_id))
+        ).scalar()
+        return {'resume_id': resume_id, 'resume_shared': bool(shared)}
+
+    def delete_candidate(self, candidate_id: int) -> Optional[Dict]:
+        return self._run(self._delete_candidate, candidate_id)
+
+    async def delete_candidate_async(self, candidate_id: int) -> Optional[Dict]:
+        return await self._run_async(self._delete_candidate, candidate_id)
+
+    def _get_candidate_features(self, conn: Connection, after_id: int, limit: int) -> List[tuple]:
+        rows = conn.execute(
+            select(CandidateFeatures.candidate_id, *[CandidateFeatures.__table__.c[f] for f in FEATURE_COLUMNS])
+            .where(CandidateFeatures.candidate_id > after_id)
+            .order_by(CandidateFeatures.candidate_id).limit(limit)
+        ).all()
+        return [tuple(row) for row in rows]
+
+    def get_candidate_features(self, after_id: int = 0, limit: int = 10000) -> List[tuple]:
+        """Keyset chunk of (candidate_id, *features) rows ordered by candidate id."""
+        return self._run(self._get_candidate_features, after_id, limit)
+
+    async def get_candidate_features_async(self, after_id: int = 0, limit: int = 10000) -> List[tuple]:
+        return await self._run_async(self._get_candidate_features, after_id, limit)
+
+    def _count_candidate_features(self, conn: Connection, max_id: int) -> int:
+        return conn.execute(
+            select(func.count()).select_from(CandidateFeatures).where(CandidateFeatures.candidate_id <= max_id)
+        ).scalar() or 0
+
+    def count_candidate_features(self, max_id: int) -> int:
+        return self._run(self._count_candidate_features, max_id)
+
+    async def count_candidate_features_async(self, max_id: int) -> int:
+        return await self._run_async(self._count_candidate_features, max_id)
+
+    def _get_candidate_feature_ids(self, conn: Connection, after_id: int, max_id: int, limit: int) -> List[int]:
+        return list(conn.execute(
+            select(CandidateFeatures.candidate_id)
+            .where(CandidateFeatures.candidate_id > after_id, CandidateFeatures.candidate_id <= max_id)
+            .order_by(CandidateFeatures.candidate_id).limit(limit)
+        ).scalars())
+
+    def get_candidate_feature_ids(self, after_id: int, max_id: int, limit: int = 50000) -> List[int]:
+        """Keyset page of candidate ids that have feature rows, up to ``max_id``."""
+        return self._run(self._get_candidate_feature_ids, after_id, max_id, limit)
+
+    async def get_candidate_feature_ids_async(self, after_id: int, max_id: int, limit: int = 50000) -> List[int]:
+        return await self._run_async(self._get_candidate_feature_ids, after_id, max_id, limit)
+
+    def _get_candidate_features_by_ids(self, conn: Connection, candidate_ids: List[int]) -> List[tuple]:
+        rows = conn.execute(
+            select(CandidateFeatures.candidate_id, *[CandidateFeatures.__table__.c[f] for f in FEATURE_COLUMNS])
+            .where(CandidateFeatures.candidate_id.in_(candidate_ids))
+            .order_by(CandidateFeatures.candidate_id)
+        ).all()
+        return [tuple(row) for row in rows]
+
+    def get_candidate_features_by_ids(self, candidate_ids: List[int]) -> List[tuple]:
+        return self._run(self._get_candidate_features_by_ids, candidate_ids) if candidate_ids else []
+
+    async def get_candidate_features_by_ids_async(self, candidate_ids: List[int]) -> List[tuple]:
+        return await self._run_async(self._get_candidate_features_by_ids, candidate_ids) if candidate_ids else []
+
+    def _get_candidates_missing_features(self, conn: Connection, after_id: int, limit: int) -> List[Dict]:
+        rows = conn.execute(
+            select(Candidate.id, Candidate.resume_id, Candidate.skill_match_score)
+            .outerjoin(CandidateFeatures, CandidateFeatures.candidate_id == Candidate.id)
+            .where(Candidate.id > after_id, CandidateFeatures.candidate_id.is_(None))
+            .order_by(Candidate.id).limit(limit)
+        ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def get_candidates_missing_features(self, after_id: int = 0, limit: int = 1000) -> List[Dict]:
+        """Candidates screened before features were stored, for backfilling from Mongo."""
+        return self._run(self._get_candidates_missing_features, after_id, limit)
+
+    async def get_candidates_missing_features_async(self, after_id: int = 0, limit: int = 1000) -> List[Dict]:
+        return await self._run_async(self._get_candidates_missing_features, after_id, limit)
+
+    def _update_candidate_predictions(self, conn: Connection, rows: List[Dict]) -> int:
+        if not rows:
+            return 0
+        conn.execute(
+            Candidate.__table__.update().where(Candidate.id == bindparam('b_id')).values(
+                ml_prediction=bindparam('b_prediction'), confidence_score=bindparam('b_confidence'),
+                overall_score=bindparam('b_overall')
+            ),
+            [{'b_id': r['id'], 'b_prediction': r['ml_prediction'], 'b_confidence': r['confidence_score'],
+              'b_overall': r['overall_score']} for r in rows]
+        )
+        self._bump_candidates_version(conn)
+        return len(rows)
+
+    def update_candidate_predictions(self, rows: List[Dict]) -> int:
+        """Overwrite stored predictions: rows of {'id', 'ml_prediction', 'confidence_score', 'overall_score'}."""
+        return self._run(self._update_candidate_predictions, rows)
+
+    async def update_candidate_predictions_async(self, rows: List[Dict]) -> int:
+        return await self._run_async(self._update_candidate_predictions, rows)
+
+    def _set_candidate_label(self, conn: Connection, candidate_id: int, label: int) -> bool:
+        if conn.execute(select(Candidate.id).where(Candidate.id == candidate_id)).first() is None:
+            return False
+        values = {'label': label, 'labeled_at': datetime.utcnow()}
+        update = CandidateLabel.__table__.update().where(CandidateLabel.candidate_id == candidate_id)
+        if conn.execute(update.values(**values)).rowcount == 0:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(CandidateLabel).values(candidate_id=candidate_id, **values))
+            except IntegrityError:
+                # Labeled concurrently; last write wins
+                conn.execute(update.values(**values))
+        return True
+
+    def set_candidate_label(self, candidate_id: int, label: int) -> bool:
+        """Record (or replace) a candidate's outcome label; False if the candidate does not exist."""
+        return self._run(self._set_candidate_label, candidate_id, label)
+
+    async def set_candidate_label_async(self, candidate_id: int, label: int) -> bool:
+        return await self._run_async(self._set_candidate_label, candidate_id, label)
+
+    def _get_candidate_labels(self, conn: Connection, after_id: int, limit: int) -> List[tuple]:
+        rows = conn.execute(
+            select(CandidateLabel.candidate_id, CandidateLabel.label)
+            .where(CandidateLabel.candidate_id > after_id)
+            .order_by(CandidateLabel.candidate_id).limit(limit)
+        ).all()
+        return [tuple(row) for row in rows]
+
+    def get_candidate_labels(self, after_id: int = 0, limit: int = 100000) -> List[tuple]:
+        """Keyset chunk of (candidate_id, label) rows ordered by candidate id."""
+        return self._run(self._get_candidate_labels, after_id, limit)
+
+    async def get_candidate_labels_async(self, after_id: int = 0, limit: int = 100000) -> List[tuple]:
+        return await self._run_async(self._get_candidate_labels, after_id, limit)
+
+    def _count_labeled_candidates(self, conn: Connection) -> int:
+        return conn.execute(
+            select(func.count()).select_from(CandidateLabel)
+            .join(CandidateFeatures, CandidateFeatures.candidate_id == CandidateLabel.candidate_id)
+        ).scalar() or 0
+
+    def count_labeled_candidates(self) -> int:
+        """Labeled candidates that have stored features, i.e. usable training rows."""
+        return self._run(self._count_labeled_candidates)
+
+    async def count_labeled_candidates_async(self) -> int:
+        return await self._run_async(self._count_labeled_candidates)
@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """IVF (inverted file) cosine index over memory-mapped float32 vectors.
+
+    Rows live in three memory-mapped files (vectors, IVF list assignment, alive flag)
+    plus an append-only id file, so inserts, in-place replacements and deletes are incremental
+    and the matrix never has to fit in RAM. A delete clears the row's alive flag; the row and its
+    id stay, and are reused if the id is added again. One process holds the writer lock; others
+    open the files read-only, pick up rows as the writer publishes them, and can take the lock
+    over with ``acquire_writer`` if that process goes away.
+    """
+
+    def __init__(self, index_dir: str, dim: int, nprobe: int = 8,
+                 min_train_size: int = 2048, initial_capacity: int = 1024):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self._lock = threading.RLock()
+        os.makedirs(index_dir, exist_ok=True)
+
+        self._lock_file = open(self._path('.lock'), 'a')
+        self.writable = self._acquire_writer_lock()
+
+        self.count = 0
+        self.capacity = 0
+        self.trained_count = 0
+        self._ids: List[str] = []
+        self._rows = {}
+        self._ids_offset = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._centroids_version = 0
+        self._meta_mtime = None
+        self._vectors = self._assign = self._alive = None
+
+        self.initial_capacity = initial_capacity
+        if self.writable:
+            self._open_writer()
+        else:
+            self._refresh()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _acquire_writer_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _open_writer(self):
+        if not os.path.exists(self._path('meta.json')):
+            self._create(self.initial_capacity)
+        self._refresh()
+        self._map()
+        # Drop ids appended by a writer that died before publishing them
+        with open(self._path('ids.txt'), 'r+b') as f:
+            f.truncate(self._ids_offset)
+
+    def acquire_writer(self) -> bool:
+        """Try to take the writer lock, e.g. after the process holding it has exited."""
+        with self._lock:
+            if not self.writable and self._acquire_writer_lock():
+                self.writable = True
+                self._open_writer()
+            return self.writable
+
+    def _create(self, capacity: int):
+        for name, itemsize in (('vectors.f32', 4 * self.dim), ('assign.i32', 4), ('alive.u8', 1)):
+            with open(self._path(name), 'wb') as f:
+                f.truncate(capacity * itemsize)
+        open(self._path('ids.txt'), 'w').close()
+        self.capacity = capacity
+        self._write_meta()
+
+    def _map(self):
+        mode = 'r+' if self.writable else 'r'
+        self._vectors = np.memmap(self._path('vectors.f32'), dtype=np.float32, mode=mode,
+                                  shape=(self.capacity, self.dim))
+        self._assign = np.memmap(self._path('assign.i32'), dtype=np.int32, mode=mode, shape=(self.capacity,))
+        self._alive = np.memmap(self._path('alive.u8'), dtype=np.uint8, mode=mode, shape=(self.capacity,))
+
+    def _grow(self, min_capacity: int):
+        capacity = max(min_capacity, self.capacity * 2)
+        self._flush()
+        for name, itemsize in (('vectors.f32', 4 * self.dim), ('assign.i32', 4), ('alive.u8', 1)):
+            with open(self._path(name), 'r+b') as f:
+                f.truncate(capacity * itemsize)
+        self.capacity = capacity
+        self._map()
+
+    def _write_meta(self):
+        meta = {
+            'dim': self.dim,
+            'count': self.count,
+            'capacity': self.capacity,
+            'trained_count': self.trained_count,
+            'centroids_version': self._centroids_version
+        }
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _flush(self):
+        if self.writable and self._vectors is not None:
+            self._vectors.flush()
+            self._assign.flush()
+            self._alive.flush()
+
+    def _refresh(self):
+        """Load (or, for readers, catch up with) the state the writer last published."""
+        meta_path = self._path('meta.json')
+        if not os.path.exists(meta_path):
+            return
+        mtime = os.stat(meta_path).st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['dim'] != self.dim:
+            raise ValueError(f"Vector index dimension {meta['dim']} does not match model dimension {self.dim}")
+
+        if meta['capacity'] != self.capacity or self._vectors is None:
+            self.capacity = meta['capacity']
+            self._map()
+
+        # Only ids the writer has published, and only whole lines: it may be mid-append
+        with open(self._path('ids.txt'), 'rb') as f:
+            f.seek(self._ids_offset)
+            while len(self._ids) < meta['count']:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                resume_id = line[:-1].decode('utf-8')
+                self._rows[resume_id] = len(self._ids)
+                self._ids.append(resume_id)
+                self._ids_offset += len(line)
+        self.count = min(meta['count'], len(self._ids))
+        self.trained_count = meta['trained_count']
+
+        if meta['centroids_version'] and meta['centroids_version'] != self._centroids_version:
+            self._centroids = np.load(self._path('centroids.npy'))
+        self._centroids_version = meta['centroids_version']
+        self._meta_mtime = mtime
+
+    def _nearest_list(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _train(self, iterations: int = 10):
+        rng = np.random.default_rng(42)
+        alive_rows = np.flatnonzero(self._alive[:self.count])
+        nlist = max(1, int(np.sqrt(len(alive_rows))))
+        sample_rows = np.sort(rng.choice(alive_rows, min(len(alive_rows), nlist * 64), replace=False))
+        sample = np.asarray(self._vectors[sample_rows])
+
+        # Spherical k-means on a sample of the stored vectors
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            centroids[counts > 0] = _normalize(sums[counts > 0])
+        self._centroids = centroids.astype(np.float32)
+
+        for start in range(0, self.count, 65536):
+            end = min(start + 65536, self.count)
+            self._assign[start:end] = self._nearest_list(np.asarray(self._vectors[start:end]))
+
+        tmp_path = self._path('centroids.tmp.npy')
+        np.save(tmp_path, self._centroids)
+        os.replace(tmp_path, self._path('centroids.npy'))
+        self._centroids_version += 1
+        self.trained_count = self.count
+
+    def add(self, items: List[Tuple[str, np.ndarray]]):
+        """Insert or replace vectors by id."""
+        if not self.writable:
+            raise RuntimeError("Vector index is opened read-only in this process")
+        if not items:
+            return
+
+        with self._lock:
+            vectors = _normalize(np.asarray([v for _, v in items], dtype=np.float32).reshape(-1, self.dim))
+            rows, new_ids = [], []
+            for resume_id, _ in items:
+                row = self._rows.get(resume_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[resume_id] = row
+                    self._ids.append(resume_id)
+                    new_ids.append(resume_id)
+                rows.append(row)
+
+            if len(self._ids) > self.capacity:
+                self._grow(len(self._ids))
+
+            rows = np.asarray(rows)
+            self._vectors[rows] = vectors
+            self._alive[rows] = 1
+            self._assign[rows] = self._nearest_list(vectors) if self._centroids is not None else -1
+
+            with open(self._path('ids.txt'), 'ab') as f:
+                f.writelines(f"{resume_id}\n".encode('utf-8') for resume_id in new_ids)
+                self._ids_offset = f.tell()
+            self.count = len(self._ids)
+
+            alive = int(self._alive[:self.count].sum())
+            if (self._centroids is None and alive >= self.min_train_size) or \
+                    (self._centroids is not None and self.count >= 2 * self.trained_count):
+                self._train()
+
+            self._flush()
+            self._write_meta()
+            self._meta_mtime = os.stat(self._path('meta.json')).st_mtime_ns
+
+    def remove(self, resume_ids: List[str]) -> int:
+        """Drop ids from search results; returns how many were present."""
+        if not self.writable:
+            raise RuntimeError("Vector index is opened read-only in this process")
+
+        with self._lock:
+            rows = [self._rows[r] for r in resume_ids if r in self._rows]
+            rows = [row for row in rows if self._alive[row]]
+            if not rows:
+                return 0
+            # Readers map the same file, so the cleared flags are visible to them once flushed
+            self._alive[np.asarray(rows)] = 0
+            self._flush()
+            return len(rows)
+
+    def search(self, query: np.ndarray, top_k: int = 10, nprobe: int = None) -> List[Tuple[str, float]]:
+        with self._lock:
+            if not self.writable:
+                self._refresh()
+            if self.count == 0:
+                return []
+
+            q = _normalize(np.asarray(query, dtype=np.float32).reshape(self.dim))
+            alive = self._alive[:self.count] == 1
+            rows = None
+            if self._centroids is not None:
+                probes = np.argsort(-(self._centroids @ q))[:nprobe or self.nprobe]
+                rows = np.flatnonzero(alive & np.isin(self._assign[:self.count], probes))
+            if rows is None or len(rows) < top_k:
+                rows = np.flatnonzero(alive)
+            if len(rows) == 0:
+                return []
+
+            scores = np.asarray(self._vectors[rows]) @ q
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[rows[i]], float(scores[i])) for i in top]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._alive[:self.count].sum()) if self.count else 0
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._lock_file.close()
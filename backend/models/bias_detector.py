@@ -1,6 +1,7 @@
 from typing import Dict, List
 import re
 from config import Config
+from utils.metrics import timed
 
 class BiasDetector:
     def __init__(self):
@@ -14,6 +15,7 @@ class BiasDetector:
             'disability': r'\b(disabled|disability|handicapped|impairment)\b'
         }
 
+    @timed('bias.detect')
     def detect_bias(self, resume_data: Dict) -> Dict:
         raw_text = resume_data.get('raw_text', '').lower()
         detected_biases = {}
@@ -38,6 +40,7 @@ class BiasDetector:
             'risk_level': 'high' if bias_count >= 3 else 'medium' if bias_count >= 1 else 'low'
         }
 
+    @timed('bias.redact')
     def remove_sensitive_info(self, resume_data: Dict) -> Dict:
         cleaned_data = resume_data.copy()
         if 'raw_text' in cleaned_data:
@@ -0,0 +1,84 @@
+import json
+import re
+from typing import Dict, List, NamedTuple
+
+# Alphanumeric runs and single punctuation characters, so "node.js" -> node . js
+# and "c++" -> c + +; keywords only match on whole tokens ("java" never hits "javascript").
+_TOKEN = re.compile(r'[a-z0-9]+|[^\sa-z0-9]')
+_END = ''
+
+
+class KeywordHit(NamedTuple):
+    category: str
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """Token trie over a keyword vocabulary that finds every hit in a single scan of the text."""
+
+    def __init__(self, vocabulary: Dict[str, List[str]], aliases: Dict[str, str] = None):
+        self._trie: Dict = {}
+        self.size = 0
+        for category, keywords in vocabulary.items():
+            for keyword in keywords:
+                self._add(keyword, category, keyword)
+
+        for alias, canonical in (aliases or {}).items():
+            for category, keywords in vocabulary.items():
+                if canonical in keywords:
+                    self._add(alias, category, canonical)
+
+    @classmethod
+    def load_vocabulary(cls, path: str) -> Dict:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def merge_vocabulary(base: Dict[str, List[str]], custom: Dict) -> Dict[str, List[str]]:
+        """Extend ``base`` with ``custom``'s keywords per category, dropping duplicates.
+
+        Categories named in ``custom['replace']`` (or all of them, if it is ``true``) are
+        replaced instead of extended.
+        """
+        replace = custom.get('replace', [])
+        merged = {category: list(keywords) for category, keywords in base.items()}
+        for category, keywords in custom.items():
+            if category == 'replace':
+                continue
+            if replace is True or category in replace:
+                merged[category] = []
+            existing = merged.setdefault(category, [])
+            seen = {keyword.lower() for keyword in existing}
+            for keyword in keywords:
+                if keyword.lower() not in seen:
+                    seen.add(keyword.lower())
+                    existing.append(keyword)
+        return merged
+
+    def _add(self, phrase: str, category: str, keyword: str):
+        tokens = _TOKEN.findall(phrase.lower())
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, set()).add((category, keyword))
+        self.size += 1
+
+    def scan(self, text: str) -> List[KeywordHit]:
+        """Return all keyword hits with offsets into ``text.lower()``; overlapping hits are kept."""
+        tokens = [(m.group(), m.start(), m.end()) for m in _TOKEN.finditer(text.lower())]
+        hits = []
+        for i, (token, start, _) in enumerate(tokens):
+            node = self._trie.get(token)
+            j = i
+            while node is not None:
+                for category, keyword in node.get(_END, ()):
+                    hits.append(KeywordHit(category, keyword, start, tokens[j][2]))
+                j += 1
+                if j == len(tokens):
+                    break
+                node = node.get(tokens[j][0])
+        return hits
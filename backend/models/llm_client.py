@@ -0,0 +1,137 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from utils.metrics import span
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` requests per second with bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attr in ('code', 'status_code', 'status'):
+        value = getattr(error, attr, None)
+        if callable(value):
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class AsyncLLMClient:
+    """Non-blocking generate_content with a concurrency cap, per-call deadline,
+    token-bucket rate limiting and jittered exponential backoff on 429/5xx.
+
+    Every call runs on an event loop the client owns, in a background thread, whether it comes
+    from another loop (``generate``) or from plain threads (``generate_sync``), so the cap and
+    the rate limit hold for the whole process rather than per caller.
+    """
+
+    def __init__(self, model, max_concurrency: int = 8, timeout: float = 30.0,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 rate_limiter: TokenBucket = None):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        # Sync fallback calls get their own pool: a hung call that outlives its deadline keeps
+        # a thread busy, and it must not be one the default executor lends to other work
+        self._executor = None
+        self._native_async = hasattr(model, 'generate_content_async')
+        self._loop = None
+        self._loop_pid = None
+        self._loop_lock = threading.Lock()
+        self.retries = 0
+
+    def _client_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            # A loop inherited through fork has no thread running it in the child
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client", daemon=True).start()
+                self._loop, self._loop_pid = loop, os.getpid()
+                self._semaphore = self._executor = None
+                if self.rate_limiter:
+                    self.rate_limiter._lock = None
+            return self._loop
+
+    async def _call(self, prompt: str):
+        if self._native_async:
+            try:
+                return await self.model.generate_content_async(prompt)
+            except NotImplementedError:
+                # e.g. REST transport pointed at a local stub server
+                self._native_async = False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-call")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.model.generate_content, prompt)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, asyncio.TimeoutError):
+            return True
+        return _status_code(error) in RETRYABLE_STATUS_CODES
+
+    async def generate(self, prompt: str) -> str:
+        # run_coroutine_threadsafe carries the caller's context, so spans land in its request
+        future = asyncio.run_coroutine_threadsafe(self._generate(prompt), self._client_loop())
+        return await asyncio.wrap_future(future)
+
+    def generate_sync(self, prompt: str) -> str:
+        """Blocking generate for callers without an event loop (e.g. Streamlit)."""
+        return asyncio.run_coroutine_threadsafe(self._generate(prompt), self._client_loop()).result()
+
+    async def _generate(self, prompt: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            try:
+                async with self._semaphore:
+                    with span('llm.request'):
+                        response = await asyncio.wait_for(self._call(prompt), self.timeout)
+                return response.text
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+            # Full jitter keeps retrying clients from stampeding the API together
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
@@ -1,14 +1,100 @@
 import google.generativeai as genai
 from typing import Dict, List
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from models.llm_client import AsyncLLMClient, TokenBucket
+from utils.llm_cache import LLMResponseCache, SingleFlight
+from utils.metrics import timed
+
+FALLBACK_QUESTIONS = [
+    "Tell me about your relevant experience.",
+    "What are your key technical strengths?",
+    "Describe a challenging project you worked on.",
+    "Why are you interested in this role?",
+    "Where do you see yourself in 5 years?"
+]
 
 class LLMEngine:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    def __init__(self, api_key: str, model=None, cache: LLMResponseCache = None):
+        if Config.LLM_API_ENDPOINT:
+            genai.configure(api_key=api_key, transport='rest',
+                            client_options={'api_endpoint': Config.LLM_API_ENDPOINT})
+        else:
+            genai.configure(api_key=api_key)
+        self.model_name = Config.LLM_MODEL
+        # Any object with generate_content(prompt) -> response.text works, e.g. a local fake in tests
+        self.model = model or genai.GenerativeModel(self.model_name)
+        if cache is None and Config.LLM_CACHE_PATH:
+            cache = LLMResponseCache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_TTL)
+        self.cache = cache
+        # SQLite lookups block, so the async path runs them here rather than on the event loop
+        self._cache_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-cache")
+        self._single_flight = SingleFlight()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.client = AsyncLLMClient(
+            self.model,
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+            timeout=Config.LLM_TIMEOUT,
+            max_retries=Config.LLM_MAX_RETRIES,
+            backoff_base=Config.LLM_BACKOFF_BASE,
+            backoff_max=Config.LLM_BACKOFF_MAX,
+            rate_limiter=TokenBucket(Config.LLM_RATE_LIMIT_RPS, Config.LLM_RATE_LIMIT_BURST)
+            if Config.LLM_RATE_LIMIT_RPS > 0 else None
+        )
 
-    def analyze_resume(self, resume_data: Dict, job_data: Dict) -> Dict:
-        prompt = f"""
+    @timed('llm.generate')
+    def _generate(self, prompt: str) -> str:
+        key = LLMResponseCache.make_key(self.model_name, prompt)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        def call() -> str:
+            # Same deadline, retries, concurrency cap and rate limit as the async path
+            text = self.client.generate_sync(prompt)
+            if self.cache:
+                self.cache.set(key, text)
+            return text
+
+        return self._single_flight.do(key, call)
+
+    async def _cache_call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._cache_pool, func, *args)
+
+    @timed('llm.generate')
+    async def _agenerate(self, prompt: str) -> str:
+        key = LLMResponseCache.make_key(self.model_name, prompt)
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        # Registered before the cache lookup yields, so identical prompts arriving meanwhile wait on it
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await self._cache_call(self.cache.get, key) if self.cache else None
+            if text is None:
+                text = await self.client.generate(prompt)
+                if self.cache:
+                    await self._cache_call(self.cache.set, key, text)
+            future.set_result(text)
+            return text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _analysis_prompt(self, resume_data: Dict, job_data: Dict) -> str:
+        return f"""
         You are an expert HR recruiter. Analyze the following candidate resume against the job requirements.
 
         **Candidate Information:**
@@ -34,64 +120,103 @@ class LLMEngine:
         Format your response as JSON with these exact keys: overall_assessment, strengths, weaknesses, recommendations, hiring_recommendation
         """
 
+    def _parse_analysis(self, text: str) -> Dict:
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text
-
-            try:
-                if '```json' in text:
-                    text = text.split('```json')[1].split('```')[0]
-                elif '```' in text:
-                    text = text.split('```')[1].split('```')[0]
-                result = json.loads(text.strip())
-            except:
-                result = {
-                    'overall_assessment': text[:300],
-                    'strengths': ['Analysis available in full text'],
-                    'weaknesses': ['See detailed response'],
-                    'recommendations': ['Refer to complete analysis'],
-                    'hiring_recommendation': 'See full analysis',
-                    'full_text': text
-                }
-            return result
-        except Exception as e:
+            if '```json' in text:
+                text = text.split('```json')[1].split('```')[0]
+            elif '```' in text:
+                text = text.split('```')[1].split('```')[0]
+            return json.loads(text.strip())
+        except (ValueError, IndexError):
             return {
-                'error': str(e),
-                'overall_assessment': 'Unable to generate LLM analysis',
-                'strengths': [],
-                'weaknesses': [],
-                'recommendations': [],
-                'hiring_recommendation': 'Analysis unavailable'
+                'overall_assessment': text[:300],
+                'strengths': ['Analysis available in full text'],
+                'weaknesses': ['See detailed response'],
+                'recommendations': ['Refer to complete analysis'],
+                'hiring_recommendation': 'See full analysis',
+                'full_text': text
             }
 
-    def generate_rejection_email(self, candidate_name: str, weaknesses: List[str]) -> str:
-        prompt = f"""Write a professional, empathetic rejection email for candidate {candidate_name}.
+    def _analysis_error(self, error: Exception) -> Dict:
+        return {
+            'error': str(error),
+            'overall_assessment': 'Unable to generate LLM analysis',
+            'strengths': [],
+            'weaknesses': [],
+            'recommendations': [],
+            'hiring_recommendation': 'Analysis unavailable'
+        }
+
+    def analyze_resume(self, resume_data: Dict, job_data: Dict) -> Dict:
+        try:
+            return self._parse_analysis(self._generate(self._analysis_prompt(resume_data, job_data)))
+        except Exception as e:
+            return self._analysis_error(e)
+
+    async def analyze_resume_async(self, resume_data: Dict, job_data: Dict) -> Dict:
+        try:
+            return self._parse_analysis(await self._agenerate(self._analysis_prompt(resume_data, job_data)))
+        except Exception as e:
+            return self._analysis_error(e)
+
+    def _rejection_prompt(self, candidate_name: str, weaknesses: List[str]) -> str:
+        return f"""Write a professional, empathetic rejection email for candidate {candidate_name}.
         Areas for improvement: {chr(10).join(f'- {w}' for w in weaknesses)}
         Keep it professional, encouraging, and brief (under 150 words)."""
 
+    def _rejection_fallback(self, candidate_name: str, error: Exception) -> str:
+        print(f"⚠️ Rejection email generation failed: {error}")
+        return f"Dear {candidate_name},\n\nThank you for your interest. While we appreciate your application, we have decided to move forward with other candidates at this time.\n\nBest regards"
+
+    def generate_rejection_email(self, candidate_name: str, weaknesses: List[str]) -> str:
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except:
-            return f"Dear {candidate_name},\n\nThank you for your interest. While we appreciate your application, we have decided to move forward with other candidates at this time.\n\nBest regards"
+            return self._generate(self._rejection_prompt(candidate_name, weaknesses))
+        except Exception as e:
+            return self._rejection_fallback(candidate_name, e)
 
-    def generate_interview_questions(self, resume_data: Dict, job_data: Dict) -> List[str]:
-        prompt = f"""Generate 5 specific interview questions for a candidate applying for {job_data['job_title']}.
+    async def generate_rejection_email_async(self, candidate_name: str, weaknesses: List[str]) -> str:
+        try:
+            return await self._agenerate(self._rejection_prompt(candidate_name, weaknesses))
+        except Exception as e:
+            return self._rejection_fallback(candidate_name, e)
+
+    def _questions_prompt(self, resume_data: Dict, job_data: Dict) -> str:
+        return f"""Generate 5 specific interview questions for a candidate applying for {job_data['job_title']}.
         Candidate has: Skills: {', '.join(resume_data.get('skills', [])[:5])}, Experience: {resume_data.get('total_experience', 0)} years
         Questions should be technical and behavioral mix. Return as JSON array of strings."""
 
+    def _parse_questions(self, text: str) -> List[str]:
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text
             if '```json' in text:
                 text = text.split('```json')[1].split('```')[0]
             questions = json.loads(text.strip())
             return questions if isinstance(questions, list) else []
-        except:
-            return [
-                "Tell me about your relevant experience.",
-                "What are your key technical strengths?",
-                "Describe a challenging project you worked on.",
-                "Why are you interested in this role?",
-                "Where do you see yourself in 5 years?"
-            ]
+        except (ValueError, IndexError):
+            return list(FALLBACK_QUESTIONS)
+
+    def generate_interview_questions(self, resume_data: Dict, job_data: Dict) -> List[str]:
+        try:
+            return self._parse_questions(self._generate(self._questions_prompt(resume_data, job_data)))
+        except Exception as e:
+            print(f"⚠️ Interview question generation failed: {e}")
+            return list(FALLBACK_QUESTIONS)
+
+    async def generate_interview_questions_async(self, resume_data: Dict, job_data: Dict) -> List[str]:
+        try:
+            return self._parse_questions(await self._agenerate(self._questions_prompt(resume_data, job_data)))
+        except Exception as e:
+            print(f"⚠️ Interview question generation failed: {e}")
+            return list(FALLBACK_QUESTIONS)
+
+    async def generate_all_async(self, resume_data: Dict, job_data: Dict, weaknesses: List[str]) -> Dict:
+        """Run analysis, interview questions and rejection email concurrently."""
+        analysis, questions, rejection_email = await asyncio.gather(
+            self.analyze_resume_async(resume_data, job_data),
+            self.generate_interview_questions_async(resume_data, job_data),
+            self.generate_rejection_email_async(resume_data.get('name', 'Candidate'), weaknesses)
+        )
+        return {
+            'analysis': analysis,
+            'interview_questions': questions,
+            'rejection_email': rejection_email
+        }
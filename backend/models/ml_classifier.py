@@ -1,123 +1,112 @@
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import classification_report, accuracy_score
+import asyncio
 import numpy as np
-import pickle
 import os
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from config import Config
+from models.model_artifact import ArtifactError, current_version, load_artifact
+from utils.metrics import timed
 
 class MLClassifier:
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.scaler = StandardScaler()
+    """Scores candidates with the current model artifact (see models/trainer.py for training),
+    falling back to rules until one has been trained."""
+
+    feature_names = [
+        'skill_match_percentage',
+        'experience_years',
+        'education_score',
+        'certification_count',
+        'skill_count'
+    ]
+    labels = ['Not Suitable', 'Moderately Suitable', 'Highly Suitable']
+
+    def __init__(self, model_dir: str = None):
+        self.model_dir = model_dir or Config.ML_MODEL_DIR
+        self.artifact = None
         self.is_trained = False
-        self.feature_names = [
-            'skill_match_percentage',
-            'experience_years',
-            'education_score',
-            'certification_count',
-            'skill_count'
-        ]
+        self._failed_version = None
         self.load_model()
 
+    def _education_score(self, education: List[str]) -> int:
+        education = [str(e).lower() for e in education]
+        if any('phd' in e or 'doctorate' in e for e in education):
+            return 4
+        if any('master' in e or 'm.tech' in e for e in education):
+            return 3
+        if any('bachelor' in e or 'b.tech' in e for e in education):
+            return 2
+        if any('diploma' in e for e in education):
+            return 1
+        return 0
+
     def extract_features(self, resume_data: Dict, skill_match: float, required_exp: float) -> np.ndarray:
-        education_score = 0
-        education = resume_data.get('education', [])
-        if any('phd' in str(e).lower() or 'doctorate' in str(e).lower() for e in education):
-            education_score = 4
-        elif any('master' in str(e).lower() or 'm.tech' in str(e).lower() for e in education):
-            education_score = 3
-        elif any('bachelor' in str(e).lower() or 'b.tech' in str(e).lower() for e in education):
-            education_score = 2
-        elif any('diploma' in str(e).lower() for e in education):
-            education_score = 1
-
-        features = np.array([[
-            skill_match,
-            min(resume_data.get('total_experience', 0) / max(required_exp, 1), 2.0),
-            education_score,
-            len(resume_data.get('certifications', [])),
-            len(resume_data.get('skills', []))
-        ]])
-        return features
+        return self.extract_features_batch([resume_data], [skill_match], required_exp)
+
+    def extract_features_batch(self, resume_data_list: List[Dict], skill_matches: List[float],
+                               required_exp) -> np.ndarray:
+        """Build an N x 5 feature matrix; required_exp is a scalar or one value per resume."""
+        experience = np.array([r.get('total_experience', 0) for r in resume_data_list], dtype=float)
+        required = np.maximum(np.asarray(required_exp, dtype=float), 1)
+
+        return np.column_stack([
+            np.asarray(skill_matches, dtype=float),
+            np.minimum(experience / required, 2.0),
+            [self._education_score(r.get('education', [])) for r in resume_data_list],
+            [len(r.get('certifications', [])) for r in resume_data_list],
+            [len(r.get('skills', [])) for r in resume_data_list]
+        ]) if resume_data_list else np.empty((0, len(self.feature_names)))
 
     def predict(self, features: np.ndarray) -> Dict:
-        if not self.is_trained:
-            return self._rule_based_prediction(features)
-
-        features_scaled = self.scaler.transform(features)
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
-        labels = ['Not Suitable', 'Moderately Suitable', 'Highly Suitable']
-
-        return {
-            'label': labels[prediction],
+        return self.predict_batch(features[:1])[0]
+
+    def predict_arrays(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized scoring: returns (classes, confidences, N x 3 probabilities)."""
+        # Read the reference once; load_model may swap it while this call is running
+        artifact = self.artifact
+        if artifact is None:
+            return self._rule_based_arrays(features)
+
+        # A model trained without examples of some label has fewer probability columns
+        probabilities = np.zeros((len(features), len(self.labels)))
+        probabilities[:, artifact.classes] = artifact.predict_proba(artifact.scale(features))
+        classes = probabilities.argmax(axis=1)
+        return classes, probabilities.max(axis=1), probabilities
+
+    @timed('classifier.predict')
+    def predict_batch(self, features: np.ndarray) -> List[Dict]:
+        if len(features) == 0:
+            return []
+        classes, confidences, probabilities = self.predict_arrays(features)
+
+        return [{
+            'label': self.labels[prediction],
             'class': int(prediction),
-            'confidence': float(probabilities[prediction]),
-            'probabilities': {
-                labels[i]: float(prob) for i, prob in enumerate(probabilities)
-            }
-        }
-
-    def _rule_based_prediction(self, features: np.ndarray) -> Dict:
-        skill_match = features[0][0]
-        exp_ratio = features[0][1]
-        education = features[0][2]
-        certs = features[0][3]
-
-        score = (skill_match * 0.4 + exp_ratio * 50 * 0.3 + 
-                 education * 10 * 0.2 + min(certs * 5, 20) * 0.1)
-
-        if score >= 70:
-            label, class_idx, confidence = 'Highly Suitable', 2, min(score / 100, 0.95)
-        elif score >= 50:
-            label, class_idx, confidence = 'Moderately Suitable', 1, min(score / 100, 0.80)
-        else:
-            label, class_idx, confidence = 'Not Suitable', 0, max(1 - score / 100, 0.60)
-
-        return {
-            'label': label,
-            'class': class_idx,
-            'confidence': confidence,
+            'confidence': float(confidence),
             'probabilities': {
-                'Not Suitable': 1.0 if class_idx == 0 else 0.1,
-                'Moderately Suitable': 1.0 if class_idx == 1 else 0.3,
-                'Highly Suitable': 1.0 if class_idx == 2 else 0.2
+                self.labels[i]: float(prob) for i, prob in enumerate(probs)
             }
-        }
-
-    def train_model(self, training_data: List[Dict]) -> Dict:
-        if len(training_data) < 50:
-            raise ValueError("Insufficient training data")
-
-        X, y = [], []
-        for data in training_data:
-            features = self.extract_features(
-                data['resume_data'],
-                data['skill_match_score'],
-                data['experience_required']
-            )
-            X.append(features[0])
-            y.append(data['label'])
-
-        X, y = np.array(X), np.array(y)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
+        } for prediction, confidence, probs in zip(classes, confidences, probabilities)]
+
+    def _rule_based_arrays(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        skill_match = features[:, 0]
+        exp_ratio = features[:, 1]
+        education = features[:, 2]
+        certs = features[:, 3]
+
+        score = (skill_match * 0.4 + exp_ratio * 50 * 0.3 +
+                 education * 10 * 0.2 + np.minimum(certs * 5, 20) * 0.1)
+
+        classes = np.where(score >= 70, 2, np.where(score >= 50, 1, 0))
+        confidences = np.select(
+            [classes == 2, classes == 1],
+            [np.minimum(score / 100, 0.95), np.minimum(score / 100, 0.80)],
+            np.maximum(1 - score / 100, 0.60)
         )
 
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        self.model.fit(X_train_scaled, y_train)
-
-        y_pred = self.model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
-        report = classification_report(y_test, y_pred, output_dict=True)
-
-        self.is_trained = True
-        self.save_model()
-        return {'accuracy': accuracy, 'classification_report': report}
+        probabilities = np.tile([0.1, 0.3, 0.2], (len(features), 1))
+        probabilities[np.arange(len(features)), classes] = 1.0
+        return classes, confidences, probabilities
 
+    @timed('classifier.explain')
     def explain_prediction(self, features: np.ndarray) -> Dict:
         explanations = []
         if features[0][0] >= 70:
@@ -145,19 +134,49 @@ class MLClassifier:
             'explanation_text': ' | '.join(explanations)
         }
 
-    def save_model(self):
-        os.makedirs('models', exist_ok=True)
-        with open('models/ml_model.pkl', 'wb') as f:
-            pickle.dump(self.model, f)
-        with open('models/scaler.pkl', 'wb') as f:
-            pickle.dump(self.scaler, f)
+    def load_model(self, version: str = None) -> bool:
+        """Load a version (CURRENT by default) and swap it in with a single reference update.
 
-    def load_model(self):
+        Artifacts are immutable, so in-flight predictions finish on the one they started
+        with. If loading fails the model being served is kept.
+        """
+        version = version or current_version(self.model_dir)
+        if not version:
+            return False
+        try:
+            artifact = load_artifact(os.path.join(self.model_dir, version))
+        except (OSError, ArtifactError) as e:
+            print(f"⚠️ Could not load model {version}: {e}")
+            self._failed_version = version
+            return False
+        if artifact.metadata.get('feature_names') != self.feature_names:
+            print(f"⚠️ Model {version} was trained on a different feature schema, ignoring it")
+            self._failed_version = version
+            return False
+        self.artifact = artifact
+        self.is_trained = True
+        return True
+
+    def refresh(self) -> bool:
+        """Load CURRENT if another process (training run, rollback) has repointed it."""
+        version = current_version(self.model_dir)
+        if not version or version == self.version or version == self._failed_version:
+            return False
+        if self.load_model(version):
+            print(f"🔄 Now serving model {version}")
+            return True
+        return False
+
+    @property
+    def version(self):
+        return self.artifact.version if self.artifact is not None else None
+
+
+async def watch_current_version(classifier: MLClassifier, executor, interval: float):
+    """Poll the CURRENT pointer so every API and worker process hot-swaps to new versions."""
+    while True:
+        await asyncio.sleep(interval)
         try:
-            with open('models/ml_model.pkl', 'rb') as f:
-                self.model = pickle.load(f)
-            with open('models/scaler.pkl', 'rb') as f:
-                self.scaler = pickle.load(f)
-            self.is_trained = True
-        except FileNotFoundError:
-            self.is_trained = False
+            await executor.run_io(classifier.refresh)
+        except Exception as e:
+            print(f"⚠️ Model refresh failed: {e}")
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+FORMAT_VERSION = 1
+CURRENT_POINTER = 'CURRENT'
+HISTORY_FILE = 'history.json'
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelArtifact:
+    """A fitted model plus its feature scaler held as named NumPy arrays.
+
+    Subclasses list their arrays in ARRAYS and implement predict_proba over scaled features.
+    """
+
+    MODEL_TYPE = None
+    ARRAYS = ('scaler_mean', 'scaler_scale', 'classes')
+
+    def __init__(self, arrays: Dict[str, np.ndarray], metadata: Dict, path: str = None):
+        self.metadata = metadata
+        self.path = path
+        self.version = metadata.get('version')
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @staticmethod
+    def _scaler_arrays(scaler, model) -> Dict[str, np.ndarray]:
+        return {
+            'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+            'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+            'classes': np.asarray(model.classes_).astype(np.int64)
+        }
+
+    def scale(self, features: np.ndarray) -> np.ndarray:
+        return (np.asarray(features, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def describe(self) -> Dict:
+        return {}
+
+    def save(self, model_dir: str, version: str = None) -> str:
+        """Write a new version directory (atomically) and return its name; CURRENT is not moved."""
+        os.makedirs(model_dir, exist_ok=True)
+        staging = os.path.join(model_dir, f".staging-{os.getpid()}-{time.time_ns()}")
+        os.makedirs(staging)
+        try:
+            files = {}
+            for name in self.ARRAYS:
+                path = os.path.join(staging, f"{name}.npy")
+                array = np.ascontiguousarray(getattr(self, name))
+                np.save(path, array, allow_pickle=False)
+                files[name] = {'sha256': _sha256(path), 'shape': list(array.shape), 'dtype': str(array.dtype)}
+
+            content_hash = hashlib.sha256(
+                ''.join(files[name]['sha256'] for name in self.ARRAYS).encode('ascii')
+            ).hexdigest()
+            version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{content_hash[:8]}"
+            metadata = {
+                **self.metadata,
+                **self.describe(),
+                'format_version': FORMAT_VERSION,
+                'model_type': self.MODEL_TYPE,
+                'version': version,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'content_sha256': content_hash,
+                'files': files
+            }
+            with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+                json.dump(metadata, f, indent=2)
+
+            final = os.path.join(model_dir, version)
+            if os.path.exists(final):
+                raise ArtifactError(f"Model version {version} already exists")
+            os.replace(staging, final)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.metadata, self.version, self.path = metadata, version, final
+        return version
+
+
+class ForestArtifact(ModelArtifact):
+    """A random forest as flat node arrays.
+
+    All trees share one node table; child indices are global, and -1 marks a leaf, so the
+    whole forest is evaluated for a batch by walking every (sample, tree) pair a level at a time.
+    """
+
+    MODEL_TYPE = 'random_forest'
+    ARRAYS = ModelArtifact.ARRAYS + ('roots', 'children_left', 'children_right', 'feature', 'threshold', 'value')
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler, metadata: Dict) -> "ForestArtifact":
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+
+        def stack(attr, dtype):
+            return np.concatenate([getattr(t, attr) for t in trees]).astype(dtype)
+
+        def globalize(attr):
+            return np.concatenate([
+                np.where(getattr(t, attr) == -1, -1, getattr(t, attr) + offset)
+                for t, offset in zip(trees, offsets)
+            ]).astype(np.int64)
+
+        value = np.concatenate([t.value[:, 0, :] for t in trees]).astype(np.float64)
+        value /= np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+        return cls({
+            **cls._scaler_arrays(scaler, forest),
+            'roots': offsets[:-1].astype(np.int64),
+            'children_left': globalize('children_left'),
+            'children_right': globalize('children_right'),
+            'feature': stack('feature', np.int64),
+            'threshold': stack('threshold', np.float64),
+            'value': value
+        }, metadata)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Mean leaf class distribution over all trees for already-scaled features."""
+        # Trees split on float32 inputs, exactly as scikit-learn evaluates them
+        X = np.asarray(features, dtype=np.float32)
+        n = len(X)
+        nodes = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        rows = np.arange(n)[:, None]
+        active = self.children_left[nodes] != -1
+        while active.any():
+            current = nodes[active]
+            go_left = X[np.broadcast_to(rows, nodes.shape)[active], self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+            active = self.children_left[nodes] != -1
+        return self.value[nodes].mean(axis=1)
+
+    def describe(self) -> Dict:
+        return {'n_trees': int(len(self.roots)), 'n_nodes': int(len(self.feature))}
+
+
+class LinearArtifact(ModelArtifact):
+    """A logistic-loss linear model (e.g. SGDClassifier) as coefficient arrays."""
+
+    MODEL_TYPE = 'linear'
+    ARRAYS = ModelArtifact.ARRAYS + ('coef', 'intercept')
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, metadata: Dict) -> "LinearArtifact":
+        return cls({
+            **cls._scaler_arrays(scaler, model),
+            'coef': np.asarray(model.coef_, dtype=np.float64),
+            'intercept': np.asarray(model.intercept_, dtype=np.float64)
+        }, metadata)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """One-vs-rest logistic probabilities, normalized the way scikit-learn does."""
+        scores = np.asarray(features, dtype=np.float64) @ self.coef.T + self.intercept
+        prob = 1.0 / (1.0 + np.exp(-scores))
+        if prob.shape[1] == 1:
+            return np.hstack([1 - prob, prob])
+        return prob / np.maximum(prob.sum(axis=1, keepdims=True), 1e-12)
+
+
+ARTIFACT_TYPES = {cls.MODEL_TYPE: cls for cls in (ForestArtifact, LinearArtifact)}
+
+
+def load_artifact(path: str, verify: bool = True, mmap: bool = True) -> ModelArtifact:
+    """Load a version directory; arrays are memory-mapped and never unpickled."""
+    try:
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Unreadable model metadata in {path}: {e}")
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported model format {metadata.get('format_version')} in {path}")
+    cls = ARTIFACT_TYPES.get(metadata.get('model_type'))
+    if cls is None:
+        raise ArtifactError(f"Unknown model type {metadata.get('model_type')} in {path}")
+
+    arrays = {}
+    for name in cls.ARRAYS:
+        file_path = os.path.join(path, f"{name}.npy")
+        expected = metadata['files'][name]
+        if verify and _sha256(file_path) != expected['sha256']:
+            raise ArtifactError(f"Integrity check failed for {file_path}")
+        arrays[name] = np.load(file_path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        if list(arrays[name].shape) != expected['shape']:
+            raise ArtifactError(f"Shape mismatch for {file_path}")
+    return cls(arrays, metadata, path)
+
+
+def current_version(model_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(model_dir, CURRENT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current_version(model_dir: str, version: str):
+    """Atomically repoint CURRENT at an existing version."""
+    if os.path.basename(version) != version or version.startswith('.') or \
+            not os.path.isfile(os.path.join(model_dir, version, 'metadata.json')):
+        raise ArtifactError(f"Unknown model version {version}")
+    tmp_path = os.path.join(model_dir, f".{CURRENT_POINTER}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_POINTER))
+
+
+@contextmanager
+def _pointer_lock(model_dir: str):
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, '.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _read_history(model_dir: str) -> List[str]:
+    try:
+        with open(os.path.join(model_dir, HISTORY_FILE)) as f:
+            history = json.load(f)
+    except (FileNotFoundError, ValueError):
+        history = []
+    current = current_version(model_dir)
+    # Pointers set before history was kept still count as the latest promotion
+    if current and (not history or history[-1] != current):
+        history.append(current)
+    return history
+
+
+def _write_history(model_dir: str, history: List[str]):
+    tmp_path = os.path.join(model_dir, f".{HISTORY_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f)
+    os.replace(tmp_path, os.path.join(model_dir, HISTORY_FILE))
+
+
+def promote_version(model_dir: str, version: str):
+    """Make ``version`` current and remember the one it replaces for rollback."""
+    with _pointer_lock(model_dir):
+        history = _read_history(model_dir)
+        set_current_version(model_dir, version)
+        if not history or history[-1] != version:
+            history.append(version)
+        _write_history(model_dir, history)
+
+
+def rollback_version(model_dir: str, version: str = None) -> str:
+    """Repoint CURRENT at ``version``, or at the version promoted before the current one.
+
+    Without a version each call steps one promotion further back. Returns the new current version.
+    """
+    with _pointer_lock(model_dir):
+        history = _read_history(model_dir)
+        if version is None:
+            if len(history) < 2:
+                raise ArtifactError("No previous model version to roll back to")
+            history.pop()
+            version = history[-1]
+        # Raises ArtifactError before history changes if the version directory does not exist
+        set_current_version(model_dir, version)
+        if history[-1:] != [version]:
+            history.append(version)
+        _write_history(model_dir, history)
+    return version
+
+
+def list_versions(model_dir: str) -> List[Dict]:
+    """Metadata of every stored version, newest first."""
+    versions = []
+    if not os.path.isdir(model_dir):
+        return versions
+    current = current_version(model_dir)
+    for name in os.listdir(model_dir):
+        meta_path = os.path.join(model_dir, name, 'metadata.json')
+        if name.startswith('.') or not os.path.isfile(meta_path):
+            continue
+        with open(meta_path) as f:
+            metadata = json.load(f)
+        versions.append({
+            'version': name,
+            'current': name == current,
+            'created_at': metadata.get('created_at'),
+            'metrics': metadata.get('metrics', {}),
+            'model_type': metadata.get('model_type')
+        })
+    versions.sort(key=lambda v: v['created_at'] or '', reverse=True)
+    return versions
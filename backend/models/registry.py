@@ -0,0 +1,129 @@
+import gc
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class ModelRegistry:
+    """Builds each model once, either lazily on first use or all at once in parallel threads,
+    and reports per-model readiness for health checks. A failed load is retried on the next
+    use once ``retry_seconds`` have passed."""
+
+    def __init__(self, factories: Dict[str, Callable], retry_seconds: float = 30.0):
+        self._factories = dict(factories)
+        self.retry_seconds = retry_seconds
+        self._futures: Dict[str, Future] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ModelRegistry":
+        from models.resume_parser import ResumeParser
+        from models.skill_matcher import SkillMatcher
+        from models.ml_classifier import MLClassifier
+        from models.bias_detector import BiasDetector
+        return cls({
+            'resume_parser': ResumeParser,
+            'skill_matcher': SkillMatcher,
+            'ml_classifier': MLClassifier,
+            'bias_detector': BiasDetector
+        })
+
+    def _load(self, name: str):
+        start = time.perf_counter()
+        try:
+            return self._factories[name]()
+        except BaseException:
+            self._failed_at[name] = time.monotonic()
+            raise
+        finally:
+            self._load_seconds[name] = round(time.perf_counter() - start, 3)
+
+    def _retry_due(self, name: str, future: Future) -> bool:
+        if not future.done() or future.cancelled() or future.exception() is None:
+            return False
+        return time.monotonic() - self._failed_at.get(name, 0.0) >= self.retry_seconds
+
+    def _future(self, name: str, pool: ThreadPoolExecutor = None) -> Future:
+        with self._lock:
+            future = self._futures.get(name)
+            if future is not None and not self._retry_due(name, future):
+                return future
+            if pool is not None:
+                future = pool.submit(self._load, name)
+                self._futures[name] = future
+                return future
+            future = Future()
+            self._futures[name] = future
+
+        # Lazy load in the calling thread; concurrent callers wait on the same future
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(self._load(name))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def start(self, max_workers: int = None):
+        """Start loading every model not loaded yet (or due a retry) in background threads and
+        return immediately."""
+        pool = ThreadPoolExecutor(max_workers or len(self._factories), thread_name_prefix="model-load")
+        for name in self._factories:
+            self._future(name, pool)
+        pool.shutdown(wait=False)
+
+    def load_all(self, max_workers: int = None):
+        """Load every model in parallel and block until done; raises the first load error."""
+        self.start(max_workers)
+        for name in self._factories:
+            self._futures[name].result()
+
+    def get(self, name: str):
+        return self._future(name).result()
+
+    def proxy(self, name: str) -> "ModelProxy":
+        return ModelProxy(self, name)
+
+    def ready(self) -> bool:
+        return all(
+            name in self._futures and self._futures[name].done() and self._futures[name].exception() is None
+            for name in self._factories
+        )
+
+    def status(self) -> Dict:
+        models = {}
+        for name in self._factories:
+            future = self._futures.get(name)
+            if future is None:
+                state = 'not_loaded'
+            elif not future.done():
+                state = 'loading'
+            elif future.exception() is not None:
+                state = 'failed'
+            else:
+                state = 'ready'
+            models[name] = {'state': state, 'load_seconds': self._load_seconds.get(name)}
+            if state == 'failed':
+                models[name]['error'] = str(future.exception())
+        return models
+
+
+class ModelProxy:
+    """Stands in for a registry model so components can be wired up before it has loaded."""
+
+    def __init__(self, registry: ModelRegistry, name: str):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+
+def freeze_for_fork():
+    """Move everything loaded so far into the GC's permanent generation, so forked workers
+    do not copy-on-write the shared model pages just by running garbage collection."""
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
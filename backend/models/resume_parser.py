@@ -1,11 +1,17 @@
 import PyPDF2
 import pdfplumber
 import docx
+import hashlib
+import json
 import re
 import spacy
-from typing import Dict, List
+import time
+from typing import Dict, Iterator, List, Tuple
 import nltk
 from nltk.corpus import stopwords
+from config import Config
+from models.keyword_matcher import KeywordHit, KeywordMatcher
+from utils.metrics import timed
 
 try:
     nltk.data.find('tokenizers/punkt')
@@ -13,17 +19,26 @@ except LookupError:
     nltk.download('punkt')
     nltk.download('stopwords')
 
+# Bump whenever parse_resume's output changes so cached parses from older code are not served
+PARSER_VERSION = 3
+
 class ResumeParser:
     def __init__(self):
+        # Only PERSON entities are used, so skip the tagger, parser and lemmatizer
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", exclude=Config.SPACY_EXCLUDE)
         except OSError:
             print("Downloading spaCy model...")
             import os
             os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", exclude=Config.SPACY_EXCLUDE)
+        self.ner_batch_size = Config.SPACY_BATCH_SIZE
+        self.ner_n_process = Config.SPACY_N_PROCESS
 
         self.stop_words = set(stopwords.words('english'))
+        self.max_pages = Config.RESUME_MAX_PAGES
+        self.max_chars = Config.RESUME_MAX_CHARS
+        self.min_page_chars = 40
         self.common_skills = [
             'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift',
             'react', 'angular', 'vue', 'node', 'django', 'flask', 'spring',
@@ -34,31 +49,159 @@ class ResumeParser:
             'git', 'agile', 'scrum', 'devops', 'ci/cd',
             'html', 'css', 'rest api', 'graphql', 'microservices'
         ]
+        self.education_keywords = [
+            'bachelor', 'master', 'phd', 'doctorate', 'diploma',
+            'b.tech', 'm.tech', 'b.e', 'm.e', 'bsc', 'msc',
+            'bba', 'mba', 'b.com', 'm.com'
+        ]
+        self.cert_keywords = [
+            'certified', 'certification', 'certificate',
+            'aws certified', 'azure certified', 'google certified',
+            'pmp', 'cissp', 'comptia', 'ccna', 'ceh'
+        ]
+        self.keyword_aliases = {
+            'nodejs': 'node', 'reactjs': 'react', 'vuejs': 'vue', 'angularjs': 'angular',
+            'k8s': 'kubernetes', 'postgres': 'postgresql', 'sklearn': 'scikit-learn',
+            'bachelors': 'bachelor', 'masters': 'master',
+            'certifications': 'certification', 'certificates': 'certificate'
+        }
+
+        vocabulary = {
+            'skills': self.common_skills,
+            'education': self.education_keywords,
+            'certifications': self.cert_keywords
+        }
+        if Config.KEYWORD_VOCABULARY_PATH:
+            custom = KeywordMatcher.load_vocabulary(Config.KEYWORD_VOCABULARY_PATH)
+            self.keyword_aliases.update(custom.pop('aliases', {}))
+            vocabulary = KeywordMatcher.merge_vocabulary(vocabulary, custom)
+            self.common_skills = vocabulary['skills']
+        self.keyword_matcher = KeywordMatcher(vocabulary, self.keyword_aliases)
+        self.cache_version = self._cache_version(vocabulary)
+
+    def _cache_version(self, vocabulary: Dict) -> str:
+        """Parser version plus a digest of everything configurable that shapes parsed_data."""
+        settings = json.dumps({
+            'vocabulary': vocabulary, 'aliases': self.keyword_aliases,
+            'max_pages': self.max_pages, 'max_chars': self.max_chars
+        }, sort_keys=True)
+        return f"{PARSER_VERSION}-{hashlib.sha256(settings.encode('utf-8')).hexdigest()[:16]}"
+
+    def _layout_is_poor(self, text: str) -> bool:
+        stripped = text.strip()
+        if len(stripped) < self.min_page_chars:
+            return True
+        # Words glued together (missing spaces) are the usual PyPDF2 layout failure
+        words = stripped.split()
+        return sum(len(w) for w in words) / len(words) > 15
+
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Dict]:
+        """Yield PDF pages one at a time: PyPDF2 first, pdfplumber only for badly laid out pages."""
+        plumber = None
+        try:
+            with open(file_path, 'rb') as file:
+                try:
+                    reader = PyPDF2.PdfReader(file)
+                    page_count = len(reader.pages)
+                except Exception:
+                    reader, page_count = None, None
+
+                if reader is None:
+                    plumber = pdfplumber.open(file_path)
+                    page_count = len(plumber.pages)
+
+                for index in range(min(page_count, self.max_pages)):
+                    started = time.perf_counter()
+                    text, method = "", 'pdfplumber'
+                    if reader is not None:
+                        try:
+                            text, method = reader.pages[index].extract_text() or "", 'pypdf2'
+                        except Exception:
+                            text = ""
+
+                    if method != 'pypdf2' or self._layout_is_poor(text):
+                        try:
+                            if plumber is None:
+                                plumber = pdfplumber.open(file_path)
+                            page = plumber.pages[index]
+                            plumber_text = page.extract_text() or ""
+                            page.close()
+                            if len(plumber_text.strip()) >= len(text.strip()):
+                                text, method = plumber_text, 'pdfplumber'
+                        except Exception:
+                            pass
+
+                    yield {
+                        'page': index + 1,
+                        'total_pages': page_count,
+                        'text': text,
+                        'method': method,
+                        'ms': round((time.perf_counter() - started) * 1000, 2)
+                    }
+        finally:
+            if plumber is not None:
+                plumber.close()
+
+    def iter_docx_paragraphs(self, file_path: str) -> Iterator[str]:
+        doc = docx.Document(file_path)
+        for para in doc.paragraphs:
+            yield para.text
+
+    @timed('parser.extract_text')
+    def extract_text_with_stats(self, file_path: str) -> Tuple[str, Dict]:
+        parts, chars, truncated = [], 0, False
+        stats = {'pages': [], 'total_pages': None}
+        started = time.perf_counter()
+
+        if file_path.lower().endswith('.pdf'):
+            for page in self.iter_pdf_pages(file_path):
+                stats['total_pages'] = page['total_pages']
+                stats['pages'].append({'page': page['page'], 'method': page['method'], 'ms': page['ms']})
+                parts.append(page['text'][:self.max_chars - chars])
+                chars += len(parts[-1])
+                if chars >= self.max_chars:
+                    truncated = True
+                    break
+            truncated = truncated or (stats['total_pages'] or 0) > len(stats['pages'])
+            text = '\n'.join(parts)
+        elif file_path.lower().endswith('.docx'):
+            for paragraph in self.iter_docx_paragraphs(file_path):
+                parts.append(paragraph[:self.max_chars - chars])
+                chars += len(parts[-1])
+                if chars >= self.max_chars:
+                    truncated = True
+                    break
+            text = '\n'.join(parts)
+        else:
+            text = ""
+
+        stats['chars'] = len(text)
+        stats['truncated'] = truncated
+        stats['ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return text, stats
 
     def extract_text(self, file_path: str) -> str:
-        text = ""
-        if file_path.endswith('.pdf'):
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        text += page.extract_text() or ""
-            except:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() or ""
-        elif file_path.endswith('.docx'):
-            doc = docx.Document(file_path)
-            text = '\n'.join([para.text for para in doc.paragraphs])
-        return text
+        return self.extract_text_with_stats(file_path)[0]
 
-    def extract_name(self, text: str) -> str:
-        doc = self.nlp(text[:500])
+    def _person_name(self, doc) -> str:
         for ent in doc.ents:
             if ent.label_ == "PERSON":
                 return ent.text
         return "Unknown"
 
+    @timed('parser.extract_name')
+    def extract_name(self, text: str) -> str:
+        return self._person_name(self.nlp(text[:500]))
+
+    @timed('parser.extract_names')
+    def extract_names(self, texts: List[str], batch_size: int = None, n_process: int = None) -> List[str]:
+        docs = self.nlp.pipe(
+            (text[:500] for text in texts),
+            batch_size=batch_size or self.ner_batch_size,
+            n_process=n_process or self.ner_n_process
+        )
+        return [self._person_name(doc) for doc in docs]
+
     def extract_email(self, text: str) -> str:
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         emails = re.findall(email_pattern, text)
@@ -69,13 +212,25 @@ class ResumeParser:
         phones = re.findall(phone_pattern, text)
         return ''.join(phones[0]) if phones else ""
 
-    def extract_skills(self, text: str) -> List[str]:
+    def scan_keywords(self, text: str) -> List[KeywordHit]:
+        return self.keyword_matcher.scan(text)
+
+    def extract_skills(self, text: str, hits: List[KeywordHit] = None) -> List[str]:
+        hits = self.scan_keywords(text) if hits is None else hits
+        return list({hit.keyword for hit in hits if hit.category == 'skills'})
+
+    def _keyword_contexts(self, text: str, hits: List[KeywordHit], category: str) -> List[str]:
         text_lower = text.lower()
-        found_skills = []
-        for skill in self.common_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
-        return list(set(found_skills))
+        contexts = set()
+        for hit in hits:
+            if hit.category != category:
+                continue
+            line_start = text_lower.rfind('\n', 0, hit.start) + 1
+            line_end = text_lower.find('\n', hit.end)
+            if line_end == -1:
+                line_end = len(text_lower)
+            contexts.add(text_lower[max(line_start, hit.start - 50):min(line_end, hit.end + 50)])
+        return list(contexts)
 
     def extract_experience(self, text: str) -> Dict:
         exp_patterns = [
@@ -90,51 +245,52 @@ class ResumeParser:
                 break
         return {'total_experience': total_years, 'details': []}
 
-    def extract_education(self, text: str) -> List[str]:
-        education_keywords = [
-            'bachelor', 'master', 'phd', 'doctorate', 'diploma',
-            'b.tech', 'm.tech', 'b.e', 'm.e', 'bsc', 'msc',
-            'bba', 'mba', 'b.com', 'm.com'
-        ]
-        text_lower = text.lower()
-        found_education = []
-        for keyword in education_keywords:
-            if keyword in text_lower:
-                pattern = rf'.{{0,50}}{keyword}.{{0,50}}'
-                matches = re.findall(pattern, text_lower)
-                if matches:
-                    found_education.extend(matches)
-        return list(set(found_education))
-
-    def extract_certifications(self, text: str) -> List[str]:
-        cert_keywords = [
-            'certified', 'certification', 'certificate',
-            'aws certified', 'azure certified', 'google certified',
-            'pmp', 'cissp', 'comptia', 'ccna', 'ceh'
-        ]
-        text_lower = text.lower()
-        found_certs = []
-        for keyword in cert_keywords:
-            if keyword in text_lower:
-                pattern = rf'.{{0,50}}{keyword}.{{0,50}}'
-                matches = re.findall(pattern, text_lower)
-                if matches:
-                    found_certs.extend(matches)
-        return list(set(found_certs))
+    def extract_education(self, text: str, hits: List[KeywordHit] = None) -> List[str]:
+        hits = self.scan_keywords(text) if hits is None else hits
+        return self._keyword_contexts(text, hits, 'education')
 
-    def parse_resume(self, file_path: str) -> Dict:
-        text = self.extract_text(file_path)
-        if not text:
-            raise ValueError("Could not extract text from resume")
+    def extract_certifications(self, text: str, hits: List[KeywordHit] = None) -> List[str]:
+        hits = self.scan_keywords(text) if hits is None else hits
+        return self._keyword_contexts(text, hits, 'certifications')
 
-        parsed_data = {
+    @timed('parser.extract_fields')
+    def build_parsed_data(self, text: str, name: str, extraction: Dict = None) -> Dict:
+        hits = self.scan_keywords(text)
+        return {
             'raw_text': text,
-            'name': self.extract_name(text),
+            'name': name,
             'email': self.extract_email(text),
             'phone': self.extract_phone(text),
-            'skills': self.extract_skills(text),
+            'skills': self.extract_skills(text, hits),
             'total_experience': self.extract_experience(text)['total_experience'],
-            'education': self.extract_education(text),
-            'certifications': self.extract_certifications(text)
+            'education': self.extract_education(text, hits),
+            'certifications': self.extract_certifications(text, hits),
+            # Where each skill/education/certification keyword matched, as offsets into raw_text
+            'keyword_hits': [dict(hit._asdict()) for hit in hits],
+            'extraction': extraction or {}
         }
-        return parsed_data
+
+    def parse_resume(self, file_path: str) -> Dict:
+        text, extraction = self.extract_text_with_stats(file_path)
+        if not text:
+            raise ValueError("Could not extract text from resume")
+        return self.build_parsed_data(text, self.extract_name(text), extraction)
+
+    def parse_texts(self, extracted: List[Tuple[str, Dict]], batch_size: int = None,
+                    n_process: int = None) -> List[Dict]:
+        names = self.extract_names([text for text, _ in extracted], batch_size, n_process)
+        return [
+            self.build_parsed_data(text, name, extraction)
+            for (text, extraction), name in zip(extracted, names)
+        ]
+
+    def parse_resumes(self, file_paths: List[str], batch_size: int = None,
+                      n_process: int = None) -> List[Dict]:
+        """Parse many resumes, running name extraction for all of them through one nlp.pipe call."""
+        extracted = []
+        for file_path in file_paths:
+            text, extraction = self.extract_text_with_stats(file_path)
+            if not text:
+                raise ValueError(f"Could not extract text from resume: {file_path}")
+            extracted.append((text, extraction))
+        return self.parse_texts(extracted, batch_size, n_process)
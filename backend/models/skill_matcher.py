@@ -2,11 +2,38 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from typing import List, Dict
+from config import Config
+from utils.embedding_cache import EmbeddingCache, normalize_skill
+from utils.metrics import timed
 
 class SkillMatcher:
-    def __init__(self, model_name='sentence-transformers/all-MiniLM-L6-v2'):
+    def __init__(self, model_name='sentence-transformers/all-MiniLM-L6-v2', cache: EmbeddingCache = None):
         self.model = SentenceTransformer(model_name)
+        self.cache = cache or EmbeddingCache(
+            model_name, Config.EMBEDDING_CACHE_SIZE, Config.EMBEDDING_CACHE_PATH
+        )
 
+    @timed('skills.encode')
+    def encode(self, skills: List[str]) -> np.ndarray:
+        keys = [normalize_skill(s) for s in skills]
+        vectors = self.cache.get_many(keys)
+        missing = [k for k in dict.fromkeys(keys) if k not in vectors]
+        if missing:
+            encoded = np.asarray(self.model.encode(missing), dtype=np.float32)
+            self.cache.put_many(zip(missing, encoded))
+            vectors.update(zip(missing, encoded))
+        return np.vstack([vectors[k] for k in keys])
+
+    @timed('skills.encode_texts')
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Unit-length embeddings of free text (resume profiles, job descriptions); not cached."""
+        return np.asarray(self.model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @timed('skills.match')
     def match_skills(self, resume_skills: List[str], required_skills: List[str]) -> Dict:
         if not resume_skills or not required_skills:
             return {
@@ -16,10 +43,32 @@ class SkillMatcher:
                 'additional_skills': resume_skills
             }
 
-        resume_embeddings = self.model.encode(resume_skills)
-        required_embeddings = self.model.encode(required_skills)
+        resume_embeddings = self.encode(resume_skills)
+        required_embeddings = self.encode(required_skills)
         similarity_matrix = cosine_similarity(required_embeddings, resume_embeddings)
+        return self._build_match(resume_skills, required_skills, similarity_matrix)
+
+    @timed('skills.match_batch')
+    def match_skills_batch(self, resume_skills_list: List[List[str]], required_skills: List[str]) -> List[Dict]:
+        vocabulary = list(dict.fromkeys(
+            normalize_skill(s) for skills in resume_skills_list for s in skills
+        ))
+        if not vocabulary or not required_skills:
+            return [self.match_skills(skills, required_skills) for skills in resume_skills_list]
+
+        column = {skill: idx for idx, skill in enumerate(vocabulary)}
+        similarity = cosine_similarity(self.encode(required_skills), self.encode(vocabulary))
+
+        results = []
+        for skills in resume_skills_list:
+            if not skills:
+                results.append(self.match_skills(skills, required_skills))
+                continue
+            columns = [column[normalize_skill(s)] for s in skills]
+            results.append(self._build_match(skills, required_skills, similarity[:, columns]))
+        return results
 
+    def _build_match(self, resume_skills: List[str], required_skills: List[str], similarity_matrix: np.ndarray) -> Dict:
         matched_skills = []
         missing_skills = []
         threshold = 0.7
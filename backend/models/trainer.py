@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.preprocessing import StandardScaler
+
+from database.feature_store import FeatureStore
+from database.sql_db import FEATURE_COLUMNS, SQLDatabase
+from models.ml_classifier import MLClassifier
+from models.model_artifact import (ArtifactError, ForestArtifact, LinearArtifact, current_version,
+                                   load_artifact, promote_version)
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+LEARNERS = ('forest', 'sgd')
+MIN_TRAINING_ROWS = 50
+
+
+class Reservoir:
+    """Uniform fixed-size sample of a stream of (X, y) chunks (Algorithm R, vectorized per chunk)."""
+
+    def __init__(self, size: int, n_features: int, rng: np.random.Generator):
+        self.size = size
+        self.rng = rng
+        self.X = np.empty((size, n_features), dtype=np.float32)
+        self.y = np.empty(size, dtype=np.int64)
+        self.seen = 0
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        fill = min(max(self.size - self.seen, 0), len(X))
+        self.X[self.seen:self.seen + fill] = X[:fill]
+        self.y[self.seen:self.seen + fill] = y[:fill]
+        rest = len(X) - fill
+        if rest:
+            # Stream position k replaces a random slot with probability size / (k + 1)
+            positions = self.seen + fill + np.arange(rest)
+            slots = (self.rng.random(rest) * (positions + 1)).astype(np.int64)
+            keep = slots < self.size
+            self.X[slots[keep]] = X[fill:][keep]
+            self.y[slots[keep]] = y[fill:][keep]
+        self.seen += len(X)
+
+    def sample(self) -> Tuple[np.ndarray, np.ndarray]:
+        n = min(self.seen, self.size)
+        return self.X[:n], self.y[:n]
+
+
+def _load_labels(sql_db: SQLDatabase, chunk_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    ids, labels = [], []
+    after_id = 0
+    while True:
+        rows = sql_db.get_candidate_labels(after_id, chunk_rows)
+        if not rows:
+            break
+        chunk = np.asarray(rows, dtype=np.int64)
+        ids.append(chunk[:, 0])
+        labels.append(chunk[:, 1])
+        after_id = int(chunk[-1, 0])
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(ids), np.concatenate(labels)
+
+
+def _is_holdout(candidate_ids: np.ndarray, holdout_percent: float) -> np.ndarray:
+    # Hash the id so the split is stable across runs and not correlated with screening order
+    hashed = (candidate_ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(int(2 ** 32 * holdout_percent / 100))
+
+
+def _labeled_chunks(store: FeatureStore, label_ids: np.ndarray, label_values: np.ndarray,
+                    holdout_percent: float) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Join each feature chunk with the (sorted) labels: yields (X, y, is_holdout)."""
+    for ids, X in store.iter_chunks():
+        if not len(label_ids):
+            return
+        pos = np.minimum(np.searchsorted(label_ids, ids), len(label_ids) - 1)
+        labeled = label_ids[pos] == ids
+        if labeled.any():
+            ids = ids[labeled]
+            yield X[labeled], label_values[pos[labeled]], _is_holdout(ids, holdout_percent)
+
+
+def _holdout_accuracy(artifact, X: np.ndarray, y: np.ndarray) -> float:
+    predicted = artifact.classes[artifact.predict_proba(artifact.scale(X)).argmax(axis=1)]
+    return float(accuracy_score(y, predicted))
+
+
+def _baseline(model_dir: str, X: np.ndarray, y: np.ndarray) -> Tuple[Optional[str], Optional[float]]:
+    """The current version and its accuracy on the same holdout, if it can be loaded."""
+    version = current_version(model_dir)
+    if not version or not len(y):
+        return version, None
+    try:
+        artifact = load_artifact(os.path.join(model_dir, version))
+    except (OSError, ArtifactError):
+        return version, None
+    if artifact.metadata.get('feature_names') != MLClassifier.feature_names:
+        return version, None
+    return version, _holdout_accuracy(artifact, X, y)
+
+
+def train_classifier(sql_uri: str, store_dir: str, model_dir: str, learner: str = 'forest',
+                     chunk_rows: int = 50000, sample_size: int = 200000, epochs: int = 5,
+                     holdout_percent: float = 20.0, min_accuracy: float = 0.0,
+                     max_accuracy_drop: float = 0.01, n_jobs: int = 1, seed: int = 42) -> Dict:
+    """Train a classifier from labeled candidates and save it as a new artifact version.
+
+    Runs in its own process. Features are synced incrementally into the chunked feature
+    store and streamed from there, so memory is bounded by ``chunk_rows`` plus the samples:
+
+    - pass 1 fits the scaler with ``partial_fit`` and keeps reservoir samples of the
+      training and holdout rows (at most ``sample_size`` each);
+    - ``forest`` fits the random forest on the training sample;
+    - ``sgd`` streams every training row through ``SGDClassifier.partial_fit`` for
+      ``epochs`` passes, so it learns from the full set however large.
+
+    The new version is promoted to CURRENT only if its holdout accuracy is at least
+    ``min_accuracy`` and no more than ``max_accuracy_drop`` below the current model's on
+    the same holdout; otherwise it is kept on disk but not served.
+    """
+    if learner not in LEARNERS:
+        raise ValueError(f"Unknown learner '{learner}', expected one of {', '.join(LEARNERS)}")
+    if FEATURE_COLUMNS != MLClassifier.feature_names:
+        raise ValueError("candidate_features columns do not match the classifier's features")
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    sql_db = SQLDatabase(sql_uri)
+    store = FeatureStore(store_dir, MLClassifier.feature_names, chunk_rows)
+    feature_rows_added = store.sync(sql_db)
+    label_ids, label_values = _load_labels(sql_db, chunk_rows)
+    sql_db.engine.dispose()
+
+    n_features = len(MLClassifier.feature_names)
+    scaler = StandardScaler()
+    train_sample = Reservoir(sample_size, n_features, rng)
+    holdout_sample = Reservoir(sample_size, n_features, rng)
+    for X, y, holdout in _labeled_chunks(store, label_ids, label_values, holdout_percent):
+        if (~holdout).any():
+            scaler.partial_fit(X[~holdout])
+            train_sample.add(X[~holdout], y[~holdout])
+        holdout_sample.add(X[holdout], y[holdout])
+
+    if train_sample.seen < MIN_TRAINING_ROWS:
+        raise ValueError(f"Insufficient training data: {train_sample.seen} labeled rows "
+                         f"(minimum {MIN_TRAINING_ROWS})")
+    classes = np.unique(label_values)
+
+    if learner == 'forest':
+        X_sample, y_sample = train_sample.sample()
+        model = RandomForestClassifier(n_estimators=100, random_state=seed, n_jobs=n_jobs)
+        model.fit(scaler.transform(X_sample), y_sample)
+        artifact_cls = ForestArtifact
+        fitted_rows = len(y_sample)
+    else:
+        model = SGDClassifier(loss='log_loss', random_state=seed)
+        for _ in range(epochs):
+            for X, y, holdout in _labeled_chunks(store, label_ids, label_values, holdout_percent):
+                order = rng.permutation(int((~holdout).sum()))
+                if len(order):
+                    model.partial_fit(scaler.transform(X[~holdout][order]), y[~holdout][order], classes=classes)
+        artifact_cls = LinearArtifact
+        fitted_rows = train_sample.seen
+
+    metrics = {
+        'learner': learner,
+        'training_rows': int(train_sample.seen),
+        'fitted_rows': int(fitted_rows),
+        'holdout_rows': int(holdout_sample.seen),
+        'feature_rows_added': int(feature_rows_added)
+    }
+    artifact = artifact_cls.from_sklearn(model, scaler, {
+        'feature_names': MLClassifier.feature_names,
+        'labels': MLClassifier.labels,
+        'sklearn_version': sklearn.__version__,
+        'metrics': metrics
+    })
+
+    X_holdout, y_holdout = holdout_sample.sample()
+    if not len(y_holdout):
+        raise ValueError("No labeled holdout rows to validate against")
+    # Score the artifact itself, i.e. exactly what will be served
+    predicted = artifact.classes[artifact.predict_proba(artifact.scale(X_holdout)).argmax(axis=1)]
+    metrics['accuracy'] = float(accuracy_score(y_holdout, predicted))
+    report = classification_report(y_holdout, predicted, output_dict=True, zero_division=0)
+
+    baseline_version, baseline_accuracy = _baseline(model_dir, X_holdout, y_holdout)
+    if metrics['accuracy'] < min_accuracy:
+        reason = f"holdout accuracy {metrics['accuracy']:.4f} is below the minimum {min_accuracy:.4f}"
+    elif baseline_accuracy is not None and metrics['accuracy'] < baseline_accuracy - max_accuracy_drop:
+        reason = (f"holdout accuracy {metrics['accuracy']:.4f} is worse than {baseline_version} "
+                  f"({baseline_accuracy:.4f})")
+    else:
+        reason = None
+
+    version = artifact.save(model_dir)
+    if reason is None:
+        promote_version(model_dir, version)
+    return {
+        **metrics,
+        'version': version,
+        'promoted': reason is None,
+        'rejected_reason': reason,
+        'baseline_version': baseline_version,
+        'baseline_accuracy': baseline_accuracy,
+        'classification_report': report,
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+
+def _utc_now() -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+RUN_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{6}$')
+
+
+def _run_path(model_dir: str, run_id: str) -> str:
+    return os.path.join(model_dir, 'runs', f"{run_id}.json")
+
+
+def _write_run(model_dir: str, run: Dict):
+    path = _run_path(model_dir, run['run_id'])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(run, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def create_run(model_dir: str, params: Dict) -> str:
+    """Record a queued training run; its file is updated as the run progresses."""
+    os.makedirs(os.path.join(model_dir, 'runs'), exist_ok=True)
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    _write_run(model_dir, {
+        'run_id': run_id,
+        'state': 'queued',
+        'params': params,
+        'created_at': _utc_now()
+    })
+    return run_id
+
+
+def update_run(model_dir: str, run_id: str, **fields):
+    run = get_run(model_dir, run_id) or {'run_id': run_id}
+    run.update(fields)
+    _write_run(model_dir, run)
+
+
+def get_run(model_dir: str, run_id: str) -> Optional[Dict]:
+    if not RUN_ID_PATTERN.match(run_id):
+        return None
+    try:
+        with open(_run_path(model_dir, run_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def list_runs(model_dir: str, limit: int = 20) -> List[Dict]:
+    """Most recent training runs first."""
+    runs_dir = os.path.join(model_dir, 'runs')
+    if not os.path.isdir(runs_dir):
+        return []
+    run_ids = sorted((name[:-5] for name in os.listdir(runs_dir) if name.endswith('.json')), reverse=True)
+    return [run for run in (get_run(model_dir, run_id) for run_id in run_ids[:limit]) if run]
+
+
+def run_training(run_id: str, sql_uri: str, store_dir: str, model_dir: str, **kwargs) -> Dict:
+    """Process entry point: train at low CPU priority and record the outcome in the run file."""
+    if hasattr(os, 'nice'):
+        # Request handling in the API processes wins any contention for cores
+        os.nice(10)
+    with open(os.path.join(model_dir, '.train.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                update_run(model_dir, run_id, state='failed', error="Another training run is in progress")
+                raise RuntimeError("Another training run is in progress")
+        update_run(model_dir, run_id, state='running',
+                   started_at=_utc_now())
+        try:
+            result = train_classifier(sql_uri, store_dir, model_dir, **kwargs)
+        except Exception as e:
+            update_run(model_dir, run_id, state='failed', error=str(e),
+                       finished_at=_utc_now())
+            raise
+    update_run(model_dir, run_id, state='promoted' if result['promoted'] else 'rejected', result=result,
+               finished_at=_utc_now())
+    return result
+
+
+async def backfill_features(sql_db: SQLDatabase, mongo_db, ml_classifier: MLClassifier,
+                            experience_required: float = 1.0, batch_size: int = 1000) -> int:
+    """Compute stored features for candidates screened before they were recorded.
+
+    Features are rebuilt from each resume's cleaned_data in Mongo. The job's experience
+    requirement was never persisted, so ``experience_required`` stands in for it.
+    Candidates whose resume is not in Mongo are skipped. Returns how many rows were added.
+    """
+    added = 0
+    after_id = 0
+    while True:
+        candidates = await sql_db.get_candidates_missing_features_async(after_id, batch_size)
+        if not candidates:
+            return added
+        after_id = candidates[-1]['id']
+        resumes = await mongo_db.get_cleaned_resumes([c['resume_id'] for c in candidates])
+        found = [c for c in candidates if c['resume_id'] in resumes]
+        if found:
+            features = ml_classifier.extract_features_batch(
+                [resumes[c['resume_id']] for c in found],
+                [c['skill_match_score'] or 0.0 for c in found],
+                experience_required
+            )
+            added += await sql_db.store_candidate_features_async(
+                [c['id'] for c in found], features.tolist()
+            )
@@ -0,0 +1,152 @@
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from utils.embedding_cache import normalize_skill
+from utils.pipeline import ScreeningPipeline
+from utils.write_buffer import ScreeningWriter
+
+
+def build_job(job_title: str, required_skills: str, experience_required: float,
+              education_required: str, job_description: str) -> Dict:
+    return {
+        'job_title': job_title,
+        'required_skills': [s.strip() for s in required_skills.split(',')],
+        'experience_required': experience_required,
+        'education_required': education_required,
+        'description': job_description
+    }
+
+
+def overall_score(skill_match_result: Dict, ml_prediction: Dict) -> float:
+    return (skill_match_result['match_percentage'] + ml_prediction['confidence'] * 100) / 2
+
+
+async def rescore_candidates(sql_db, ml_classifier, executor, batch_size: int = 1000) -> int:
+    """Re-run the classifier over every stored feature row so candidates' ml_prediction,
+    confidence and overall_score reflect the model now served (after a promotion or
+    rollback). Candidates without stored features keep their old scores. Returns how
+    many were updated."""
+    updated = 0
+    after_id = 0
+    while True:
+        rows = await sql_db.get_candidate_features_async(after_id, batch_size)
+        if not rows:
+            return updated
+        after_id = rows[-1][0]
+        features = np.asarray([row[1:] for row in rows], dtype=float)
+        classes, confidences, _ = await executor.run_cpu(ml_classifier.predict_arrays, features)
+        updated += await sql_db.update_candidate_predictions_async([{
+            'id': row[0],
+            'ml_prediction': ml_classifier.labels[prediction],
+            'confidence_score': float(confidence),
+            # Feature 0 is the skill match percentage the candidate was screened with
+            'overall_score': overall_score({'match_percentage': row[1]}, {'confidence': float(confidence)})
+        } for row, prediction, confidence in zip(rows, classes, confidences)])
+
+
+def candidate_skills(cleaned_data: Dict, skill_match_result: Dict) -> List[Dict]:
+    """Rows for the SQL skill index: the resume's own skills at similarity 1.0, plus required
+    skills it matched semantically at their match similarity."""
+    years = float(cleaned_data.get('total_experience', 0) or 0)
+    similarity = {normalize_skill(s): 1.0 for s in cleaned_data.get('skills', [])}
+    for match in skill_match_result.get('matched_skills', []):
+        name = normalize_skill(match['required'])
+        similarity[name] = max(similarity.get(name, 0.0), match['similarity'])
+    return [{'name': name, 'similarity': sim, 'years': years} for name, sim in similarity.items() if name]
+
+
+def profile_text(cleaned_data: Dict, llm_analysis: Dict = None) -> str:
+    """Text embedded into the candidate vector index: skills first, then a short summary."""
+    if llm_analysis and not llm_analysis.get('error'):
+        summary = llm_analysis.get('overall_assessment', '')
+    else:
+        summary = cleaned_data.get('raw_text', '')[:1000]
+    return (
+        f"Skills: {', '.join(cleaned_data.get('skills', []))}. "
+        f"Experience: {cleaned_data.get('total_experience', 0)} years. "
+        f"Education: {', '.join(cleaned_data.get('education', []))}. "
+        f"Certifications: {', '.join(cleaned_data.get('certifications', []))}. "
+        f"{summary}"
+    )
+
+
+def job_text(job: Dict) -> str:
+    return (
+        f"Skills: {', '.join(job['required_skills'])}. "
+        f"Experience: {job.get('experience_required', 0)} years. "
+        f"Education: {job.get('education_required', '')}. "
+        f"{job['job_title']}. {job.get('description', '')}"
+    )
+
+
+async def screen_and_store(pipeline: ScreeningPipeline, writer: ScreeningWriter,
+                           file_path: str, filename: str, job: Dict, content_hash: str = None) -> Dict:
+    """Run the screening pipeline on one file, persist it and build the API response."""
+    result = await pipeline.run(file_path, job, content_hash)
+
+    parsed_data = result['parsed_data']
+    cleaned_data = result['cleaned_data']
+    bias_report = result['bias_report']
+    skill_match_result = result['skill_match_result']
+    ml_prediction = result['ml_prediction']
+    llm_analysis = result['llm_analysis']
+    explanation = result['explanation']
+
+    profile_embedding = await pipeline.executor.run_cpu(
+        pipeline.skill_matcher.encode_texts, [profile_text(cleaned_data, llm_analysis)]
+    )
+
+    async with writer.screening():
+        resume_id = await writer.store_resume({
+            'content_hash': result['content_hash'],
+            'filename': filename,
+            'parsed_data': parsed_data,
+            'cleaned_data': cleaned_data,
+            'profile_embedding': profile_embedding[0].tolist(),
+            'vector_indexed': False,
+            'timestamp': datetime.utcnow()
+        })
+
+        candidate_id = await writer.store_candidate_score({
+            'resume_id': str(resume_id),
+            'name': cleaned_data.get('name', 'Unknown'),
+            'email': cleaned_data.get('email', ''),
+            'job_title': job['job_title'],
+            'skill_match_score': skill_match_result['match_percentage'],
+            'ml_prediction': ml_prediction['label'],
+            'confidence_score': ml_prediction['confidence'],
+            'overall_score': overall_score(skill_match_result, ml_prediction),
+            'bias_detected': bias_report['has_bias'],
+            'timestamp': datetime.utcnow()
+        }, candidate_skills(cleaned_data, skill_match_result), result['features'][0].tolist())
+
+    return {
+        'success': True,
+        'candidate_id': candidate_id,
+        'resume_id': str(resume_id),
+        'parsed_info': {
+            'name': cleaned_data.get('name', 'Unknown'),
+            'email': cleaned_data.get('email', ''),
+            'phone': cleaned_data.get('phone', ''),
+            'skills': cleaned_data.get('skills', []),
+            'experience_years': cleaned_data.get('total_experience', 0),
+            'education': cleaned_data.get('education', []),
+            'certifications': cleaned_data.get('certifications', [])
+        },
+        'skill_analysis': skill_match_result,
+        'ml_prediction': ml_prediction,
+        'llm_insights': llm_analysis,
+        'bias_report': bias_report,
+        'explanation': explanation,
+        'final_recommendation': {
+            'decision': ml_prediction['label'],
+            'overall_score': round(overall_score(skill_match_result, ml_prediction), 2),
+            'confidence': ml_prediction['confidence']
+        },
+        'metadata': {
+            'content_hash': result['content_hash'],
+            'parse_cache_hit': result['parse_cache_hit']
+        }
+    }
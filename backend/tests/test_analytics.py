@@ -0,0 +1,41 @@
+from database.sql_db import SQLDatabase
+from utils.analytics import CandidateAnalytics
+
+
+def make_db(tmp_path):
+    sql_db = SQLDatabase(f"sqlite:///{tmp_path}/analytics.db")
+    sql_db.create_tables()
+    return sql_db
+
+
+def test_new_candidates_are_merged_incrementally(tmp_path):
+    sql_db = make_db(tmp_path)
+    analytics = CandidateAnalytics(sql_db, min_refresh_seconds=0)
+    sql_db.store_candidate_score({'job_title': 'Dev', 'ml_prediction': 'Hire', 'overall_score': 70.6})
+    assert analytics.snapshot()['total_candidates'] == 1
+
+    sql_db.store_candidate_score({'job_title': 'Dev', 'ml_prediction': 'Reject', 'overall_score': 20.0})
+    snapshot = analytics.snapshot(bins=100)
+    assert snapshot['by_prediction'] == {'Hire': 1, 'Reject': 1}
+    assert snapshot['score_histogram'][70]['count'] == 1
+
+
+def test_updates_and_deletes_elsewhere_invalidate_every_process(tmp_path):
+    sql_db = make_db(tmp_path)
+    # Two API processes, each with its own in-memory aggregates
+    first = CandidateAnalytics(sql_db, min_refresh_seconds=0)
+    second = CandidateAnalytics(make_db(tmp_path), min_refresh_seconds=0)
+    a = sql_db.store_candidate_score({'job_title': 'Dev', 'ml_prediction': 'Reject', 'overall_score': 20.0})
+    b = sql_db.store_candidate_score({'job_title': 'Dev', 'ml_prediction': 'Reject', 'overall_score': 30.0})
+    assert first.snapshot()['by_prediction'] == {'Reject': 2}
+    assert second.snapshot()['by_prediction'] == {'Reject': 2}
+
+    sql_db.update_candidate_predictions([
+        {'id': a, 'ml_prediction': 'Hire', 'confidence_score': 0.9, 'overall_score': 80.0}
+    ])
+    assert second.snapshot()['by_prediction'] == {'Hire': 1, 'Reject': 1}
+
+    sql_db.delete_candidate(b)
+    snapshot = second.snapshot()
+    assert snapshot['by_prediction'] == {'Hire': 1}
+    assert snapshot['average_score'] == 80.0
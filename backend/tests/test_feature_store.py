@@ -0,0 +1,89 @@
+import numpy as np
+
+from database.feature_store import FeatureStore
+from database.sql_db import FEATURE_COLUMNS, SQLDatabase
+from models.model_artifact import current_version
+from models.trainer import Reservoir, train_classifier
+
+
+def make_db(tmp_path):
+    sql_db = SQLDatabase(f"sqlite:///{tmp_path}/features.db")
+    sql_db.create_tables()
+    return sql_db
+
+
+def add_candidate(sql_db, features=None, label=None):
+    candidate_id = sql_db.store_candidate_score({'name': 'c'}, features=features)
+    if label is not None:
+        sql_db.set_candidate_label(candidate_id, label)
+    return candidate_id
+
+
+def stored(store):
+    return {int(i): row.tolist() for ids, X in store.iter_chunks() for i, row in zip(ids, X)}
+
+
+def test_sync_appends_new_rows_across_chunks(tmp_path):
+    sql_db = make_db(tmp_path)
+    store = FeatureStore(str(tmp_path / 'store'), FEATURE_COLUMNS, chunk_rows=2)
+    ids = [add_candidate(sql_db, [i, 1, 2, 3, 4]) for i in range(3)]
+
+    assert store.sync(sql_db) == 3
+    assert [chunk['rows'] for chunk in store.manifest['chunks']] == [2, 1]
+
+    ids.append(add_candidate(sql_db, [3, 1, 2, 3, 4]))
+    assert store.sync(sql_db) == 1
+    assert store.sync(sql_db) == 0
+    assert [chunk['rows'] for chunk in store.manifest['chunks']] == [2, 2]
+    assert stored(store) == {candidate_id: [i, 1, 2, 3, 4] for i, candidate_id in enumerate(ids)}
+
+
+def test_sync_picks_up_rows_added_below_the_watermark(tmp_path):
+    sql_db = make_db(tmp_path)
+    store = FeatureStore(str(tmp_path / 'store'), FEATURE_COLUMNS, chunk_rows=10)
+    old = add_candidate(sql_db)
+    newer = add_candidate(sql_db, [1, 1, 1, 1, 1])
+    assert store.sync(sql_db) == 1
+
+    # Backfilled features for a candidate screened before features were stored
+    sql_db.store_candidate_features([old], [[2, 2, 2, 2, 2]])
+    assert store.sync(sql_db) == 1
+    assert stored(store) == {old: [2, 2, 2, 2, 2], newer: [1, 1, 1, 1, 1]}
+
+    # A second store on the same directory sees what the first one wrote
+    assert len(FeatureStore(str(tmp_path / 'store'), FEATURE_COLUMNS, chunk_rows=10)) == 2
+
+
+def test_reservoir_keeps_a_bounded_sample_of_everything_seen():
+    reservoir = Reservoir(10, 2, np.random.default_rng(0))
+    for start in range(0, 100, 7):
+        X = np.arange(start, min(start + 7, 100), dtype=np.float32).repeat(2).reshape(-1, 2)
+        reservoir.add(X, X[:, 0].astype(np.int64))
+
+    X, y = reservoir.sample()
+    assert reservoir.seen == 100
+    assert len(y) == 10 and len(set(y.tolist())) == 10
+    assert (X[:, 0] == y).all()
+
+
+def test_train_classifier_promotes_only_models_that_pass_validation(tmp_path):
+    sql_db = make_db(tmp_path)
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        skill_match = float(rng.uniform(0, 100))
+        label = 0 if skill_match < 33 else 1 if skill_match < 66 else 2
+        add_candidate(sql_db, [skill_match, rng.uniform(0, 10), 2, 1, 5], label)
+    model_dir = str(tmp_path / 'models')
+    store_dir = str(tmp_path / 'store')
+
+    result = train_classifier(sql_db.uri, store_dir, model_dir, learner='sgd', chunk_rows=64, epochs=3)
+    assert result['promoted']
+    assert result['training_rows'] + result['holdout_rows'] == 300
+    assert result['accuracy'] > 0.8
+    assert current_version(model_dir) == result['version']
+
+    rejected = train_classifier(sql_db.uri, store_dir, model_dir, learner='forest', chunk_rows=64,
+                                min_accuracy=1.01)
+    assert not rejected['promoted']
+    assert rejected['feature_rows_added'] == 0
+    assert current_version(model_dir) == result['version']
@@ -0,0 +1,103 @@
+import pytest
+
+import utils.job_queue as job_queue_module
+from utils.job_queue import JobQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(job_queue_module, 'time', clock)
+    return clock
+
+
+def make_queue(tmp_path, **kwargs):
+    kwargs.setdefault('visibility_timeout', 30)
+    kwargs.setdefault('max_attempts', 3)
+    kwargs.setdefault('retry_delay', 5)
+    return JobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path, clock):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue({'file_path': 'x'})
+
+    assert queue.claim('a')['id'] == job_id
+    assert queue.claim('b') is None
+
+    clock.now += 31
+    job = queue.claim('b')
+    assert job['id'] == job_id
+    assert job['worker_id'] == 'b'
+    assert job['attempts'] == 2
+
+
+def test_heartbeat_extends_the_lease(tmp_path, clock):
+    queue = make_queue(tmp_path)
+    queue.enqueue({'file_path': 'x'})
+    job = queue.claim('a')
+
+    clock.now += 20
+    assert queue.heartbeat(job['id'], 'a')
+    clock.now += 20
+    assert queue.claim('b') is None
+
+
+def test_complete_after_losing_the_lease_returns_false(tmp_path, clock):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue({'file_path': 'x'})
+    queue.claim('a')
+    clock.now += 31
+    queue.claim('b')
+
+    assert not queue.complete(job_id, 'a', {'stale': True})
+    assert not queue.heartbeat(job_id, 'a')
+    assert queue.complete(job_id, 'b', {'ok': True})
+    job = queue.get(job_id)
+    assert job['status'] == 'completed'
+    assert job['result'] == {'ok': True}
+
+
+def test_fail_retries_with_backoff_up_to_the_limit(tmp_path, clock):
+    queue = make_queue(tmp_path, max_attempts=3, retry_delay=5)
+    job_id = queue.enqueue({'file_path': 'x'})
+
+    for attempt, delay in ((1, 5), (2, 10)):
+        job = queue.claim('a')
+        assert job['attempts'] == attempt
+        assert queue.fail(job_id, 'a', 'boom') is False
+        assert queue.get(job_id)['status'] == 'queued'
+        # Not visible again until its backoff has passed
+        clock.now += delay - 1
+        assert queue.claim('a') is None
+        clock.now += 1
+
+    queue.claim('a')
+    assert queue.fail(job_id, 'a', 'boom') is True
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'boom'
+    clock.now += 1000
+    assert queue.claim('a') is None
+
+
+def test_job_whose_lease_expires_too_often_fails_and_loses_its_spool_file(tmp_path, clock):
+    spooled = tmp_path / 'upload.pdf'
+    spooled.write_bytes(b'%PDF')
+    queue = make_queue(tmp_path, max_attempts=2)
+    job_id = queue.enqueue({'file_path': str(spooled)})
+
+    for _ in range(2):
+        assert queue.claim('a') is not None
+        clock.now += 31
+    assert queue.claim('a') is None
+    assert queue.get(job_id)['status'] == 'failed'
+    assert not spooled.exists()
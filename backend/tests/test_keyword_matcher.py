@@ -0,0 +1,55 @@
+from models.keyword_matcher import KeywordMatcher
+
+VOCABULARY = {
+    'skills': ['Java', 'JavaScript', 'C++', 'Node.js', 'Machine Learning', 'Machine Learning Ops'],
+    'certifications': ['AWS Certified']
+}
+
+
+def keywords(matcher, text):
+    return [(hit.category, hit.keyword) for hit in matcher.scan(text)]
+
+
+def test_java_does_not_match_inside_javascript():
+    matcher = KeywordMatcher(VOCABULARY)
+
+    assert keywords(matcher, "Built UIs in JavaScript") == [('skills', 'JavaScript')]
+    assert keywords(matcher, "Java and JavaScript") == [('skills', 'Java'), ('skills', 'JavaScript')]
+
+
+def test_punctuated_and_multi_word_keywords_match_on_whole_tokens():
+    matcher = KeywordMatcher(VOCABULARY)
+
+    assert keywords(matcher, "C++, node.js; AWS certified") == [
+        ('skills', 'C++'), ('skills', 'Node.js'), ('certifications', 'AWS Certified')
+    ]
+    assert keywords(matcher, "machine") == []
+    # Overlapping phrases are all reported
+    assert keywords(matcher, "machine learning ops") == [
+        ('skills', 'Machine Learning'), ('skills', 'Machine Learning Ops')
+    ]
+
+
+def test_hits_carry_offsets_into_the_text():
+    matcher = KeywordMatcher(VOCABULARY)
+    text = "Senior Machine Learning engineer"
+
+    hit, = matcher.scan(text)
+    assert text[hit.start:hit.end] == "Machine Learning"
+
+
+def test_aliases_report_the_canonical_keyword():
+    matcher = KeywordMatcher(VOCABULARY, aliases={'js': 'JavaScript', 'ml': 'Machine Learning'})
+
+    assert keywords(matcher, "JS and ML") == [('skills', 'JavaScript'), ('skills', 'Machine Learning')]
+
+
+def test_merge_vocabulary_extends_categories_unless_replaced():
+    base = {'skills': ['Python', 'SQL'], 'certifications': ['PMP']}
+
+    merged = KeywordMatcher.merge_vocabulary(base, {'skills': ['python', 'Rust'], 'tools': ['Git']})
+    assert merged == {'skills': ['Python', 'SQL', 'Rust'], 'certifications': ['PMP'], 'tools': ['Git']}
+
+    merged = KeywordMatcher.merge_vocabulary(base, {'skills': ['Rust'], 'replace': ['skills']})
+    assert merged == {'skills': ['Rust'], 'certifications': ['PMP']}
+    assert base == {'skills': ['Python', 'SQL'], 'certifications': ['PMP']}
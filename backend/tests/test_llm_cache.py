@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import llm_cache
+from utils.llm_cache import LLMResponseCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_cache.time, 'time', clock.time)
+    return clock
+
+
+def test_cache_returns_response_until_ttl_expires(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / 'llm.sqlite'), ttl_seconds=60)
+    key = LLMResponseCache.make_key('gemini-pro', 'prompt')
+    cache.set(key, 'answer')
+
+    clock.now += 59
+    assert cache.get(key) == 'answer'
+    clock.now += 2
+    assert cache.get(key) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_expired_entries_are_purged_on_open(tmp_path, clock):
+    path = str(tmp_path / 'llm.sqlite')
+    LLMResponseCache(path, ttl_seconds=10).set('old', 'stale')
+    clock.now += 11
+    assert LLMResponseCache(path, ttl_seconds=10).stats()['entries'] == 0
+
+
+def test_key_depends_on_model_and_prompt():
+    key = LLMResponseCache.make_key('gemini-pro', 'prompt')
+    assert key == LLMResponseCache.make_key('gemini-pro', 'prompt')
+    assert key != LLMResponseCache.make_key('gemini-1.5', 'prompt')
+    assert key != LLMResponseCache.make_key('gemini-pro', 'prompt ')
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'text'
+
+    def worker():
+        results.append(flight.do('key', slow))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=worker) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ['text'] * 8
+
+
+def test_single_flight_shares_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+class CountingModel:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return type('Response', (), {'text': f"answer to {prompt}"})()
+
+
+@pytest.fixture
+def engine_factory(monkeypatch):
+    pytest.importorskip('google.generativeai')
+    from config import Config
+    from models.llm_engine import LLMEngine
+    monkeypatch.setattr(Config, 'LLM_CACHE_PATH', '')
+    monkeypatch.setattr(Config, 'LLM_RATE_LIMIT_RPS', 0)
+    return lambda model, cache=None: LLMEngine('test-key', model=model, cache=cache)
+
+
+def test_concurrent_identical_prompts_make_one_model_call(engine_factory):
+    model = CountingModel()
+    engine = engine_factory(model)
+
+    async def run():
+        return await asyncio.gather(*[engine._agenerate('same prompt') for _ in range(10)])
+
+    assert asyncio.run(run()) == ['answer to same prompt'] * 10
+    assert model.calls == 1
+
+
+def test_concurrent_identical_prompts_with_cache_make_one_model_call(engine_factory, tmp_path):
+    model = CountingModel()
+    cache = LLMResponseCache(str(tmp_path / 'llm.sqlite'))
+    engine = engine_factory(model, cache)
+
+    async def run():
+        first = await asyncio.gather(*[engine._agenerate('same prompt') for _ in range(10)])
+        second = await engine._agenerate('same prompt')
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == ['answer to same prompt'] * 10
+    assert second == 'answer to same prompt'
+    assert model.calls == 1
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+
+import pytest
+
+from models.llm_client import AsyncLLMClient, TokenBucket
+
+
+class APIError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeModel:
+    """Fails with the queued errors first, then answers; tracks concurrent calls."""
+
+    def __init__(self, errors=(), delay: float = 0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return type('Response', (), {'text': f"answer to {prompt}"})()
+        finally:
+            self.active -= 1
+
+
+def make_client(model, **kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    kwargs.setdefault('backoff_max', 0.001)
+    return AsyncLLMClient(model, **kwargs)
+
+
+@pytest.mark.parametrize('code', [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(code):
+    model = FakeModel([APIError(code), APIError(code)])
+    client = make_client(model, max_retries=3)
+
+    assert asyncio.run(client.generate('p')) == 'answer to p'
+    assert model.calls == 3
+    assert client.retries == 2
+
+
+@pytest.mark.parametrize('code', [400, 401, 403, 404])
+def test_does_not_retry_client_errors(code):
+    model = FakeModel([APIError(code)])
+    client = make_client(model, max_retries=3)
+
+    with pytest.raises(APIError):
+        asyncio.run(client.generate('p'))
+    assert model.calls == 1
+    assert client.retries == 0
+
+
+def test_gives_up_after_max_retries():
+    model = FakeModel([APIError(503)] * 5)
+    client = make_client(model, max_retries=2)
+
+    with pytest.raises(APIError):
+        asyncio.run(client.generate('p'))
+    assert model.calls == 3
+
+
+def test_deadline_cancels_slow_call_and_retries():
+    model = FakeModel(delay=1.0)
+    client = make_client(model, timeout=0.05, max_retries=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.generate('p'))
+    assert model.calls == 2
+
+
+def test_semaphore_caps_concurrent_calls():
+    model = FakeModel(delay=0.02)
+    client = make_client(model, max_concurrency=3)
+
+    async def run():
+        return await asyncio.gather(*[client.generate(f"p{i}") for i in range(12)])
+
+    assert len(asyncio.run(run())) == 12
+    assert model.max_active == 3
+
+
+def test_sync_model_runs_in_bounded_pool():
+    class SyncModel:
+        def generate_content(self, prompt):
+            return type('Response', (), {'text': prompt.upper()})()
+
+    client = make_client(SyncModel(), max_concurrency=2)
+    assert asyncio.run(client.generate('p')) == 'P'
+    assert client._executor._max_workers == 2
+
+
+def test_sync_and_async_callers_share_the_cap_and_retries():
+    model = FakeModel([APIError(429)], delay=0.02)
+    client = make_client(model, max_concurrency=2, max_retries=2)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(client.generate_sync(f"s{i}"))) for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    async def run():
+        return await asyncio.gather(*[client.generate(f"a{i}") for i in range(4)])
+
+    results.extend(asyncio.run(run()))
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8
+    assert model.max_active == 2
+    assert client.retries == 1
+
+
+def test_token_bucket_zero_rate_is_unlimited():
+    bucket = TokenBucket(0, 1)
+
+    async def run():
+        for _ in range(100):
+            await bucket.acquire()
+
+    asyncio.run(asyncio.wait_for(run(), 1))
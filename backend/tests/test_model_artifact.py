@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+from models.model_artifact import ArtifactError, current_version, promote_version, rollback_version
+
+
+def make_versions(model_dir, *versions):
+    for version in versions:
+        os.makedirs(os.path.join(model_dir, version))
+        with open(os.path.join(model_dir, version, 'metadata.json'), 'w') as f:
+            json.dump({'created_at': version}, f)
+
+
+def test_rollback_steps_back_one_promotion_at_a_time(tmp_path):
+    model_dir = str(tmp_path)
+    make_versions(model_dir, 'v1', 'v2', 'v3')
+    for version in ('v1', 'v2', 'v3'):
+        promote_version(model_dir, version)
+
+    assert rollback_version(model_dir) == 'v2'
+    assert rollback_version(model_dir) == 'v1'
+    with pytest.raises(ArtifactError):
+        rollback_version(model_dir)
+
+
+def test_explicit_rollback_to_current_version_does_not_duplicate_history(tmp_path):
+    model_dir = str(tmp_path)
+    make_versions(model_dir, 'v1', 'v2')
+    promote_version(model_dir, 'v1')
+    promote_version(model_dir, 'v2')
+
+    assert rollback_version(model_dir, 'v2') == 'v2'
+    assert rollback_version(model_dir) == 'v1'
+
+
+def test_explicit_rollback_to_unknown_version_changes_nothing(tmp_path):
+    model_dir = str(tmp_path)
+    make_versions(model_dir, 'v1', 'v2')
+    promote_version(model_dir, 'v1')
+    promote_version(model_dir, 'v2')
+
+    with pytest.raises(ArtifactError):
+        rollback_version(model_dir, 'v9')
+    assert current_version(model_dir) == 'v2'
+    assert rollback_version(model_dir) == 'v1'
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from utils.write_buffer import WriteBehindBuffer
+
+
+class FakeStore:
+    """Bulk write that returns one id per item and fails any batch holding a 'bad' item."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def write(self, items):
+        self.batches.append(list(items))
+        if 'bad' in items:
+            raise ValueError('bad row')
+        return [f"id-{item}" for item in items]
+
+
+def test_close_flushes_pending_items():
+    store = FakeStore()
+
+    async def run():
+        # A delay long enough that only close() can flush
+        buffer = WriteBehindBuffer(store.write, max_batch=100, max_delay=60)
+        submits = [asyncio.ensure_future(buffer.submit(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        assert store.batches == []
+        await buffer.close()
+        return await asyncio.gather(*submits), buffer
+
+    results, buffer = asyncio.run(run())
+    assert results == [f"id-{i}" for i in range(5)]
+    assert store.batches == [[0, 1, 2, 3, 4]]
+    assert buffer.stats()['pending'] == 0
+
+
+def test_submit_after_close_is_rejected():
+    async def run():
+        buffer = WriteBehindBuffer(FakeStore().write)
+        await buffer.close()
+        await buffer.submit(1)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+
+def test_full_batches_flush_without_waiting_for_the_delay():
+    store = FakeStore()
+
+    async def run():
+        buffer = WriteBehindBuffer(store.write, max_batch=3, max_delay=60)
+        return await asyncio.wait_for(asyncio.gather(*[buffer.submit(i) for i in range(6)]), 1)
+
+    assert len(asyncio.run(run())) == 6
+    assert store.batches == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_failed_batch_is_retried_item_by_item():
+    store = FakeStore()
+
+    async def run():
+        buffer = WriteBehindBuffer(store.write, max_batch=3, max_delay=60)
+        return await asyncio.gather(*[buffer.submit(i) for i in (1, 'bad', 2)], return_exceptions=True)
+
+    ok, bad, other = asyncio.run(run())
+    assert (ok, other) == ('id-1', 'id-2')
+    assert isinstance(bad, ValueError)
+
+
+def test_screening_writer_close_waits_for_in_flight_screenings():
+    from utils.write_buffer import ScreeningWriter
+
+    class FakeMongo:
+        async def store_resumes(self, resumes):
+            return [f"resume-{i}" for i in range(len(resumes))]
+
+    class FakeSQL:
+        def __init__(self):
+            self.rows = []
+
+        async def store_candidate_scores_async(self, rows, skills_list, features_list):
+            self.rows.extend(rows)
+            return list(range(len(rows)))
+
+    sql_db = FakeSQL()
+
+    async def run():
+        writer = ScreeningWriter(FakeMongo(), sql_db, max_batch=100, max_delay=0.005)
+        resume_stored = asyncio.Event()
+
+        async def screening():
+            async with writer.screening():
+                resume_id = await writer.store_resume({'name': 'a'})
+                resume_stored.set()
+                await asyncio.sleep(0.01)
+                return await writer.store_candidate_score({'resume_id': resume_id})
+
+        task = asyncio.ensure_future(screening())
+        closing = asyncio.ensure_future(writer.close())
+        await asyncio.wait_for(resume_stored.wait(), 1)
+        await asyncio.wait_for(closing, 1)
+        return await task
+
+    assert asyncio.run(run()) == 0
+    assert sql_db.rows == [{'resume_id': 'resume-0'}]
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict
+
+
+class CandidateAnalytics:
+    """Dashboard aggregates kept in memory and updated incrementally.
+
+    New candidates are picked up by id: each refresh aggregates rows with an id above the
+    last one seen and merges the result in. Updates and deletes (re-scoring after a model
+    change, candidate deletes) bump a shared version in SQL instead, and any process that
+    sees it change rebuilds from scratch. A periodic full rebuild picks up anything an
+    incremental pass could miss (e.g. ids committed out of order by concurrent writers).
+    """
+
+    def __init__(self, sql_db, min_refresh_seconds: float = 2.0, full_refresh_seconds: float = 3600.0):
+        self.sql_db = sql_db
+        self.min_refresh_seconds = min_refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._lock = threading.Lock()
+        self._reset()
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._version = None
+
+    def _reset(self):
+        self._last_id = 0
+        self._by_job = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+        self._by_day = defaultdict(lambda: [0, 0.0])
+        self._score_buckets = defaultdict(int)
+
+    def _merge(self, delta: Dict):
+        for job, prediction, count, score_sum in delta['by_job']:
+            entry = self._by_job[job][prediction]
+            entry[0] += count
+            entry[1] += score_sum
+        for day, count, score_sum in delta['by_day']:
+            entry = self._by_day[day]
+            entry[0] += count
+            entry[1] += score_sum
+        for bucket, count in delta['score_buckets']:
+            self._score_buckets[bucket] += count
+        self._last_id = delta['up_to_id']
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            now = time.time()
+            if not force and now - self._checked_at < self.min_refresh_seconds:
+                return
+            # Read before aggregating: a change made meanwhile triggers one more rebuild
+            version = self.sql_db.get_candidates_version()
+            if force or version != self._version or now - self._built_at >= self.full_refresh_seconds:
+                self._reset()
+                self._merge(self.sql_db.aggregate_candidates())
+                self._built_at = now
+                self._version = version
+            elif self.sql_db.get_max_candidate_id() > self._last_id:
+                self._merge(self.sql_db.aggregate_candidates(after_id=self._last_id))
+            self._checked_at = now
+
+    def snapshot(self, bins: int = 20, score_max: float = 100.0, days: int = 30, top_jobs: int = 20) -> Dict:
+        self.refresh()
+        bins = max(1, bins)
+        with self._lock:
+            by_prediction = defaultdict(int)
+            jobs = []
+            total, score_total = 0, 0.0
+            for job, predictions in self._by_job.items():
+                job_count = sum(n for n, _ in predictions.values())
+                job_score = sum(s for _, s in predictions.values())
+                for prediction, (n, _) in predictions.items():
+                    by_prediction[prediction] += n
+                total += job_count
+                score_total += job_score
+                jobs.append({
+                    'job_title': job,
+                    'count': job_count,
+                    'average_score': round(job_score / job_count, 2) if job_count else 0.0,
+                    'by_prediction': {p: n for p, (n, _) in predictions.items()}
+                })
+            jobs.sort(key=lambda j: j['count'], reverse=True)
+
+            # Re-bin the 1-point buckets into the requested number of bins
+            width = score_max / bins
+            histogram = [0] * bins
+            for bucket, count in self._score_buckets.items():
+                histogram[min(max(int(bucket // width), 0), bins - 1)] += count
+
+            daily = [{
+                'date': day,
+                'count': n,
+                'average_score': round(s / n, 2) if n else 0.0
+            } for day, (n, s) in sorted(self._by_day.items())[-days:]]
+
+            return {
+                'total_candidates': total,
+                'average_score': round(score_total / total, 2) if total else 0.0,
+                'by_prediction': dict(by_prediction),
+                'score_histogram': [{
+                    'start': round(i * width, 2),
+                    'end': round((i + 1) * width, 2),
+                    'count': count
+                } for i, count in enumerate(histogram)],
+                'by_job_title': jobs[:top_jobs],
+                'by_day': daily,
+                'as_of_candidate_id': self._last_id,
+                'refreshed_at': datetime.utcfromtimestamp(self._checked_at).isoformat()
+            }
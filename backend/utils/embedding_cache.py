@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_skill(skill: str) -> str:
+    return ' '.join(str(skill).lower().split())
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: an in-memory LRU in front of an optional SQLite store."""
+
+    def __init__(self, model_name: str, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        self.db_path = db_path
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._connect()
+            if hasattr(os, 'register_at_fork'):
+                # Forked children reconnect rather than reuse the parent's handle
+                os.register_at_fork(after_in_child=self._reopen_after_fork)
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        if self._conn is not None:
+            self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, skill TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, skill))"
+        )
+        self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            pending = []
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.hits += 1
+                else:
+                    pending.append(key)
+
+            disk_found = 0
+            if pending and self._conn is not None:
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT skill, vector FROM embeddings WHERE model = ? AND skill IN ({placeholders})",
+                        [self.model_name, *chunk]
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, vector)
+                        found[key] = vector
+                        disk_found += 1
+            self.disk_hits += disk_found
+            self.misses += len(pending) - disk_found
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((self.model_name, key, int(vector.shape[0]), vector.tobytes()))
+
+            if rows and self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, skill, dim, vector) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'persistent': self._conn is not None
+            }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Dict, Optional
+
+
+def remove_payload_file(payload: Dict):
+    """Delete the spooled upload a job payload points at, if it is still there."""
+    path = payload.get('file_path')
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class JobQueue:
+    """SQLite-backed work queue with leases, so a crashed worker's jobs become visible again."""
+
+    def __init__(self, db_path: str, visibility_timeout: float = 300.0,
+                 max_attempts: int = 3, retry_delay: float = 5.0):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "max_attempts INTEGER NOT NULL, worker_id TEXT, "
+                "available_at REAL NOT NULL, lease_expires_at REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_available ON jobs (status, available_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_lease ON jobs (status, lease_expires_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), self.max_attempts, now, now, now)
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Lease the oldest runnable job, reclaiming running jobs whose lease has expired."""
+        conn = self._connect()
+        try:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_expires_at <= ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                if row['attempts'] >= row['max_attempts']:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, worker_id = NULL, "
+                        "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                        (row['error'] or 'Worker lease expired too many times', now, row['id'])
+                    )
+                    conn.execute("COMMIT")
+                    # No worker will pick it up again, so nobody else would delete its spooled upload
+                    remove_payload_file(json.loads(row['payload']))
+                    continue
+
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?, "
+                    "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now + self.visibility_timeout, now, row['id'])
+                )
+                conn.execute("COMMIT")
+                job = dict(row)
+                # Reflect the lease just taken, not the row as it was read
+                job.update(status='running', attempts=row['attempts'] + 1, worker_id=worker_id,
+                           lease_expires_at=now + self.visibility_timeout, updated_at=now)
+                job['payload'] = json.loads(job['payload'])
+                return job
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (now + self.visibility_timeout, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, error = NULL, "
+                "lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (json.dumps(result), time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Record a failed attempt. Returns True when the job will not be retried."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+
+            final = row['attempts'] >= row['max_attempts']
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires_at = NULL, "
+                "available_at = ?, updated_at = ? WHERE id = ?",
+                ('failed' if final else 'queued', error,
+                 now + self.retry_delay * (2 ** (row['attempts'] - 1)), now, job_id)
+            )
+            conn.execute("COMMIT")
+            return final
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
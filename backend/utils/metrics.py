@@ -0,0 +1,198 @@
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in values]
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket latency histogram per label combination (Prometheus semantics)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple, Dict]:
+        with self._lock:
+            return {labels: {'buckets': list(s[0]), 'sum': s[1], 'count': s[2]}
+                    for labels, s in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), series['buckets']):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'resume_stage_duration_seconds', 'Time spent in each screening stage, model and database call.', ('stage',)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    'resume_stage_errors_total', 'Stage calls that raised an exception.', ('stage',)
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'API request latency by route template.', ('method', 'route')
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'API requests by route template and status code.', ('method', 'route', 'status')
+)
+
+# Per-request (stage, seconds) list; None outside a request so background work records nothing extra
+# Quoted: ContextVar only supports subscripting at runtime from Python 3.9
+_request_timings: "ContextVar[Optional[List[Tuple[str, float]]]]" = ContextVar('request_timings', default=None)
+
+
+def start_request() -> List[Tuple[str, float]]:
+    """Collect the stage timings of everything run in the current context from here on."""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def detach_request():
+    """Stop reporting timings from this context (e.g. a background task shared by many requests)."""
+    _request_timings.set(None)
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Server-Timing header value: total milliseconds per stage, with call counts above one."""
+    totals: Dict[str, List] = {}
+    for stage, seconds in timings:
+        total = totals.setdefault(stage, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+    return ', '.join(
+        f'{stage};dur={seconds * 1000:.2f}' + (f';desc="x{calls}"' if calls > 1 else '')
+        for stage, (seconds, calls) in totals.items()
+    )
+
+
+class span:
+    """Time a block as ``stage``: ``with span('sql.get_candidate'): ...``."""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(self.stage)
+        # Appending to a list is atomic, so concurrent stages in worker threads can share it
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+        return False
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of ``span`` for plain and async functions."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
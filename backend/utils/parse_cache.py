@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Size-bounded SQLite cache of parse results keyed by the SHA-256 of the uploaded file
+    (plus the parser version; see ScreeningPipeline._cache_key)."""
+
+    def __init__(self, db_path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect()
+        if hasattr(os, 'register_at_fork'):
+            # SQLite connections must not be shared with a forked child (gunicorn --preload)
+            os.register_at_fork(after_in_child=self._reopen_after_fork)
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed_resumes ("
+            "content_hash TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_parsed_resumes_last_access ON parsed_resumes (last_access)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_meta (key, value) "
+            "SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM parsed_resumes"
+        )
+
+    def get(self, content_hash: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM parsed_resumes WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE parsed_resumes SET last_access = ? WHERE content_hash = ?",
+                (time.time(), content_hash)
+            )
+        return json.loads(row[0])
+
+    def put(self, content_hash: str, parsed_data: Dict, bias_report: Dict):
+        payload = json.dumps({'parsed_data': parsed_data, 'bias_report': bias_report})
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute(
+                    "SELECT size FROM parsed_resumes WHERE content_hash = ?", (content_hash,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO parsed_resumes (content_hash, payload, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (content_hash, payload, size, time.time())
+                )
+                conn.execute(
+                    "UPDATE cache_meta SET value = value + ? WHERE key = 'total_bytes'",
+                    (size - (old[0] if old else 0),)
+                )
+
+                total = conn.execute("SELECT value FROM cache_meta WHERE key = 'total_bytes'").fetchone()[0]
+                while total > self.max_bytes:
+                    victims = conn.execute(
+                        "SELECT content_hash, size FROM parsed_resumes ORDER BY last_access LIMIT 64"
+                    ).fetchall()
+                    if not victims:
+                        break
+                    for victim_hash, victim_size in victims:
+                        if total <= self.max_bytes:
+                            break
+                        conn.execute("DELETE FROM parsed_resumes WHERE content_hash = ?", (victim_hash,))
+                        total -= victim_size
+                conn.execute("UPDATE cache_meta SET value = ? WHERE key = 'total_bytes'", (total,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parsed_resumes"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': entries,
+                'bytes': total,
+                'max_bytes': self.max_bytes
+            }
+
+    def close(self):
+        self._conn.close()
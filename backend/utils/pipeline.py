@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List
+
+from utils.parse_cache import ParseCache, hash_file
+from utils.profiler import call_attached
+
+
+class PipelineExecutor:
+    """Bounded worker pools that keep blocking pipeline stages off the event loop."""
+
+    def __init__(self, cpu_workers: int = None, io_workers: int = None):
+        self.cpu_pool = ThreadPoolExecutor(
+            max_workers=cpu_workers or os.cpu_count() or 4,
+            thread_name_prefix="pipeline-cpu"
+        )
+        self.io_pool = ThreadPoolExecutor(
+            max_workers=io_workers or 32,
+            thread_name_prefix="pipeline-io"
+        )
+
+    async def run_cpu(self, func: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (per-request stage timings, active profile) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.cpu_pool, partial(context.run, call_attached, func, *args, **kwargs))
+
+    async def run_io(self, func: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.io_pool, partial(context.run, call_attached, func, *args, **kwargs))
+
+    def shutdown(self):
+        self.cpu_pool.shutdown(wait=True)
+        self.io_pool.shutdown(wait=True)
+
+
+class ScreeningPipeline:
+    """Parses a resume, then fans out bias detection, scoring and LLM analysis concurrently."""
+
+    def __init__(self, executor: PipelineExecutor, resume_parser, skill_matcher,
+                 ml_classifier, bias_detector, llm_engine, parse_cache: ParseCache = None):
+        self.executor = executor
+        self.parse_cache = parse_cache
+        self.resume_parser = resume_parser
+        self.skill_matcher = skill_matcher
+        self.ml_classifier = ml_classifier
+        self.bias_detector = bias_detector
+        self.llm_engine = llm_engine
+
+    def _cache_key(self, content_hash: str) -> str:
+        # Parses from another parser version or vocabulary are misses, not stale hits
+        return f"{content_hash}:{self.resume_parser.cache_version}"
+
+    def _lookup(self, file_path: str, content_hash: str = None) -> Dict:
+        # Uploads are hashed while they stream in; only hash here when no digest was passed
+        content_hash = content_hash or hash_file(file_path)
+        cached = self.parse_cache.get(self._cache_key(content_hash)) if self.parse_cache else None
+        return {
+            'content_hash': content_hash,
+            'parse_cache_hit': cached is not None,
+            'parsed_data': cached['parsed_data'] if cached else None,
+            'bias_report': cached['bias_report'] if cached else None
+        }
+
+    def _parse(self, file_path: str, content_hash: str = None) -> Dict:
+        parsed = self._lookup(file_path, content_hash)
+        if parsed['parsed_data'] is None:
+            parsed['parsed_data'] = self.resume_parser.parse_resume(file_path)
+        parsed['cleaned_data'] = self.bias_detector.remove_sensitive_info(parsed['parsed_data'])
+        return parsed
+
+    def _extract(self, file_path: str, content_hash: str = None) -> Dict:
+        parsed = self._lookup(file_path, content_hash)
+        if parsed['parsed_data'] is None:
+            text, extraction = self.resume_parser.extract_text_with_stats(file_path)
+            if not text:
+                raise ValueError("Could not extract text from resume")
+            parsed['extracted'] = (text, extraction)
+        return parsed
+
+    def _parse_extracted(self, entries: List[Dict]):
+        misses = [e for e in entries if e['parsed_data'] is None]
+        if misses:
+            parsed_misses = self.resume_parser.parse_texts([e.pop('extracted') for e in misses])
+            for entry, parsed_data in zip(misses, parsed_misses):
+                entry['parsed_data'] = parsed_data
+        for entry in entries:
+            entry['cleaned_data'] = self.bias_detector.remove_sensitive_info(entry['parsed_data'])
+
+    def _detect_bias(self, parsed: Dict) -> Dict:
+        if parsed['bias_report'] is None:
+            parsed['bias_report'] = self.bias_detector.detect_bias(parsed['parsed_data'])
+            if self.parse_cache:
+                self.parse_cache.put(
+                    self._cache_key(parsed['content_hash']), parsed['parsed_data'], parsed['bias_report']
+                )
+        return parsed['bias_report']
+
+    def _score(self, cleaned_data: Dict, job: Dict) -> Dict:
+        skill_match_result = self.skill_matcher.match_skills(
+            cleaned_data.get('skills', []),
+            job['required_skills']
+        )
+        features = self.ml_classifier.extract_features(
+            cleaned_data,
+            skill_match_result['match_percentage'],
+            job['experience_required']
+        )
+        return {
+            'skill_match_result': skill_match_result,
+            'features': features,
+            'ml_prediction': self.ml_classifier.predict(features),
+            'explanation': self.ml_classifier.explain_prediction(features)
+        }
+
+    def _score_batch(self, cleaned_list: List[Dict], job: Dict) -> List[Dict]:
+        if not cleaned_list:
+            return []
+        skill_match_results = self.skill_matcher.match_skills_batch(
+            [c.get('skills', []) for c in cleaned_list],
+            job['required_skills']
+        )
+        features = self.ml_classifier.extract_features_batch(
+            cleaned_list,
+            [m['match_percentage'] for m in skill_match_results],
+            job['experience_required']
+        )
+        predictions = self.ml_classifier.predict_batch(features)
+
+        return [{
+            'skill_match_result': skill_match_results[i],
+            'features': features[i:i + 1],
+            'ml_prediction': predictions[i],
+            'explanation': self.ml_classifier.explain_prediction(features[i:i + 1])
+        } for i in range(len(cleaned_list))]
+
+    async def run(self, file_path: str, job: Dict, content_hash: str = None) -> Dict:
+        parsed = await self.executor.run_cpu(self._parse, file_path, content_hash)
+
+        bias_report, scores, llm_analysis = await asyncio.gather(
+            self.executor.run_cpu(self._detect_bias, parsed),
+            self.executor.run_cpu(self._score, parsed['cleaned_data'], job),
+            self.llm_engine.analyze_resume_async(parsed['cleaned_data'], job)
+        )
+
+        return {
+            **parsed,
+            'bias_report': bias_report,
+            'llm_analysis': llm_analysis,
+            **scores
+        }
+
+    async def run_batch(self, file_paths: List[str], job: Dict, include_llm: bool = False,
+                        content_hashes: List[str] = None) -> List[Dict]:
+        """Screen many resumes against one job; failed files come back as {'error': ...}."""
+        content_hashes = content_hashes or [None] * len(file_paths)
+        parsed = await asyncio.gather(
+            *(self.executor.run_cpu(self._extract, path, content_hash)
+              for path, content_hash in zip(file_paths, content_hashes)),
+            return_exceptions=True
+        )
+        ok = [i for i, p in enumerate(parsed) if not isinstance(p, Exception)]
+        parsed_list = [parsed[i] for i in ok]
+        # Names for every uncached resume go through a single nlp.pipe call
+        await self.executor.run_cpu(self._parse_extracted, parsed_list)
+        cleaned_list = [p['cleaned_data'] for p in parsed_list]
+
+        if include_llm:
+            llm_results = asyncio.gather(
+                *(self.llm_engine.analyze_resume_async(c, job) for c in cleaned_list)
+            )
+        else:
+            llm_results = asyncio.sleep(0, result=[None] * len(cleaned_list))
+
+        bias_reports, scores, llm_analyses = await asyncio.gather(
+            self.executor.run_cpu(lambda: [self._detect_bias(p) for p in parsed_list]),
+            self.executor.run_cpu(self._score_batch, cleaned_list, job),
+            llm_results
+        )
+
+        results = [{'error': str(p)} if isinstance(p, Exception) else None for p in parsed]
+        for n, i in enumerate(ok):
+            results[i] = {
+                **parsed_list[n],
+                'bias_report': bias_reports[n],
+                'llm_analysis': llm_analyses[n],
+                **scores[n]
+            }
+        return results
@@ -0,0 +1,264 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+MODES = ('sample', 'cprofile')
+
+# Set for the duration of a profiled request; copied into executor threads with the context
+_active_profile = ContextVar('active_profile', default=None)  # type: ContextVar[Optional[RequestProfile]]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """Profiles the threads doing one request's work.
+
+    Work only counts while a thread is attached (``call_attached`` does this for every
+    PipelineExecutor call made in the request's context), so concurrent requests sharing
+    the pools are left out. ``sample`` mode reads attached threads' stacks every
+    ``interval`` seconds from a background thread and costs the request almost nothing;
+    ``cprofile`` mode traces every call in attached threads for exact counts, at several
+    times the run time.
+    """
+
+    def __init__(self, mode: str = 'sample', interval: float = 0.005):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(MODES)}")
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads: Dict[int, int] = {}
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started = None
+        self.duration = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.mode == 'sample':
+            self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id[:8]}", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self.duration = time.perf_counter() - self._started
+
+    def join(self):
+        """Wait for the sampler thread to finish its last sample (blocks up to one interval)."""
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join(reversed(stack))] += 1
+                    self.samples += 1
+
+    @contextmanager
+    def attach(self):
+        """Profile the current thread until the block exits."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        profile = None
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler already owns this thread
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+
+    def collapsed(self) -> str:
+        """Flame-graph input: one ``frame;frame;frame count`` line per distinct stack."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _active_profile.get()
+
+
+@contextmanager
+def profiling(profile: RequestProfile):
+    """Run the block (and executor work it starts) under ``profile``."""
+    token = _active_profile.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _active_profile.reset(token)
+
+
+def call_attached(func: Callable, *args, **kwargs):
+    """Call ``func``, attributing its thread's time to the active profile if there is one."""
+    profile = _active_profile.get()
+    if profile is None:
+        return func(*args, **kwargs)
+    with profile.attach():
+        return func(*args, **kwargs)
+
+
+class ProfileStore:
+    """Saved profiles on disk: ``<id>.json`` metadata plus ``<id>.collapsed`` and/or ``<id>.pstats``."""
+
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max(1, max_profiles)
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, profile_id: str, kind: str) -> str:
+        if not PROFILE_ID_PATTERN.match(profile_id or ''):
+            raise ValueError("Invalid profile id")
+        return os.path.join(self.directory, f"{profile_id}.{kind}")
+
+    def _write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, profile: RequestProfile, details: Dict = None) -> Dict:
+        profile.join()
+        formats = []
+        if profile.stacks:
+            self._write(self.path(profile.id, 'collapsed'), profile.collapsed().encode('utf-8'))
+            formats.append('collapsed')
+        stats = profile.stats()
+        if stats is not None:
+            stats.dump_stats(self.path(profile.id, 'pstats'))
+            formats.append('pstats')
+
+        meta = {
+            'id': profile.id,
+            'mode': profile.mode,
+            'started_at': profile.started_at.isoformat(),
+            'duration_ms': round(profile.duration * 1000, 2),
+            'samples': profile.samples,
+            'interval_ms': profile.interval * 1000 if profile.mode == 'sample' else None,
+            'formats': formats,
+            **(details or {})
+        }
+        # Metadata last: a profile is listed only once its data files are complete
+        self._write(self.path(profile.id, 'json'), json.dumps(meta).encode('utf-8'))
+        self._prune()
+        return meta
+
+    def _prune(self):
+        try:
+            metas = sorted(
+                (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')),
+                key=os.path.getmtime
+            )
+        except FileNotFoundError:  # another worker pruned the same files meanwhile
+            return
+        for meta_path in metas[:-self.max_profiles]:
+            base = meta_path[:-len('.json')]
+            for kind in ('json', 'collapsed', 'pstats'):
+                try:
+                    os.unlink(f"{base}.{kind}")
+                except FileNotFoundError:
+                    pass
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        try:
+            with open(self.path(profile_id, 'json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        metas = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        metas.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        metas.sort(key=lambda m: m['started_at'], reverse=True)
+        return metas[:limit]
+
+    def top_functions(self, profile_id: str, limit: int = 30) -> List[Dict]:
+        """Hottest functions of a saved profile, from pstats (cumulative) or sampled stacks (self)."""
+        meta = self.get(profile_id)
+        if meta is None:
+            return []
+        if 'pstats' in meta['formats']:
+            stats = pstats.Stats(self.path(profile_id, 'pstats'))
+            rows = [{
+                'function': f"{name} ({os.path.basename(filename)}:{line})",
+                'calls': nc,
+                'self_ms': round(tt * 1000, 3),
+                'cumulative_ms': round(ct * 1000, 3)
+            } for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items()]
+            rows.sort(key=lambda r: r['cumulative_ms'], reverse=True)
+            return rows[:limit]
+        if 'collapsed' not in meta['formats']:
+            return []
+
+        leaf, inclusive = Counter(), Counter()
+        with open(self.path(profile_id, 'collapsed')) as f:
+            for line in f:
+                stack, count = line.rsplit(' ', 1)
+                frames = stack.split(';')
+                leaf[frames[-1]] += int(count)
+                for frame in set(frames):
+                    inclusive[frame] += int(count)
+        total = sum(leaf.values()) or 1
+        return [{
+            'function': frame,
+            'self_percent': round(100 * leaf[frame] / total, 2),
+            'total_percent': round(100 * inclusive[frame] / total, 2)
+        } for frame, _ in leaf.most_common(limit)]
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+CHUNK_SIZE = 1 << 20
+
+
+class UploadTooLarge(Exception):
+    """Raised while streaming once an upload passes its size (or file count) limit."""
+
+
+class MalformedUpload(Exception):
+    """Raised when a request body is not multipart/form-data that can be parsed."""
+
+
+def _too_large(limit_bytes: int, what: str = "Upload") -> UploadTooLarge:
+    return UploadTooLarge(f"{what} exceeds the {limit_bytes / (1024 * 1024):g} MB limit")
+
+
+def _copy_capped(read, dest_path: str, max_bytes: int, what: str) -> Tuple[int, str]:
+    """Copy chunks from ``read(n)`` into dest_path, hashing as it goes and stopping at max_bytes."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, 'wb') as dest:
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes, what)
+            digest.update(chunk)
+            dest.write(chunk)
+    return size, digest.hexdigest()
+
+
+class MultipartSpool:
+    """Parse a multipart/form-data body as it arrives, writing file parts straight to spool files.
+
+    Starlette's form parser copies every upload into a temporary file of its own before a
+    route runs, which the route then had to copy again. Routes that take the raw request
+    instead feed its chunks to ``write``, so each file in ``file_field`` is written, hashed for
+    the parse cache and size-capped in a single pass. Blocking; run ``write`` and ``finish`` on
+    an I/O thread.
+
+    Spooled files are appended to ``files`` as soon as they are created; ``discard`` removes
+    them. Files whose extension is not in ``extensions`` are read past without being stored.
+    Those in ``archive_extensions`` are capped at max_total_bytes rather than max_file_bytes
+    and do not count against the resume limits, which apply to their members once extracted.
+    """
+
+    def __init__(self, content_type: Optional[str], file_field: str, max_file_bytes: int,
+                 max_total_bytes: int = None, max_files: int = 1, extensions: Tuple[str, ...] = None,
+                 archive_extensions: Tuple[str, ...] = (), directory: str = None,
+                 max_field_bytes: int = CHUNK_SIZE, what: str = "Upload"):
+        kind, params = parse_options_header(content_type or '')
+        if kind != b'multipart/form-data' or b'boundary' not in params:
+            raise MalformedUpload("Expected a multipart/form-data request body")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.file_field = file_field
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_file_bytes if max_total_bytes is None else max_total_bytes
+        self.max_files = max_files
+        self.extensions = extensions
+        self.archive_extensions = archive_extensions
+        self.directory = directory
+        self.max_field_bytes = max_field_bytes
+        self.what = what
+        self.fields: Dict[str, str] = {}
+        self.files: List[Dict] = []
+        self.total = 0
+        self._done = False
+        self._header_name = bytearray()
+        self._header_value = bytearray()
+        self._part_begin()
+        self._parser = multipart.MultipartParser(params[b'boundary'], {
+            'on_part_begin': self._part_begin,
+            'on_part_data': self._part_data,
+            'on_part_end': self._part_end,
+            'on_header_field': lambda data, start, end: self._header_name.extend(data[start:end]),
+            'on_header_value': lambda data, start, end: self._header_value.extend(data[start:end]),
+            'on_header_end': self._header_end,
+            'on_headers_finished': self._headers_finished,
+            'on_end': self._end
+        })
+
+    def write(self, chunk: bytes):
+        try:
+            self._parser.write(chunk)
+        except FormParserError as e:
+            raise MalformedUpload(f"Invalid multipart body: {e}")
+
+    def finish(self):
+        self._parser.finalize()
+        if not self._done:
+            raise MalformedUpload("Multipart body ended before its closing boundary")
+
+    def discard(self):
+        if self._dest is not None:
+            self._dest.close()
+            self._dest = None
+        remove_spooled(self.files)
+
+    def _part_begin(self):
+        self._disposition = b''
+        self._name = None
+        self._data = bytearray()
+        self._dest = None
+        self._entry = None
+        self._skip = False
+
+    def _header_end(self):
+        if bytes(self._header_name).lower() == b'content-disposition':
+            self._disposition = bytes(self._header_value)
+        self._header_name.clear()
+        self._header_value.clear()
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._name = options.get(b'name', b'').decode('utf-8', 'replace')
+        if b'filename' not in options:
+            return
+
+        filename = os.path.basename(options[b'filename'].decode('utf-8', 'replace'))
+        extension = os.path.splitext(filename)[1].lower()
+        archive = extension in self.archive_extensions
+        if self._name != self.file_field or not (
+                archive or self.extensions is None or extension in self.extensions):
+            self._skip = True
+            return
+        if archive:
+            limit = self.max_total_bytes
+        else:
+            if sum(1 for f in self.files if not f['archive']) >= self.max_files:
+                raise UploadTooLarge(f"{self.what} exceeds the {self.max_files} file limit")
+            limit = min(self.max_file_bytes, self.max_total_bytes - self.total)
+
+        fd, path = tempfile.mkstemp(suffix=extension, dir=self.directory)
+        self._dest = os.fdopen(fd, 'wb')
+        self._entry = {'filename': filename, 'path': path, 'size': 0, 'archive': archive}
+        self.files.append(self._entry)
+        self._digest = hashlib.sha256()
+        self._limit = limit
+        self._limit_error = _too_large(
+            limit, self.what if limit < self.max_file_bytes or archive else "Upload"
+        )
+
+    def _part_data(self, data: bytes, start: int, end: int):
+        if self._skip:
+            return
+        if self._entry is None:
+            if len(self._data) + end - start > self.max_field_bytes:
+                raise UploadTooLarge(f"Form field '{self._name}' exceeds {self.max_field_bytes} bytes")
+            self._data.extend(data[start:end])
+            return
+
+        chunk = data[start:end]
+        self._entry['size'] += len(chunk)
+        if self._entry['size'] > self._limit:
+            raise self._limit_error
+        self._digest.update(chunk)
+        self._dest.write(chunk)
+
+    def _part_end(self):
+        if self._entry is not None:
+            self._dest.close()
+            self._dest = None
+            self._entry['content_hash'] = self._digest.hexdigest()
+            if not self._entry['archive']:
+                self.total += self._entry['size']
+        elif not self._skip and self._name:
+            self.fields[self._name] = self._data.decode('utf-8', 'replace')
+
+    def _end(self):
+        self._done = True
+
+
+def spool_zip_members(archive_path: str, files: List[Dict], extensions: Tuple[str, ...],
+                      max_file_bytes: int, max_total_bytes: int, max_files: int) -> int:
+    """Extract matching members of a spooled zip straight into spool files of their own.
+
+    Sizes are enforced on the decompressed stream rather than trusted from the zip headers.
+    Spooled entries are appended to ``files`` as they are written so the caller can clean
+    them up whatever happens. Returns the number of bytes written.
+    """
+    total = 0
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(extensions):
+                continue
+            if len(files) >= max_files:
+                raise UploadTooLarge(f"Batch upload exceeds the {max_files} file limit")
+
+            fd, path = tempfile.mkstemp(suffix=os.path.splitext(member.filename)[1].lower())
+            os.close(fd)
+            entry = {'filename': os.path.basename(member.filename), 'path': path}
+            files.append(entry)
+            remaining = max_total_bytes - total
+            with archive.open(member) as source:
+                size, content_hash = _copy_capped(
+                    source.read, path, min(max_file_bytes, remaining),
+                    "Resume in archive" if max_file_bytes <= remaining else "Batch upload"
+                )
+            entry.update(size=size, content_hash=content_hash)
+            total += size
+    return total
+
+
+class RequestBodyLimit:
+    """ASGI middleware that caps request bodies per path while they stream in.
+
+    The form parser spools uploads to disk before a route runs, so a size check in the
+    route only happens after the whole body has been received. This answers 413 as soon as
+    Content-Length, or the bytes actually received, pass the path's limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope['path']) if scope['type'] == 'http' else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        too_large = _too_large(limit, "Request body")
+        for name, value in scope.get('headers', []):
+            if name == b'content-length' and value.isdigit() and int(value) > limit:
+                await self._reject(too_large, send)
+                return
+
+        state = {'received': 0, 'exceeded': False, 'started': False}
+
+        async def limited_receive():
+            message = await receive()
+            if message['type'] == 'http.request':
+                state['received'] += len(message.get('body', b''))
+                if state['received'] > limit:
+                    state['exceeded'] = True
+                    raise too_large
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app makes of the aborted body (a parse error, usually) is replaced by the 413
+            if state['exceeded']:
+                return
+            if message['type'] == 'http.response.start':
+                state['started'] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not state['exceeded']:
+                raise
+        if state['exceeded'] and not state['started']:
+            await self._reject(too_large, send)
+
+    @staticmethod
+    async def _reject(error: UploadTooLarge, send):
+        body = json.dumps({'detail': str(error)}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 413, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+            (b'connection', b'close')
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def remove_spooled(files: List[Dict]):
+    for f in files:
+        if os.path.exists(f['path']):
+            os.unlink(f['path'])
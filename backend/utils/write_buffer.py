@@ -0,0 +1,147 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from utils.metrics import detach_request, timed
+
+
+class WriteBehindBuffer:
+    """Coalesces single writes into bulk flushes.
+
+    ``submit`` queues an item and resolves with its result once the batch holding it has
+    been written, so a caller never sees an id that is not persisted. A batch is flushed
+    when it reaches ``max_batch`` items or ``max_delay`` seconds after its first item.
+    """
+
+    def __init__(self, flush_fn: Callable[[List], Awaitable[List]], max_batch: int = 200,
+                 max_delay: float = 0.05):
+        self.flush_fn = flush_fn
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._pending: List[Tuple[object, asyncio.Future]] = []
+        self._timer = None
+        self._flushes = set()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        if self._closed:
+            raise RuntimeError("Write buffer is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[object, asyncio.Future]]):
+        # A batch serves many requests; don't bill its database calls to whichever one started it
+        detach_request()
+        try:
+            results = await self.flush_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one by one so a single bad row does not fail the whole batch
+                for entry in batch:
+                    await self._write([entry])
+                return
+            results = [e]
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled; the write still happened
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def flush(self):
+        self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    async def close(self):
+        """Stop accepting writes and wait until everything queued is persisted."""
+        self._closed = True
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+class ScreeningWriter:
+    """Write-behind persistence for screening results: resume documents go to Mongo with
+    one bulk upsert per batch, candidate scores and skills to SQL in one transaction.
+
+    A screening's resume and score writes go inside ``async with writer.screening():`` so
+    ``close`` can wait for screenings that have stored a resume but not yet their score.
+    """
+
+    def __init__(self, mongo_db, sql_db, max_batch: int = 200, max_delay: float = 0.05):
+        self.sql_db = sql_db
+        self.resumes = WriteBehindBuffer(mongo_db.store_resumes, max_batch, max_delay)
+        self.scores = WriteBehindBuffer(self._store_scores, max_batch, max_delay)
+        self._in_flight = 0
+        self._idle = None
+        self._closing = False
+
+    async def _store_scores(self, items: List[Tuple[Dict, List[Dict], List[float]]]) -> List[int]:
+        return await self.sql_db.store_candidate_scores_async(
+            [row for row, _, _ in items], [skills for _, skills, _ in items],
+            [features for _, _, features in items]
+        )
+
+    @timed('persist.resume')
+    async def store_resume(self, resume_data: Dict):
+        return await self.resumes.submit(resume_data)
+
+    @timed('persist.candidate')
+    async def store_candidate_score(self, data: Dict, skills: List[Dict] = None,
+                                    features: List[float] = None) -> int:
+        return await self.scores.submit((data, skills or [], features))
+
+    @asynccontextmanager
+    async def screening(self):
+        """Hold the writer open for one screening's resume and score writes."""
+        if self._closing:
+            raise RuntimeError("Screening writer is closed")
+        self._in_flight += 1
+        try:
+            yield self
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight and self._idle is not None:
+                self._idle.set()
+
+    async def close(self):
+        """Reject new screenings, wait for in-flight ones to queue their writes, then flush."""
+        self._closing = True
+        if self._in_flight:
+            self._idle = asyncio.Event()
+            await self._idle.wait()
+        await self.resumes.close()
+        await self.scores.close()
+
+    def stats(self) -> Dict:
+        return {'resumes': self.resumes.stats(), 'scores': self.scores.stats()}
@@ -0,0 +1,198 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import uuid
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # Windows: every API process supervises its own workers
+    fcntl = None
+
+from models.llm_engine import LLMEngine
+from models.ml_classifier import watch_current_version
+from models.registry import ModelRegistry
+from database.mongo_db import MongoDB
+from database.sql_db import SQLDatabase
+from config import Config
+from screening import screen_and_store
+from utils.job_queue import JobQueue, remove_payload_file
+from utils.parse_cache import ParseCache
+from utils.pipeline import PipelineExecutor, ScreeningPipeline
+from utils.write_buffer import ScreeningWriter
+
+
+async def _heartbeat(queue: JobQueue, job_id: str, worker_id: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.get_running_loop().run_in_executor(None, queue.heartbeat, job_id, worker_id)
+
+
+async def _work(worker_id: str, model_registry: ModelRegistry = None):
+    config = Config()
+    queue = JobQueue(config.JOB_QUEUE_PATH, config.JOB_VISIBILITY_TIMEOUT, config.JOB_MAX_ATTEMPTS)
+    executor = PipelineExecutor(config.JOB_WORKER_THREADS, config.JOB_WORKER_THREADS)
+    # A registry inherited from a preloaded parent is already loaded, so this returns at once
+    model_registry = model_registry or ModelRegistry.default()
+    model_registry.load_all()
+    pipeline = ScreeningPipeline(
+        executor, model_registry.get('resume_parser'), model_registry.get('skill_matcher'),
+        model_registry.get('ml_classifier'), model_registry.get('bias_detector'),
+        LLMEngine(config.GOOGLE_API_KEY),
+        ParseCache(config.PARSE_CACHE_PATH, config.PARSE_CACHE_MAX_MB * 1024 * 1024)
+    )
+    mongo_db = MongoDB(config.MONGO_URI, config.MONGO_DB)
+    sql_db = SQLDatabase(config.SQL_URI)
+    writer = ScreeningWriter(
+        mongo_db, sql_db, config.WRITE_BUFFER_MAX_BATCH, config.WRITE_BUFFER_MAX_DELAY_MS / 1000
+    )
+    await mongo_db.connect()
+    model_watch = asyncio.create_task(watch_current_version(
+        model_registry.get('ml_classifier'), executor, config.MODEL_POLL_SECONDS
+    ))
+    print(f"✅ Screening worker {worker_id} ready")
+    parent_pid = os.getppid()
+
+    try:
+        # Stop when the supervising process is gone; its replacement starts a fresh set
+        while os.getppid() == parent_pid:
+            job = await executor.run_io(queue.claim, worker_id)
+            if job is None:
+                await asyncio.sleep(config.JOB_POLL_INTERVAL)
+                continue
+
+            heartbeat = asyncio.create_task(
+                _heartbeat(queue, job['id'], worker_id, config.JOB_VISIBILITY_TIMEOUT / 3)
+            )
+            try:
+                payload = job['payload']
+                result = await screen_and_store(
+                    pipeline, writer, payload['file_path'], payload['filename'], payload['job'],
+                    payload.get('content_hash')
+                )
+                heartbeat.cancel()
+                # If our lease lapsed and another worker reclaimed the job, its spool file is theirs now
+                if await executor.run_io(queue.complete, job['id'], worker_id, result):
+                    remove_payload_file(job['payload'])
+            except Exception as e:
+                heartbeat.cancel()
+                final = await executor.run_io(queue.fail, job['id'], worker_id, str(e))
+                if final:
+                    remove_payload_file(job['payload'])
+    finally:
+        model_watch.cancel()
+        await writer.close()
+        await mongo_db.disconnect()
+        await sql_db.dispose_async()
+        executor.shutdown()
+
+
+def _new_worker_id() -> str:
+    return f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+async def _run_until_terminated(worker_id: str, model_registry: ModelRegistry = None):
+    # stop_workers sends SIGTERM; cancelling the task lets _work's cleanup flush and disconnect
+    main_task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+    except NotImplementedError:  # Windows event loops have no signal handlers
+        pass
+    await _work(worker_id, model_registry)
+
+
+def run_worker(worker_id: str = None, model_registry: ModelRegistry = None):
+    try:
+        asyncio.run(_run_until_terminated(worker_id or _new_worker_id(), model_registry))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+def _run_forked(model_registry: ModelRegistry, lock_file=None):
+    # Drop the handlers (and wakeup fd) inherited from the API server's event loop
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if lock_file is not None:
+        # Only the supervisor itself should keep the supervisor lock held
+        lock_file.close()
+    run_worker(model_registry=model_registry)
+
+
+def start_workers(count: int, model_registry: ModelRegistry = None, lock_file=None) -> List:
+    """Launch screening worker processes. Where fork is available they are forked from this
+    process and share whatever models it has already loaded; otherwise each loads its own."""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return [subprocess.Popen([sys.executable, os.path.abspath(__file__)]) for _ in range(count)]
+    context = multiprocessing.get_context('fork')
+    processes = [
+        context.Process(target=_run_forked, args=(model_registry, lock_file), name=f"screening-worker-{i}")
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def stop_workers(processes: List, timeout: float = 10.0):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        if isinstance(process, subprocess.Popen):
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        else:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+class WorkerSupervisor:
+    """Starts the deployment's screening workers from exactly one API process.
+
+    Every API worker (e.g. each gunicorn fork) calls ``start``; only the one that takes the
+    lock file launches workers, so there are ``count`` of them in total rather than per API
+    process. If that process dies the lock is released and the next API worker to start
+    takes over, while the orphaned workers notice their parent is gone and exit.
+    """
+
+    def __init__(self, lock_path: str, count: int, model_registry: ModelRegistry = None):
+        self.lock_path = lock_path
+        self.count = count
+        self.model_registry = model_registry
+        self.processes: List = []
+        self._lock_file = None
+
+    def start(self) -> bool:
+        if self.count <= 0:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file
+        self.processes = start_workers(self.count, self.model_registry, lock_file)
+        print(f"✅ Supervising {len(self.processes)} screening workers (pid {os.getpid()})")
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        stop_workers(self.processes, timeout)
+        self.processes = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+if __name__ == "__main__":
+    run_worker()
@@ -0,0 +1,302 @@
+# End-to-end screening pipeline benchmark over a synthetic resume corpus
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+
+from benchmarks.resume_corpus import iter_corpus
+
+
+class StubLLM:
+    """Stands in for the Gemini model: canned JSON after an optional fixed delay."""
+
+    RESPONSE = json.dumps({
+        'overall_assessment': 'Benchmark stub response.',
+        'strengths': ['Relevant skills'],
+        'weaknesses': ['None noted'],
+        'recommendations': ['None'],
+        'hiring_recommendation': 'Maybe'
+    })
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+
+    def generate_content(self, prompt: str):
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(text=self.RESPONSE)
+
+    async def generate_content_async(self, prompt: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(text=self.RESPONSE)
+
+
+class MemoryResumeStore:
+    """Stands in for MongoDB when no --mongo-uri is given; only hands out ids."""
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def store_resumes(self, resumes: List[Dict]) -> List[str]:
+        return [uuid.uuid4().hex for _ in resumes]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(samples: List[float]) -> Dict:
+    ms = np.asarray(samples) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+        'total_s': round(float(ms.sum()) / 1000, 3)
+    }
+
+
+def build_corpus_subprocess(corpus_dir: str, count: int, seed: int, pdf_ratio: float) -> Dict:
+    """Generate (or reuse) the corpus in a child process so its memory is not in our peak RSS."""
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'resume_corpus.py'), corpus_dir,
+         '--count', str(count), '--seed', str(seed), '--pdf-ratio', str(pdf_ratio)],
+        stdout=sys.stderr, check=True
+    )
+    with open(os.path.join(corpus_dir, 'manifest.json')) as f:
+        return json.load(f)
+
+
+def load_components(workdir: str, args) -> Dict:
+    # Isolate every cache and database in the work dir; must happen before config is imported
+    os.environ['LLM_CACHE_PATH'] = ''
+    os.environ['LLM_RATE_LIMIT_RPS'] = '0'
+    os.environ['EMBEDDING_CACHE_PATH'] = os.path.join(workdir, 'embeddings.sqlite')
+
+    from config import Config
+    from models.bias_detector import BiasDetector
+    from models.llm_engine import LLMEngine
+    from models.ml_classifier import MLClassifier
+    from models.resume_parser import ResumeParser
+    from models.skill_matcher import SkillMatcher
+    from database.sql_db import SQLDatabase
+    from utils.pipeline import PipelineExecutor, ScreeningPipeline
+    from utils.write_buffer import ScreeningWriter
+
+    sql_db = SQLDatabase(f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}")
+    sql_db.create_tables()
+    if args.mongo_uri:
+        from database.mongo_db import MongoDB
+        mongo_db = MongoDB(args.mongo_uri, f"resume_bench_{uuid.uuid4().hex[:8]}")
+    else:
+        mongo_db = MemoryResumeStore()
+
+    executor = PipelineExecutor(Config.PIPELINE_CPU_WORKERS, Config.PIPELINE_IO_WORKERS)
+    ml_classifier = MLClassifier(args.model_dir or os.path.join(workdir, 'models'))
+    # No parse cache: every resume is parsed, as on a first upload
+    pipeline = ScreeningPipeline(
+        executor, ResumeParser(), SkillMatcher(), ml_classifier, BiasDetector(),
+        LLMEngine(None, model=StubLLM(args.llm_latency_ms))
+    )
+    writer = ScreeningWriter(
+        mongo_db, sql_db, Config.WRITE_BUFFER_MAX_BATCH, Config.WRITE_BUFFER_MAX_DELAY_MS / 1000
+    )
+    return {
+        'pipeline': pipeline, 'writer': writer, 'executor': executor, 'sql_db': sql_db,
+        'mongo_db': mongo_db, 'ml_classifier': ml_classifier
+    }
+
+
+async def screen_corpus(c: Dict, entries: List[Dict], concurrency: int, record: bool) -> Dict:
+    """Run entries through screen_and_store, ``concurrency`` at a time, as API requests would.
+
+    Per-stage times come from the spans the pipeline records for each request
+    (utils.metrics), summed per resume when a stage runs more than once.
+    """
+    from screening import screen_and_store
+    from utils import metrics
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stages = defaultdict(list)
+    totals = []
+    errors = 0
+
+    async def screen(entry: Dict):
+        nonlocal errors
+        async with semaphore:
+            # Each task runs in its own context, so these timings belong to this resume only
+            timings = metrics.start_request() if record else metrics.detach_request()
+            start = time.perf_counter()
+            try:
+                await screen_and_store(
+                    c['pipeline'], c['writer'], entry['path'], os.path.basename(entry['path']), entry['job']
+                )
+            except Exception as e:
+                errors += 1
+                print(f"⚠️ {entry['path']}: {e}", file=sys.stderr)
+                return
+            totals.append(time.perf_counter() - start)
+            if record:
+                per_stage = defaultdict(float)
+                for stage, seconds in timings:
+                    per_stage[stage] += seconds
+                for stage, seconds in per_stage.items():
+                    stages[stage].append(seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(screen(entry) for entry in entries))
+    return {'wall': time.perf_counter() - started, 'totals': totals, 'stages': stages, 'errors': errors}
+
+
+def run_benchmark(args) -> Dict:
+    corpus_dir = args.corpus_dir or os.path.join(tempfile.gettempdir(), f"resume-corpus-{args.count}-{args.seed}")
+    started = time.perf_counter()
+    manifest = build_corpus_subprocess(corpus_dir, args.count, args.seed, args.pdf_ratio)
+    corpus_seconds = time.perf_counter() - started
+
+    workdir = tempfile.mkdtemp(prefix='resume-bench-')
+    try:
+        return asyncio.run(_run_timed(args, corpus_dir, manifest, corpus_seconds, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def _run_timed(args, corpus_dir: str, manifest: Dict, corpus_seconds: float, workdir: str) -> Dict:
+    started = time.perf_counter()
+    components = load_components(workdir, args)
+    await components['mongo_db'].connect()
+    load_seconds = time.perf_counter() - started
+
+    try:
+        entries = list(iter_corpus(corpus_dir, manifest))
+        await screen_corpus(components, entries[:args.warmup], args.concurrency, record=False)
+        run = await screen_corpus(components, entries, args.concurrency, record=True)
+    finally:
+        await components['writer'].close()
+        if args.mongo_uri:
+            await components['mongo_db'].client.drop_database(components['mongo_db'].db_name)
+        await components['mongo_db'].disconnect()
+        await components['sql_db'].dispose_async()
+        components['sql_db'].engine.dispose()
+        components['executor'].shutdown()
+
+    totals, wall = run['totals'], run['wall']
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'count': args.count, 'seed': args.seed, 'pdf_ratio': args.pdf_ratio,
+            'warmup': args.warmup, 'concurrency': args.concurrency, 'llm_latency_ms': args.llm_latency_ms,
+            'mongo': bool(args.mongo_uri), 'trained_model': components['ml_classifier'].version
+        },
+        'corpus_seconds': round(corpus_seconds, 2),
+        'model_load_seconds': round(load_seconds, 2),
+        'resumes': len(totals),
+        'errors': run['errors'],
+        'wall_seconds': round(wall, 3),
+        'throughput_per_second': round(len(totals) / wall, 2) if wall else 0.0,
+        # The corpus is generated in a child process, so this is the pipeline's own peak
+        'peak_rss_mb': peak_rss_mb(),
+        'total': summarize(totals) if totals else None,
+        'stages': {stage: summarize(samples) for stage, samples in sorted(run['stages'].items())}
+    }
+
+
+def compare(result: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Stages whose p95 (and overall throughput) got worse than the baseline by more than max_regression."""
+    regressions = []
+    for stage, stats in result['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if before and before['p95_ms'] > 0 and stats['p95_ms'] > before['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{stage}: p95 {before['p95_ms']} ms -> {stats['p95_ms']} ms")
+    before = baseline.get('throughput_per_second')
+    if before and result['throughput_per_second'] < before * (1 - max_regression):
+        regressions.append(f"throughput: {before}/s -> {result['throughput_per_second']}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resume screening pipeline stage by stage")
+    parser.add_argument('--count', type=int, default=200, help="resumes in the corpus (1 to 100000)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pdf-ratio', type=float, default=0.5, help="share of PDFs; the rest are DOCX")
+    parser.add_argument('--warmup', type=int, default=5, help="untimed resumes run first")
+    parser.add_argument('--concurrency', type=int, default=8, help="resumes screened at once, like concurrent requests")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="simulated LLM response time")
+    parser.add_argument('--mongo-uri', help="store resumes in this MongoDB (a throwaway database) instead of memory")
+    parser.add_argument('--corpus-dir', help="where to build (or reuse) the corpus")
+    parser.add_argument('--model-dir', help="trained model artifacts to score with (default: rule-based)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="previous JSON report to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="allowed slowdown vs the baseline before exiting non-zero")
+    args = parser.parse_args()
+    if not 1 <= args.count <= 100000:
+        parser.error("--count must be between 1 and 100000")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # Component start-up messages go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        result = run_benchmark(args)
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+        print(f"✅ {result['resumes']} resumes, {result['throughput_per_second']}/s, "
+              f"peak RSS {result['peak_rss_mb']} MB -> {args.output}")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"❌ Regression {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Synthetic PDF/DOCX resume corpus built from SampleDataGenerator profiles
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Dict, Iterator, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import docx
+from dataset.sample_data import SampleDataGenerator
+
+COMPANIES = [
+    "Acme Corp", "Globex", "Initech", "Umbrella Systems", "Stark Industries",
+    "Wayne Enterprises", "Hooli", "Pied Piper", "Cyberdyne", "Soylent Labs"
+]
+ACHIEVEMENTS = [
+    "Built and maintained services in {skill} handling millions of requests per day",
+    "Led a team of {n} engineers delivering a {skill} platform migration",
+    "Reduced infrastructure costs by {n}0% by re-architecting {skill} workloads",
+    "Designed CI/CD pipelines and automated testing for {skill} projects",
+    "Mentored junior developers and ran {skill} code reviews",
+    "Shipped customer-facing features using {skill} in an Agile team"
+]
+
+LINES_PER_PAGE = 52
+
+
+def resume_lines(candidate: Dict, rng: random.Random) -> List[str]:
+    """Plain-text resume in the usual section order for one generated candidate."""
+    skills = candidate['skills']
+    years = candidate['total_experience']
+    lines = [
+        candidate['name'],
+        f"{candidate['email']} | {candidate['phone']}",
+        candidate['job_title'],
+        "",
+        "SUMMARY",
+        f"{candidate['job_title']} with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE"
+    ]
+    end_year = 2024
+    for _ in range(rng.randint(1, 6)):
+        start_year = end_year - rng.randint(1, 4)
+        lines.append(f"{candidate['job_title']} - {rng.choice(COMPANIES)} ({start_year} - {end_year})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append("- " + rng.choice(ACHIEVEMENTS).format(skill=rng.choice(skills), n=rng.randint(2, 9)))
+        lines.append("")
+        end_year = start_year
+    lines += ["EDUCATION"] + candidate['education'] + [""]
+    if candidate['certifications']:
+        lines += ["CERTIFICATIONS"] + candidate['certifications']
+    return lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: str, lines: List[str]):
+    """Minimal text-only PDF (Helvetica, one content stream per page) readable by pdfplumber."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = []
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td\n" + "".join(
+            f"({_pdf_escape(line)}) Tj T*\n" for line in page_lines
+        ) + "ET"
+        data = stream.encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_id = len(objects) + 3
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects) + 3)
+
+    header = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)
+        ),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(header + objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(body)
+
+
+def write_docx(path: str, lines: List[str]):
+    document = docx.Document()
+    document.add_heading(lines[0], level=0)
+    for line in lines[1:]:
+        if line.isupper():
+            document.add_heading(line.title(), level=1)
+        else:
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def build_corpus(directory: str, count: int, seed: int = 42, pdf_ratio: float = 0.5) -> Dict:
+    """Write ``count`` resumes to ``directory`` and return the manifest.
+
+    A corpus already built there with the same parameters is reused, so repeated
+    benchmark runs only pay for generation once.
+    """
+    params = {'count': count, 'seed': seed, 'pdf_ratio': pdf_ratio}
+    manifest_path = os.path.join(directory, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['params'] == params:
+            return manifest
+
+    os.makedirs(directory, exist_ok=True)
+    random.seed(seed)  # SampleDataGenerator draws from the global generator
+    rng = random.Random(seed)
+    generator = SampleDataGenerator()
+    jobs = [generator.generate_job_description() for _ in range(10)]
+    files = []
+    for i in range(count):
+        candidate = generator.generate_candidate()
+        lines = resume_lines(candidate, rng)
+        if rng.random() < pdf_ratio:
+            path = os.path.join(directory, f"resume-{i:06d}.pdf")
+            write_pdf(path, lines)
+        else:
+            path = os.path.join(directory, f"resume-{i:06d}.docx")
+            write_docx(path, lines)
+        files.append({'path': os.path.basename(path), 'job': i % len(jobs)})
+
+    manifest = {'params': params, 'jobs': jobs, 'files': files}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def iter_corpus(directory: str, manifest: Dict) -> Iterator[Dict]:
+    for entry in manifest['files']:
+        yield {'path': os.path.join(directory, entry['path']), 'job': manifest['jobs'][entry['job']]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF/DOCX resume corpus")
+    parser.add_argument('directory')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pdf-ratio', type=float, default=0.5)
+    args = parser.parse_args()
+    manifest = build_corpus(args.directory, args.count, args.seed, args.pdf_ratio)
+    print(f"✅ {len(manifest['files'])} resumes in {args.directory}")
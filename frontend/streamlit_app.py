@@ -20,6 +20,7 @@ from backend.models.ml_classifier import MLClassifier
 from backend.models.bias_detector import BiasDetector
 from backend.models.llm_engine import LLMEngine
 from backend.database.sql_db import SQLDatabase
+from backend.utils.analytics import CandidateAnalytics
 from backend.config import Config
 
 st.set_page_config(
@@ -51,10 +52,11 @@ def get_components():
     # Note: MongoDB requires a cloud connection string in secrets for persistence
     sql_db = SQLDatabase("sqlite:///./resume_db.sqlite")
     sql_db.create_tables()
+    analytics = CandidateAnalytics(sql_db, Config.ANALYTICS_MIN_REFRESH_SECONDS, Config.ANALYTICS_FULL_REFRESH_SECONDS)
     
-    return resume_parser, skill_matcher, ml_classifier, bias_detector, llm_engine, sql_db
+    return resume_parser, skill_matcher, ml_classifier, bias_detector, llm_engine, sql_db, analytics
 
-resume_parser, skill_matcher, ml_classifier, bias_detector, llm_engine, sql_db = get_components()
+resume_parser, skill_matcher, ml_classifier, bias_detector, llm_engine, sql_db, analytics = get_components()
 
 # Custom CSS for Glassmorphism and Modern UI
 st.markdown("""
@@ -263,7 +265,7 @@ if page == "Screen Resume":
                         'overall_score': (skill_match_result['match_percentage'] + ml_prediction['confidence'] * 100) / 2,
                         'bias_detected': bias_report['has_bias'],
                         'timestamp': pd.Timestamp.now()
-                    })
+                    }, features=features[0].tolist())
 
                     # Results Section
                     st.markdown('<div class="glass-container">', unsafe_allow_html=True)
@@ -348,16 +350,14 @@ elif page == "Analytics":
     st.markdown('<h1 style="text-align: center;">📈 <span class="gradient-text">Recruitment Analytics</span></h1>', unsafe_allow_html=True)
     
     try:
-        candidates = sql_db.get_all_candidates(1000)
-        if candidates:
-            df = pd.DataFrame(candidates)
-            
+        stats = analytics.snapshot(bins=20)
+        if stats['total_candidates']:
             # Top Stats Row
             st.markdown('<div class="glass-container">', unsafe_allow_html=True)
             c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Total Candidates", len(df))
-            c2.metric("Avg Score", f"{df['overall_score'].mean():.1f}")
-            c3.metric("Top Talent", len(df[df['ml_prediction'] == 'Highly Suitable']))
+            c1.metric("Total Candidates", stats['total_candidates'])
+            c2.metric("Avg Score", f"{stats['average_score']:.1f}")
+            c3.metric("Top Talent", stats['by_prediction'].get('Highly Suitable', 0))
             c4.metric("Avg Experience", "N/A") 
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -366,7 +366,9 @@ elif page == "Analytics":
             with col1:
                 st.markdown('<div class="glass-container">', unsafe_allow_html=True)
                 st.subheader("Score Distribution")
-                fig = px.histogram(df, x="overall_score", nbins=20, color_discrete_sequence=['#4f46e5'])
+                hist_df = pd.DataFrame(stats['score_histogram'])
+                hist_df['range'] = hist_df['start'].map('{:.0f}'.format) + '-' + hist_df['end'].map('{:.0f}'.format)
+                fig = px.bar(hist_df, x="range", y="count", color_discrete_sequence=['#4f46e5'])
                 fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
                 st.plotly_chart(fig, use_container_width=True)
                 st.markdown("</div>", unsafe_allow_html=True)
@@ -374,10 +376,30 @@ elif page == "Analytics":
             with col2:
                 st.markdown('<div class="glass-container">', unsafe_allow_html=True)
                 st.subheader("Suitability Breakdown")
-                fig = px.pie(df, names="ml_prediction", color_discrete_sequence=px.colors.sequential.RdBu)
+                pred_df = pd.DataFrame(list(stats['by_prediction'].items()), columns=["ml_prediction", "count"])
+                fig = px.pie(pred_df, names="ml_prediction", values="count", color_discrete_sequence=px.colors.sequential.RdBu)
                 fig.update_layout(paper_bgcolor="rgba(0,0,0,0)")
                 st.plotly_chart(fig, use_container_width=True)
                 st.markdown("</div>", unsafe_allow_html=True)
+
+            col3, col4 = st.columns(2)
+            with col3:
+                st.markdown('<div class="glass-container">', unsafe_allow_html=True)
+                st.subheader("Candidates by Job")
+                fig = px.bar(pd.DataFrame(stats['by_job_title']), x="job_title", y="count",
+                             hover_data=["average_score"], color_discrete_sequence=['#4f46e5'])
+                fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                st.plotly_chart(fig, use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+            with col4:
+                st.markdown('<div class="glass-container">', unsafe_allow_html=True)
+                st.subheader("Daily Volume")
+                fig = px.line(pd.DataFrame(stats['by_day']), x="date", y="count", markers=True,
+                              color_discrete_sequence=['#4f46e5'])
+                fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                st.plotly_chart(fig, use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
         else:
             st.info("No data available for analytics.")
     except Exception as e: